@@ -6,89 +6,117 @@ from dotenv import load_dotenv
 from flask import Flask
 from flask_cors import CORS
 from flask_socketio import SocketIO
-from datetime import datetime
-
-from .state import config
-from .trading.stream.polygon_stream import PolygonStream
-from .utils.timezone_utils import get_eastern_time
 
 load_dotenv()
 
 # Global shared instances
-socketio = SocketIO(cors_allowed_origins="*")
-polygon_stream = PolygonStream()
-# Do not set socketio or subscribe to any ticker until select_ticker is received
-
-class EasternTimeFormatter(logging.Formatter):
-    """Custom formatter that uses Eastern Time for timestamps"""
-    
-    def formatTime(self, record, datefmt=None):
-        # Convert to Eastern Time for logging
-        eastern_time = get_eastern_time()
-        if datefmt:
-            return eastern_time.strftime(datefmt)
-        else:
-            return eastern_time.strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
-
-# Set up logging with Eastern Time formatter
-formatter = EasternTimeFormatter(
-    fmt='[%(asctime)s] %(levelname)s in %(name)s: %(message)s'
-)
-
-# Configure root logger
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
-
-# Remove existing handlers to avoid duplicates
-for handler in root_logger.handlers[:]:
-    root_logger.removeHandler(handler)
-
-# Add handler with Eastern Time formatter
-handler = logging.StreamHandler()
-handler.setFormatter(formatter)
-root_logger.addHandler(handler)
-
-# Explicitly set tracker logger to INFO
-logging.getLogger('backend.app.trading.pullbacks.tracker').setLevel(logging.INFO)
+# MOMO_SOCKETIO_ASYNC_MODE=threading delivers emits made from the Polygon thread without eventlet monkey patching
+socketio = SocketIO(cors_allowed_origins="*", async_mode=os.getenv("MOMO_SOCKETIO_ASYNC_MODE") or None)
+# Importing the package starts nothing: the stream, logging, DB and broker sync are started by startup.start()
+_polygon_stream = None
+polygon_thread = None
+
+def get_polygon_stream():
+    """The process-wide PolygonStream, created on first use."""
+    global _polygon_stream
+    if _polygon_stream is None:
+        from .trading.stream.polygon_stream import PolygonStream
+        _polygon_stream = PolygonStream()
+    return _polygon_stream
+
+def __getattr__(name):
+    # Keeps `from backend.app import polygon_stream` working while deferring the import chain behind it
+    if name == "polygon_stream":
+        return get_polygon_stream()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def sync_state_with_broker():
-    """Fetch all open positions from Alpaca and populate ticker_states."""
+    """
+    Fetch all open positions from Alpaca and populate ticker_states.
+    Positions restored from a snapshot keep their entry type, targets and stop; the broker's quantity and
+    average price win, and restored positions the broker no longer holds are dropped.
+    Until this succeeds restored positions stay flagged "restored": shown, but never exited.
+    """
     try:
         from .brokers.alpaca_broker import AlpacaBroker
         from .shared_state import ticker_states
         from .state import ALPACA_API_KEY, ALPACA_SECRET_KEY, ALPACA_BASE_URL
         broker = AlpacaBroker(ALPACA_API_KEY, ALPACA_SECRET_KEY, ALPACA_BASE_URL)
         positions = broker.get_positions()
-        for pos in positions:
-            symbol = pos.symbol.upper()
-            ticker_states[symbol]["position"] = {
-                "entry_price": float(getattr(pos, "avg_entry_price", 0)),
-                "size": int(getattr(pos, "qty", 0)),
-                "entry_type": "unknown",  # Can't infer from broker
-                "tp1": None, "tp2": None, "stop": None,
-                "tp1_hit": False, "tp2_hit": False, "sl_hit": False,
-                "alpaca_order_id": getattr(pos, 'id', None)
-            }
+        held = set()
+        with ticker_states.pin_lock:
+            for pos in positions:
+                symbol = pos.symbol.upper()
+                held.add(symbol)
+                restored = ticker_states[symbol].get("position")
+                if restored and restored.get("restored"):
+                    restored.update({
+                        "entry_price": float(getattr(pos, "avg_entry_price", restored.get("entry_price") or 0)),
+                        "size": int(getattr(pos, "qty", restored.get("size") or 0)),
+                        "alpaca_order_id": getattr(pos, 'id', restored.get("alpaca_order_id")),
+                    })
+                    # Confirmed: exits may manage it from here on
+                    restored.pop("restored", None)
+                    continue
+                ticker_states[symbol]["position"] = {
+                    "entry_price": float(getattr(pos, "avg_entry_price", 0)),
+                    "size": int(getattr(pos, "qty", 0)),
+                    "entry_type": "unknown",  # Can't infer from broker
+                    "tp1": None, "tp2": None, "stop": None,
+                    "tp1_hit": False, "tp2_hit": False, "sl_hit": False,
+                    "alpaca_order_id": getattr(pos, 'id', None)
+                }
+        for symbol, state in list(ticker_states.items()):
+            position = state.get("position")
+            if position and position.get("restored") and symbol not in held:
+                print(f"[State Sync] Dropping restored position for {symbol}: no longer open at broker.")
+                state["position"] = None
+        from .trading.core.strategy import refresh_trigger_band
+        for symbol in list(ticker_states):
+            refresh_trigger_band(symbol)
         print(f"[State Sync] Synced {len(positions)} open positions from broker.")
     except Exception as e:
         print(f"[State Sync] Failed to sync positions from broker: {e}")
+        print("[State Sync] Restored positions stay display-only until a broker sync confirms them.")
+
+def start_shard_pool():
+    """
+    Start sharded strategy workers when MOMO_SHARD_WORKERS > 0. Forks, so call it before starting other
+    threads; the log listener is the exception, log_utils stops it around the fork.
+    """
+    from .trading.sharding.workers import ShardPool, MOMO_SHARD_WORKERS
+    if MOMO_SHARD_WORKERS > 0:
+        polygon_stream = get_polygon_stream()
+        polygon_stream.shard_pool = ShardPool(MOMO_SHARD_WORKERS)
+        polygon_stream.shard_pool.start()
 
 def start_polygon_event_loop():
+    polygon_stream = get_polygon_stream()
     loop = asyncio.new_event_loop()
     polygon_stream.event_loop = loop  # Store the event loop for cross-thread scheduling
     asyncio.set_event_loop(loop)
-    loop.run_until_complete(polygon_stream.run_forever())
-
-polygon_thread = threading.Thread(target=start_polygon_event_loop, daemon=True)
-polygon_thread.start()
+    from .trading.stream.synthetic_feed import synthetic_feed_from_env
+    feed = synthetic_feed_from_env()
+    if feed is not None:
+        loop.run_until_complete(polygon_stream.run_synthetic(feed))
+    else:
+        loop.run_until_complete(polygon_stream.run_forever())
+
+def start_polygon_thread():
+    """Run the Polygon stream (or the synthetic feed) on its own event loop thread."""
+    global polygon_thread
+    if polygon_thread is None:
+        get_polygon_stream()
+        polygon_thread = threading.Thread(target=start_polygon_event_loop, name="polygon-stream", daemon=True)
+        polygon_thread.start()
+    return polygon_thread
 
 def create_app():
+    """Build the Flask app and register routes and Socket.IO events. Starts no background work."""
     app = Flask(__name__)
     CORS(app)
     socketio.init_app(app)
 
-    sync_state_with_broker()  # <-- Sync state before starting event loop
-
     from .routes import main_bp
     from .socketio_events import register_socket_events
 
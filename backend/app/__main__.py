@@ -1,17 +1,22 @@
 # app/__main__.py
 
+import time
+_t0 = time.perf_counter()
+
+import os
 import logging
 logging.getLogger('werkzeug').setLevel(logging.ERROR)
 
-from . import create_app, socketio
-import logging
+from . import socketio
+from .startup import start
 
 if __name__ == "__main__":
-    from .db import init_db
-    init_db()
-    app = create_app()
+    app = start(t0=_t0)
     print("🚀 Starting Momo Bot backend via __main__.py...")
+    # Only the threading mode runs on the Werkzeug dev server, which Flask-SocketIO refuses without this
+    threading_mode = os.getenv("MOMO_SOCKETIO_ASYNC_MODE") == "threading"
     try:
-        socketio.run(app, host="0.0.0.0", port=5050)
+        socketio.run(app, host="0.0.0.0", port=int(os.getenv("MOMO_PORT", "5050")),
+                     **({"allow_unsafe_werkzeug": True} if threading_mode else {}))
     except Exception as e:
-        logging.exception("🔥 Server error:")
\ No newline at end of file
+        logging.exception("🔥 Server error:")
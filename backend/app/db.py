@@ -2,7 +2,9 @@ import sqlite3
 from typing import List, Dict, Any
 import os
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'momo.db')
+from .utils.metrics import timed
+
+DB_PATH = os.getenv('MOMO_DB_PATH') or os.path.join(os.path.dirname(__file__), 'momo.db')
 
 def get_db():
     conn = sqlite3.connect(DB_PATH)
@@ -35,12 +37,18 @@ def init_db():
             datetime TEXT NOT NULL,
             trade_id INTEGER,
             commission REAL,
-            entry_type TEXT
+            entry_type TEXT,
+            trace_id TEXT
         )
     ''')
+    # Older databases predate the trace_id column
+    columns = [row['name'] for row in c.execute('PRAGMA table_info(executions)')]
+    if 'trace_id' not in columns:
+        c.execute('ALTER TABLE executions ADD COLUMN trace_id TEXT')
     conn.commit()
     conn.close()
 
+@timed("db_insert_trade")
 def insert_trade(trade: Dict[str, Any]):
     conn = get_db()
     c = conn.cursor()
@@ -68,12 +76,13 @@ def get_all_trades() -> List[Dict[str, Any]]:
     conn.close()
     return [dict(row) for row in rows]
 
+@timed("db_insert_execution")
 def insert_execution(exe: Dict[str, Any]):
     conn = get_db()
     c = conn.cursor()
     c.execute('''
-        INSERT INTO executions (symbol, quantity, price, side, datetime, trade_id, commission, entry_type)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO executions (symbol, quantity, price, side, datetime, trade_id, commission, entry_type, trace_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''', (
         exe['symbol'],
         exe['quantity'],
@@ -82,7 +91,8 @@ def insert_execution(exe: Dict[str, Any]):
         exe['datetime'],
         exe.get('trade_id'),
         exe.get('commission'),
-        exe.get('entry_type')
+        exe.get('entry_type'),
+        exe.get('trace_id')
     ))
     conn.commit()
     conn.close()
@@ -0,0 +1,161 @@
+# app/events.py
+
+"""
+In-process publish/subscribe bus for the trading pipeline.
+
+Topics and their (positional) payloads:
+  quote         (symbol, quote)               every live quote in the ingest process (SimpleQuote)
+  candle_close  (symbol, timeframe, candle)   a 10s/1m/5m candle closed; the dict is already in the candle list
+  level_change  (symbol, event, payload)      breakout/custom levels changed; event is the Socket.IO event name
+  order         (symbol, order)               an order went out; order is its executions-table row
+  fill          (symbol, fill)                a broker fill (trade_updates): price, filled_qty, side, timestamp
+
+Sync subscribers run in the publisher's thread, in subscription order, before publish() returns; the hot
+topics only have those. Async subscribers are queued to one background thread (DB writes). A failing
+subscriber is logged and skipped, the others still run. Sync dispatch time per publish goes to the
+bus_<topic> histogram (/metrics), async handler time to bus_<topic>_async.
+
+get_bus() creates the bus with the default subscribers the first time it's used, so publishers never
+import their consumers.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+
+from .utils.metrics import get_histogram, observe, incr, register_gauge
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ("quote", "candle_close", "level_change", "order", "fill")
+MODES = ("sync", "async")
+
+
+def _name(handler):
+    return f"{getattr(handler, '__module__', '?')}.{getattr(handler, '__qualname__', repr(handler))}"
+
+
+class EventBus:
+    def __init__(self):
+        self._sync = {topic: () for topic in TOPICS}
+        self._async = {topic: () for topic in TOPICS}
+        self._hists = {topic: get_histogram(f"bus_{topic}") for topic in TOPICS}
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, handler, mode="sync"):
+        """Add handler to topic (after the existing ones) and return it."""
+        if topic not in TOPICS:
+            raise ValueError(f"Unknown topic {topic!r}; expected one of {TOPICS}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown dispatch mode {mode!r}; expected one of {MODES}")
+        with self._lock:
+            # Tuples are swapped, never mutated, so publish() can iterate without the lock
+            table = self._sync if mode == "sync" else self._async
+            table[topic] = table[topic] + (handler,)
+            if mode == "async":
+                self._start_worker()
+        return handler
+
+    def unsubscribe(self, topic, handler):
+        with self._lock:
+            for table in (self._sync, self._async):
+                table[topic] = tuple(h for h in table[topic] if h != handler)
+
+    def publish(self, topic, *args):
+        start = time.perf_counter_ns()
+        for handler in self._sync[topic]:
+            try:
+                handler(*args)
+            except Exception:
+                incr("bus_error", label=topic)
+                logger.exception("[Bus] %s subscriber %s failed", topic, _name(handler))
+        for handler in self._async[topic]:
+            self._queue.put((topic, handler, args))
+        self._hists[topic].record(time.perf_counter_ns() - start)
+
+    def _start_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run_async, name="momo-event-bus", daemon=True)
+            self._thread.start()
+
+    def _run_async(self):
+        while True:
+            topic, handler, args = self._queue.get()
+            start = time.perf_counter_ns()
+            try:
+                handler(*args)
+            except Exception:
+                incr("bus_error", label=topic)
+                logger.exception("[Bus] async %s subscriber %s failed", topic, _name(handler))
+            finally:
+                observe(f"bus_{topic}_async", time.perf_counter_ns() - start)
+                self._queue.task_done()
+
+    def drain(self):
+        """Block until every queued async handler has run (tests, shutdown)."""
+        self._queue.join()
+
+    def backlog(self):
+        return self._queue.qsize()
+
+    def subscribers(self):
+        return {topic: {"sync": [_name(h) for h in self._sync[topic]],
+                        "async": [_name(h) for h in self._async[topic]]} for topic in TOPICS}
+
+    def _after_fork(self):
+        # Threads don't survive fork; shard workers get a fresh queue and worker
+        self._queue = queue.Queue()
+        self._thread = None
+        if any(self._async.values()):
+            self._start_worker()
+
+
+def _install_default_subscribers(bus):
+    """The pipeline's wiring, in dispatch order."""
+    from . import socketio_events
+    from .trading.indicators.microstructure import update_quote_stats
+    from .trading.indicators.engine import on_candle_close
+    from .trading.core.strategy import notify_candle_closed
+    from .trading.core.breakout_logic import on_candle_closed
+    from .trading.core.execution import record_execution
+    from .trading.core.trade_update import on_fill
+    from .trading.pullbacks.tracker import feed_closed_candle
+
+    bus.subscribe("quote", update_quote_stats)
+    bus.subscribe("quote", socketio_events.emit_quote)
+    # Indicators first so the exit, the close-time entry checks and the chart see this candle's values
+    bus.subscribe("candle_close", on_candle_close)
+    bus.subscribe("candle_close", notify_candle_closed)
+    bus.subscribe("candle_close", on_candle_closed)
+    bus.subscribe("candle_close", feed_closed_candle)
+    bus.subscribe("candle_close", socketio_events.emit_closed_candle)
+    bus.subscribe("level_change", socketio_events.emit_level_change)
+    bus.subscribe("order", record_execution, mode="async")
+    bus.subscribe("fill", on_fill)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    """The process-wide EventBus, created (with the default subscribers) on first use."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                bus = EventBus()
+                _install_default_subscribers(bus)
+                register_gauge("bus_async_backlog", lambda: {"queued": bus.backlog()})
+                os.register_at_fork(after_in_child=bus._after_fork)
+                _bus = bus
+    return _bus
+
+
+def publish(topic, *args):
+    """Shorthand for get_bus().publish(topic, *args)."""
+    (_bus or get_bus()).publish(topic, *args)
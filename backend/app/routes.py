@@ -11,7 +11,11 @@ from .utils.voice_utils import announce_trade_exit
 import csv
 from flask import Response
 from .trading.stream.polygon_stream import fetch_historical_aggregated_bars
+from .trading.stream.polygon_rest import get_rest_client
+from .utils.metrics import render_prometheus
 import traceback
+import os
+import time
 
 # Modular broker import (to be created)
 # If broker logic is needed, replace with internal simulation or remove
@@ -20,18 +24,22 @@ main_bp = Blueprint("main", __name__)
 
 @main_bp.route("/ping", methods=["GET"])
 def ping():
-    """Health check endpoint."""
-    return jsonify({"status": "ok", "message": "Momo Bot backend is alive"}), 200
+    """Health check endpoint. Also reports the current market session (premarket/regular/afterhours/closed)."""
+    from .trading.utils.time_tools import get_session_calendar, now_ms
+    return jsonify({"status": "ok", "message": "Momo Bot backend is alive",
+                    "session": get_session_calendar().session(now_ms())}), 200
 
 @main_bp.route("/state/<symbol>", methods=["GET"])
 def get_symbol_state(symbol):
     """Return the full runtime state for a given symbol."""
+    from .state_views import state_view, forget, json_response
     symbol = symbol.upper()
     state = ticker_states.get(symbol)
     if not state:
+        forget(symbol)
         return jsonify({"error": f"No state found for {symbol}"}), 404
 
-    return jsonify(state), 200
+    return json_response(state_view(symbol, state), request)
 
 @main_bp.route("/entry-type", methods=["POST"])
 def set_entry_type():
@@ -40,48 +48,24 @@ def set_entry_type():
     symbol = data.get("symbol", "").upper()
     entry_type = data.get("entry_type", "").lower()
 
-    if symbol and entry_type in ["10s", "1m", "5m"]:
-        ticker_states[symbol]["active_entry_type"] = entry_type
+    from .trading.core.trade_tape import TAPE_BARS, tape_entries_available
+    if entry_type in TAPE_BARS and not tape_entries_available():
+        print(f"⚠️ Tape entry type {entry_type} is not available with shard workers (MOMO_SHARD_WORKERS)")
+        return jsonify({"error": f"Tape entry type {entry_type} is not available with shard workers"}), 400
+    if symbol and (entry_type in ["10s", "1m", "5m"] or entry_type in TAPE_BARS):
+        from .trading.core.strategy import set_entry_type as apply_entry_type
+        from .socketio_events import sync_shards
+        apply_entry_type(symbol, entry_type)
+        sync_shards(symbol)
         return jsonify({"status": "ok", "symbol": symbol, "entry_type": entry_type}), 200
 
     return jsonify({"error": "Invalid symbol or entry_type"}), 400
 
 @main_bp.route("/positions", methods=["GET"])
 def get_all_positions():
-    """Return all open trading positions."""
-    positions = []
-    for symbol, state in ticker_states.items():
-        pos = state.get("position")
-        if pos:
-            last_quote = state.get("last_quote")
-            last_price = None
-            bid = ask = None
-            if last_quote:
-                bid = getattr(last_quote, "bid", None) or getattr(last_quote, "bid_price", None)
-                ask = getattr(last_quote, "ask", None) or getattr(last_quote, "ask_price", None)
-                if bid is not None and ask is not None:
-                    last_price = (bid + ask) / 2
-                elif bid is not None:
-                    last_price = bid
-                elif ask is not None:
-                    last_price = ask
-            entry_price = pos.get("entry_price")
-            size = pos.get("size")
-            unrealized = None
-            diff_per_share = None
-            if last_price is not None and entry_price is not None and size is not None:
-                diff_per_share = last_price - entry_price
-                unrealized = diff_per_share * size
-            positions.append({
-                "symbol": symbol,
-                **pos,
-                "last_price": last_price,
-                "bid": bid,
-                "ask": ask,
-                "unrealized": unrealized,
-                "diff_per_share": diff_per_share
-            })
-    return jsonify(positions), 200
+    """Return all open trading positions (cached; re-encoded only when a position or its quote changes)."""
+    from .state_views import positions_view, json_response
+    return json_response(positions_view(ticker_states), request)
 
 @main_bp.route("/trade-history", methods=["GET"])
 def trade_history():
@@ -157,7 +141,8 @@ def close_position():
         "datetime": entry_time,
         "trade_id": None,
         "commission": None,
-        "entry_type": entry_type
+        "entry_type": entry_type,
+        "trace_id": pos.get("trace_id")
     })
     # Insert Sell execution
     insert_execution({
@@ -168,7 +153,8 @@ def close_position():
         "datetime": now,
         "trade_id": None,
         "commission": None,
-        "entry_type": entry_type
+        "entry_type": entry_type,
+        "trace_id": order.get("trace_id")
     })
     # Record trade in DB
     profit_loss = (exit_price - entry_price) * size if entry_price and exit_price and size else 0
@@ -200,4 +186,133 @@ def get_candles():
     except Exception as e:
         print("Error in /api/candles:", e)
         traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@main_bp.route('/api/polygon-stats')
+def polygon_stats():
+    """Counters for the shared Polygon REST client (hits, coalesced waits, throttling)."""
+    return jsonify(get_rest_client().stats()), 200
+
+
+@main_bp.route('/indicators/<symbol>', methods=['GET'])
+def indicators(symbol):
+    """EMA9/20, MACD, ATR and session VWAP for a symbol: after the last closed candle and including the open one."""
+    from .trading.indicators.engine import latest, preview, CANDLE_KEYS
+    symbol = symbol.upper()
+    timeframe = request.args.get('timeframe', '1m')
+    if timeframe not in CANDLE_KEYS:
+        return jsonify({"error": f"Unknown timeframe {timeframe}"}), 400
+    if symbol not in ticker_states:
+        return jsonify({"error": f"No state found for {symbol}"}), 404
+    return jsonify({"symbol": symbol, "timeframe": timeframe,
+                    "closed": latest(symbol, timeframe), "live": preview(symbol, timeframe)}), 200
+
+@main_bp.route('/quote-stats/<symbol>', methods=['GET'])
+def quote_stats(symbol):
+    """Rolling spread, quote rate, size imbalance and quote stability for a symbol, per window."""
+    from .trading.indicators.microstructure import get_quote_stats
+    symbol = symbol.upper()
+    stats = get_quote_stats(symbol)
+    if stats is None:
+        return jsonify({"error": f"No quotes received for {symbol}"}), 404
+    return jsonify(dict(stats.to_dict(), symbol=symbol)), 200
+
+@main_bp.route('/tape/<symbol>', methods=['GET'])
+def tape(symbol):
+    """Recent trade prints and trade-built bars (true volume) for a symbol; ?bars=1m|10s|5m|<MOMO_TAPE_BARS type>."""
+    from .trading.core.trade_tape import TIME_FRAMES, TAPE_BARS
+    symbol = symbol.upper()
+    bars = request.args.get('bars', '1m')
+    limit = int(request.args.get('limit', 100))
+    if bars not in TIME_FRAMES and bars not in TAPE_BARS:
+        return jsonify({"error": f"Unknown bar type {bars}"}), 400
+    state = ticker_states.get(symbol)
+    tape = state.get("tape") if state else None
+    if tape is None:
+        return jsonify({"error": f"No trades received for {symbol}"}), 404
+    return jsonify({
+        "symbol": symbol,
+        "last_price": tape.last_price,
+        "volume": tape.volume,
+        "trades": tape.trades,
+        "prints": tape.recent(limit),
+        "bars": state.get(f"tape_bars_{bars}", [])[-limit:],
+        "current": state.get(f"tape_current_{bars}"),
+    }), 200
+
+@main_bp.route('/watchlist', methods=['GET'])
+def get_watchlist():
+    """Watchlist symbols with per-symbol quote counts, CPU time and feed lag."""
+    import backend.app.shared_state as shared_state
+    from . import polygon_stream
+    return jsonify({
+        "watched_ticker": shared_state.watched_ticker,
+        "watchlist": sorted(shared_state.watchlist),
+        "symbols": polygon_stream.get_symbol_stats(),
+        "shards": polygon_stream.shard_pool.stats() if polygon_stream.shard_pool else None,
+    }), 200
+
+
+@main_bp.route('/state-memory', methods=['GET'])
+def state_memory():
+    """Estimated memory used by each symbol's runtime state, plus the eviction budget."""
+    return jsonify(ticker_states.memory_report()), 200
+
+
+@main_bp.route('/scanner', methods=['GET'])
+def scanner_results():
+    """Latest ranked momentum scanner results and scan timings."""
+    from .trading.scanner.momentum_scanner import get_scanner_service
+    return jsonify(get_scanner_service().payload()), 200
+
+
+@main_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms, event counters and queue depths in Prometheus text format."""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@main_bp.route('/traces', methods=['GET'])
+def order_traces():
+    """Tick-to-order traces for the last N orders (?n=20): triggering quote plus per-hop latencies."""
+    from .utils.tracing import recent_order_traces
+    try:
+        n = int(request.args.get('n', 20))
+    except ValueError:
+        return jsonify({"error": "n must be an integer"}), 400
+    return jsonify(recent_order_traces(max(n, 0))), 200
+
+
+@main_bp.route('/admin/profile', methods=['GET'])
+def admin_profile():
+    """
+    Sample every thread of the running server for ?seconds=N (capped) and return collapsed stacks,
+    ready for flamegraph.pl or speedscope. ?format=json returns a summary with the hottest stacks instead.
+    """
+    from .utils.profiler import profile_for, ProfilerBusy, PROFILE_DEFAULT_INTERVAL_MS
+    admin_token = os.getenv("MOMO_ADMIN_TOKEN")
+    if admin_token and request.headers.get("X-Admin-Token") != admin_token:
+        return jsonify({"error": "forbidden"}), 403
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval_ms', PROFILE_DEFAULT_INTERVAL_MS))
+    except ValueError:
+        return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+    try:
+        profile = profile_for(seconds, interval_ms)
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    if request.args.get('format') == 'json':
+        return jsonify(profile.summary()), 200
+    return Response(
+        profile.collapsed(),
+        mimetype='text/plain',
+        headers={"Content-Disposition": f"attachment; filename=momo-profile-{int(time.time())}.folded"}
+    )
+
+
+@main_bp.route('/startup', methods=['GET'])
+def startup_timeline():
+    """Timeline of the startup steps (logging, app, DB init, broker sync, stream) in ms."""
+    from .startup import get_startup_timeline
+    return jsonify(get_startup_timeline()), 200
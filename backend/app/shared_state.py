@@ -1,23 +1,49 @@
-from collections import defaultdict
-
+import threading
 from typing import Any
 
+from .state_manager import TickerStates
+from .symbol_state import SymbolState
+
 watched_ticker = None
 breakout_ready = False
+# Additional symbols that run breakout logic alongside watched_ticker (watchlist mode)
+watchlist = set()
+
+
+class _Replay(threading.local):
+    # True while this thread replays historical quotes (gap backfill): candles and trackers rebuild, but
+    # nothing enters or exits. Per thread, so live handling elsewhere and breakout_ready are untouched
+    active = False
+
+
+replay = _Replay()
+
+
+def is_active_symbol(symbol):
+    """True if breakout/entry logic should run for this symbol."""
+    return symbol == watched_ticker or symbol in watchlist
 
 def default_symbol_state():
-    return {
-        "active_entry_type": None,  # "10s", "1m", "5m", or "custom"
-        "position": None,           # Active position info
-        "candles_10s": [],
-        "current_candle_10s": None,
-        "candles_1m": [],
-        "current_candle_1m": None,
-        "candles_5m": [],
-        "current_candle_5m": None,
-        "breakouts": [],
-        "last_quote": None,
-        # ... any other per-symbol state ...
-    }
-
-ticker_states = defaultdict(default_symbol_state)
\ No newline at end of file
+    """A fresh SymbolState; ticker_states creates one the first time a symbol is looked up."""
+    return SymbolState()
+
+def _is_pinned(symbol, state):
+    """Symbols that must never be evicted: open positions, the charted ticker and the watchlist."""
+    return bool(state.get("position")) or is_active_symbol(symbol)
+
+async def _unsubscribe_evicted(stream, symbols):
+    for symbol in symbols:
+        state = ticker_states.get(symbol)
+        # Charted, watchlisted or entered again since it was evicted: keep streaming it
+        if state is None or not _is_pinned(symbol, state):
+            await stream.unsubscribe_from_ticker(symbol)
+
+def _stop_streaming(symbols):
+    """Unsubscribe evicted symbols from the feed; otherwise their next quote recreates the state."""
+    import asyncio
+    from . import get_polygon_stream
+    stream = get_polygon_stream()
+    if stream.event_loop is not None:
+        asyncio.run_coroutine_threadsafe(_unsubscribe_evicted(stream, symbols), stream.event_loop)
+
+ticker_states = TickerStates(default_symbol_state, is_pinned=_is_pinned, on_evict=_stop_streaming)
\ No newline at end of file
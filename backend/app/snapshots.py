@@ -0,0 +1,285 @@
+# app/snapshots.py
+
+import os
+import json
+import mmap
+import time
+import atexit
+import struct
+import logging
+import threading
+
+from .utils.metrics import observe, incr
+from .trading.utils.time_tools import to_ms
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.getenv("MOMO_SNAPSHOT_DIR") or os.path.join(os.path.dirname(__file__), "snapshots")
+SNAPSHOT_INTERVAL_SEC = float(os.getenv("MOMO_SNAPSHOT_INTERVAL_SEC", "5"))
+# Snapshots older than this are ignored on restore (stale session)
+SNAPSHOT_MAX_AGE_SEC = float(os.getenv("MOMO_SNAPSHOT_MAX_AGE_SEC", str(6 * 3600)))
+# Finalized candles kept per interval
+SNAPSHOT_CANDLES = int(os.getenv("MOMO_SNAPSHOT_CANDLES", "500"))
+# Rows rebuilt into each PullbackTracker (it only keeps its last 100)
+TRACKER_ROWS = 100
+
+# File layout: header, JSON metadata, then one block of fixed-size candle records per ring
+_MAGIC = b"MOMS"
+_VERSION = 1
+HEADER = struct.Struct("<4sHHdI")          # magic, version, ring count, saved_at (epoch s), metadata length
+CANDLE = struct.Struct("<qddddd")          # timestamp ms, open, high, low, close, volume
+RINGS = ("candles_10s", "candles", "candles_5m")
+CURRENT = ("current_candle_10s", "current_candle", "current_candle_5m")
+TRACKERS = {"10s": "pullback_tracker_10s", "1m": "pullback_tracker_1m", "5m": "pullback_tracker_5m"}
+
+
+def _candle_meta(candle):
+    if not candle:
+        return None
+    return [to_ms(candle["timestamp"]), candle["open"], candle["high"], candle["low"], candle["close"], candle.get("volume", 0)]
+
+
+def _candle_from(values):
+    ts, o, h, l, c, v = values
+    return {"timestamp": ts, "open": o, "high": h, "low": l, "close": c, "volume": v}
+
+
+def _tracker_meta(tracker):
+    if tracker is None:
+        return None
+    return {
+        "last_breakout_level": tracker.last_breakout_level,
+        "breakout_triggered": tracker.breakout_triggered,
+        "pullback_active": tracker.pullback_active,
+    }
+
+
+def _signature(state):
+    """Cheap fingerprint of everything a snapshot holds; a symbol is rewritten only when it changes."""
+    rings = []
+    for key in RINGS:
+        candles = state.get(key) or []
+        rings.append((len(candles), to_ms(candles[-1]["timestamp"]) if candles else None))
+    # In-progress candles change on every quote; only their bucket counts, or every active symbol would be rewritten each pass
+    current = tuple(to_ms(state[key]["timestamp"]) if state.get(key) else None for key in CURRENT)
+    trackers = tuple(tuple((_tracker_meta(state.get(attr)) or {}).values()) for attr in TRACKERS.values())
+    custom = state.get("custom_level_entry")
+    position = state.get("position")
+    return (
+        tuple(rings), current, trackers, state.get("active_entry_type"),
+        (custom.custom_level, custom.entry_triggered, len(custom.levels), custom.levels.version) if custom is not None else None,
+        tuple(sorted((k, repr(v)) for k, v in position.items())) if position else None,
+    )
+
+
+def encode_state(state, saved_at=None, max_candles=SNAPSHOT_CANDLES):
+    """Serialize one symbol's restorable state to bytes."""
+    rings = [list(state.get(key) or [])[-max_candles:] for key in RINGS]
+    custom = state.get("custom_level_entry")
+    position = state.get("position")
+    meta = {
+        "active_entry_type": state.get("active_entry_type"),
+        "position": dict(position) if position else None,
+        "current": {key: _candle_meta(state.get(key)) for key in CURRENT},
+        "trackers": {interval: _tracker_meta(state.get(attr)) for interval, attr in TRACKERS.items()},
+        "custom_level": {"level": custom.custom_level, "entry_triggered": custom.entry_triggered,
+                         "levels": custom.export_levels()} if custom is not None else None,
+        "ring_lengths": [len(ring) for ring in rings],
+    }
+    meta_bytes = json.dumps(meta, default=str).encode()
+    out = bytearray(HEADER.size + len(meta_bytes) + CANDLE.size * sum(len(ring) for ring in rings))
+    HEADER.pack_into(out, 0, _MAGIC, _VERSION, len(RINGS), saved_at if saved_at is not None else time.time(), len(meta_bytes))
+    offset = HEADER.size
+    out[offset:offset + len(meta_bytes)] = meta_bytes
+    offset += len(meta_bytes)
+    for ring in rings:
+        for candle in ring:
+            CANDLE.pack_into(out, offset, *_candle_meta(candle))
+            offset += CANDLE.size
+    return bytes(out)
+
+
+def decode_state(buf):
+    """Parse a snapshot (bytes or mmap). Returns (saved_at, meta, {ring key: [candle dicts]})."""
+    magic, version, ring_count, saved_at, meta_len = HEADER.unpack_from(buf, 0)
+    if magic != _MAGIC or version != _VERSION or ring_count != len(RINGS):
+        raise ValueError(f"unsupported snapshot (magic={magic!r}, version={version})")
+    offset = HEADER.size
+    meta = json.loads(bytes(buf[offset:offset + meta_len]))
+    offset += meta_len
+    rings = {}
+    for key, length in zip(RINGS, meta["ring_lengths"]):
+        rings[key] = [_candle_from(values) for values in CANDLE.iter_unpack(buf[offset:offset + length * CANDLE.size])]
+        offset += length * CANDLE.size
+    return saved_at, meta, rings
+
+
+def _restore_tracker(symbol, interval, candles, levels):
+    import pandas as pd
+    from .trading.pullbacks.tracker import PullbackTracker
+    tracker = PullbackTracker(symbol, interval=interval)
+    rows = candles[-TRACKER_ROWS:]
+    if rows:
+        tracker.df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+    if levels:
+        tracker.last_breakout_level = levels["last_breakout_level"]
+        tracker.breakout_triggered = levels["breakout_triggered"]
+        tracker.pullback_active = levels["pullback_active"]
+    return tracker
+
+
+def apply_snapshot(symbol, meta, rings, ticker_states):
+    """Load decoded snapshot data into ticker_states[symbol]."""
+    state = ticker_states[symbol]
+    # Quotes may already have arrived for this symbol: keep live data and only fill in what came before it
+    for key, candles in rings.items():
+        live = state.get(key) or []
+        if live:
+            first = to_ms(live[0]["timestamp"])
+            candles = [c for c in candles if to_ms(c["timestamp"]) < first] + live
+        state[key] = candles
+    # Indicators reseed from the merged candle lists on next use
+    state.pop("indicators", None)
+    for key, values in meta["current"].items():
+        if values is not None and state.get(key) is None:
+            state[key] = _candle_from(values)
+    if meta["active_entry_type"] is not None and state.get("active_entry_type") is None:
+        from .trading.core.strategy import set_entry_type
+        set_entry_type(symbol, meta["active_entry_type"], state)
+    ring_for = {"10s": "candles_10s", "1m": "candles", "5m": "candles_5m"}
+    for interval, levels in meta["trackers"].items():
+        if levels is not None and TRACKERS[interval] not in state:
+            state[TRACKERS[interval]] = _restore_tracker(symbol, interval, state[ring_for[interval]], levels)
+    if meta["custom_level"] is not None and "custom_level_entry" not in state:
+        from .trading.entries.custom_level import CustomLevelEntry
+        custom = CustomLevelEntry(symbol, meta["custom_level"]["level"])
+        custom.entry_triggered = meta["custom_level"]["entry_triggered"]
+        custom.load_levels(meta["custom_level"].get("levels", []))
+        state["custom_level_entry"] = custom
+    if meta["position"] is not None and not state.get("position"):
+        position = dict(meta["position"])
+        position["restored"] = True
+        state["position"] = position
+    from .trading.core.strategy import refresh_trigger_band
+    refresh_trigger_band(symbol, state)
+    return state
+
+
+class SnapshotWriter:
+    """
+    Background thread that writes one file per symbol every SNAPSHOT_INTERVAL_SEC, only for symbols whose
+    state changed since the last pass. Each file is written to a temp name and renamed, so a crash mid-write
+    leaves the previous snapshot intact. The quote path never touches disk.
+    """
+
+    def __init__(self, ticker_states, directory=SNAPSHOT_DIR, interval=SNAPSHOT_INTERVAL_SEC):
+        self.ticker_states = ticker_states
+        self.directory = directory
+        self.interval = interval
+        self._signatures = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def path_for(self, symbol):
+        return os.path.join(self.directory, f"{symbol}.snap")
+
+    def write_once(self):
+        """Write every changed symbol and delete files for symbols no longer in state. Returns symbols written."""
+        with self._lock:
+            start = time.perf_counter_ns()
+            os.makedirs(self.directory, exist_ok=True)
+            written = []
+            live = set()
+            for symbol, state in list(self.ticker_states.items()):
+                live.add(symbol)
+                try:
+                    signature = _signature(state)
+                    if self._signatures.get(symbol) == signature:
+                        continue
+                    path = self.path_for(symbol)
+                    tmp = path + ".tmp"
+                    with open(tmp, "wb") as f:
+                        f.write(encode_state(state))
+                    os.replace(tmp, path)
+                    self._signatures[symbol] = signature
+                    written.append(symbol)
+                except Exception as e:
+                    logger.warning(f"[Snapshot] Failed to write {symbol}: {e}")
+            for symbol in set(self._signatures) - live:
+                self._signatures.pop(symbol, None)
+                try:
+                    os.remove(self.path_for(symbol))
+                except OSError:
+                    pass
+            observe("snapshot_write", time.perf_counter_ns() - start)
+            if written:
+                incr("snapshot_symbols_written", len(written))
+            return written
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_once()
+            except Exception as e:
+                logger.exception(f"[Snapshot] Snapshot pass failed: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Stop the thread and write a final snapshot."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        self.write_once()
+
+    def mark_written(self, symbol, state):
+        """Record state as already on disk (after a restore) so it isn't rewritten unchanged."""
+        self._signatures[symbol] = _signature(state)
+
+
+def restore_snapshots(ticker_states, directory=SNAPSHOT_DIR, max_age=SNAPSHOT_MAX_AGE_SEC, writer=None):
+    """
+    Memory-map each symbol snapshot in directory and load it into ticker_states.
+    Snapshots older than max_age are skipped. Returns the restored symbols.
+    """
+    if not os.path.isdir(directory):
+        return []
+    now = time.time()
+    restored = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".snap"):
+            continue
+        symbol = name[:-len(".snap")]
+        path = os.path.join(directory, name)
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                saved_at, meta, rings = decode_state(buf)
+            if now - saved_at > max_age:
+                logger.info(f"[Snapshot] Skipping {symbol}: snapshot is {(now - saved_at) / 60:.0f} min old")
+                continue
+            state = apply_snapshot(symbol, meta, rings, ticker_states)
+            if writer is not None:
+                writer.mark_written(symbol, state)
+            restored.append(symbol)
+        except Exception as e:
+            logger.warning(f"[Snapshot] Failed to restore {symbol} from {path}: {e}")
+    if restored:
+        logger.info(f"[Snapshot] Restored {len(restored)} symbols: {', '.join(restored)}")
+    return restored
+
+
+_writer = None
+
+def get_snapshot_writer():
+    global _writer
+    if _writer is None:
+        from .shared_state import ticker_states
+        _writer = SnapshotWriter(ticker_states)
+    return _writer
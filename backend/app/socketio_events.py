@@ -2,15 +2,21 @@
 
 import threading
 import asyncio
-import sys
-from . import polygon_stream
+import time
+from . import socketio, get_polygon_stream
+from . import shared_state
 from .shared_state import ticker_states
 from .trading.pullbacks.tracker import PullbackTracker, Candle
 from datetime import datetime
 from typing import Any
 import logging
+from .utils.metrics import timed, incr
+from .trading.utils.time_tools import to_ms, ms_to_iso
+from .trading.indicators.engine import latest
 
 logger = logging.getLogger(__name__)
+# Quote-path emits (prices, stats, candles, levels) go through this; shard workers swap in a forwarder
+_emitter = socketio
 
 pullback_trackers = {}
 entry_types_map = {}
@@ -18,9 +24,26 @@ entry_types_map = {}
 selected_ticker = None
 simulate_thread = None  # no longer used, but kept for fallback if needed
 
+# Watchlist symbols that are neither charted nor in a position only need a few UI updates per second
+BACKGROUND_PRICE_UPDATE_INTERVAL = 0.25
+_last_price_emit = {}
+# Rolling quote stats go to the chart's ticker panel about once a second
+QUOTE_STATS_EMIT_INTERVAL = 1.0
+_last_quote_stats_emit = 0.0
+
+@timed("emit_price_update")
 def emit_price_update(symbol, ask, bid, ask_size, bid_size, timestamp):
-    # Convert datetime to ISO string if needed
-    if hasattr(timestamp, "isoformat"):
+    if symbol != shared_state.watched_ticker:
+        state = ticker_states.get(symbol)
+        if not (state and state.get("position")):
+            now = time.monotonic()
+            if now - _last_price_emit.get(symbol, 0) < BACKGROUND_PRICE_UPDATE_INTERVAL:
+                return
+            _last_price_emit[symbol] = now
+    # Quotes carry epoch ms; the UI gets an ISO string
+    if isinstance(timestamp, int):
+        timestamp = ms_to_iso(timestamp)
+    elif hasattr(timestamp, "isoformat"):
         timestamp = timestamp.isoformat()
     data = {
         "ticker": symbol,
@@ -32,18 +55,80 @@ def emit_price_update(symbol, ask, bid, ask_size, bid_size, timestamp):
         "timestamp": timestamp
     }
     #logger.info(f"Emitting price_update for {symbol}: {data}")
-    from . import socketio
-    socketio.emit('price_update', data)
+    _emitter.emit('price_update', data)
+    incr("socketio_emit", label="price_update")
+
+
+def emit_quote_stats(symbol):
+    """Spread/quote-rate/imbalance stats for the charted ticker, throttled to QUOTE_STATS_EMIT_INTERVAL."""
+    global _last_quote_stats_emit
+    if symbol != shared_state.watched_ticker:
+        return
+    now = time.monotonic()
+    if now - _last_quote_stats_emit < QUOTE_STATS_EMIT_INTERVAL:
+        return
+    _last_quote_stats_emit = now
+    stats = ticker_states[symbol].get("quote_stats")
+    if stats is not None:
+        _emitter.emit('quote_stats', dict(stats.to_dict(), ticker=symbol))
+        incr("socketio_emit", label="quote_stats")
+
+
+def emit_quote(symbol, quote):
+    """quote subscriber: price update, then (throttled) quote stats."""
+    emit_price_update(symbol, quote.ask_price, quote.bid_price, quote.ask_size, quote.bid_size, quote.timestamp_ms)
+    emit_quote_stats(symbol)
+
 
+def emit_closed_candle(symbol, timeframe, candle):
+    """candle_close subscriber: send the closed candle (and its indicator values) to the chart."""
+    # Chart wants Unix seconds (UTC)
+    data = {
+        'time': to_ms(candle['timestamp']) // 1000,
+        'open': candle['open'],
+        'high': candle['high'],
+        'low': candle['low'],
+        'close': candle['close'],
+        'volume': candle.get('volume', 0)
+    }
+    values = latest(symbol, timeframe)
+    if values is not None and values['time'] == candle['timestamp']:
+        data['indicators'] = {key: value for key, value in values.items() if key != 'time'}
+    emit_candle_update(symbol, timeframe, data)
+
+
+def emit_level_change(symbol, event, payload):
+    """level_change subscriber: breakout_levels, levels_diff, levels_snapshot and level_alert messages."""
+    try:
+        _emitter.emit(event, payload)
+    except Exception as e:
+        logger.warning(f"Failed to emit {event} for {symbol}: {e}")
+
+
+@timed("emit_candle_update")
 def emit_candle_update(symbol, timeframe, candle_data):
     """Emit candle update to all connected clients"""
-    from . import socketio
     data = {
         "symbol": symbol.upper(),
         "timeframe": timeframe,
         **candle_data
     }
-    socketio.emit("candle_update", data)
+    _emitter.emit("candle_update", data)
+    incr("socketio_emit", label="candle_update")
+
+def set_emitter(emitter):
+    """Send the quote-path emits through emitter (anything with an emit method) instead of the Socket.IO server."""
+    global _emitter
+    _emitter = emitter
+
+def sync_shards(symbol=None):
+    """Push entry configuration changes to sharded strategy workers, if they are running."""
+    pool = get_polygon_stream().shard_pool
+    if pool is None:
+        return
+    pool.sync_globals()
+    if symbol:
+        pool.sync_symbol(symbol)
 
 def register_socket_events(socketio):
     @socketio.on('connect')
@@ -61,33 +146,29 @@ def register_socket_events(socketio):
         global selected_ticker
         import backend.app.shared_state as shared_state
         selected_ticker = ticker
-        shared_state.watched_ticker = ticker
+        with ticker_states.pin_lock:
+            shared_state.watched_ticker = ticker
         shared_state.breakout_ready = True
         print(f"[SOCKETIO] watched_ticker set to: {shared_state.watched_ticker}, breakout_ready: {shared_state.breakout_ready}")
         print(f"📩 Ticker received and stored: {selected_ticker}")
 
-        # Initialize ticker state if not already present
-        if ticker not in ticker_states:
-            ticker_states[ticker] = {
-                "candles": [],
-                "breakouts": [],
-                "last_quote": None
-            }
-        else:
-            # Clear any existing custom level entry when switching to a symbol
-            if "custom_level_entry" in ticker_states[ticker]:
-                ticker_states[ticker]["custom_level_entry"].update_level(None)
-                print(f"[{ticker}] 🧹 Cleared existing custom level when switching to symbol")
+        # Looking the ticker up creates its state if not already present
+        state = ticker_states[ticker]
+        # Clear any existing custom level entry when switching to a symbol
+        if state.custom_level_entry is not None:
+            state.custom_level_entry.update_level(None)
+            print(f"[{ticker}] 🧹 Cleared existing custom level when switching to symbol")
         #print(f"ticker_states keys after select: {list(ticker_states.keys())}")
         #print(f"ticker_states id in select: {id(ticker_states)}")
         #print("state module object in select:", sys.modules.get('app.state'))
         #print("state module id in select:", id(sys.modules.get('app.state')))
         
         socketio.emit('ticker_selected', {'ticker': selected_ticker})
+        sync_shards(ticker)
         
         # Ensure Alpaca stream is subscribed (thread-safe via event loop)
-        from . import polygon_stream
-        if polygon_stream:
+        polygon_stream = get_polygon_stream()
+        if polygon_stream.event_loop is not None:
             try:
                 print(f"[SOCKETIO] Scheduling subscribe_to_ticker({ticker}) on event loop...")
                 future = asyncio.run_coroutine_threadsafe(
@@ -111,6 +192,84 @@ def register_socket_events(socketio):
                 print("❌ Failed to subscribe to ticker: Alpaca event loop not available after retries.")
                 socketio.emit('error', {'message': 'Alpaca stream is still starting, please try again in a few seconds.'})
 
+    def schedule_on_stream(coro, description):
+        """Run a PolygonStream coroutine on its event loop from a Socket.IO handler."""
+        polygon_stream = get_polygon_stream()
+        if polygon_stream.event_loop is None:
+            print(f"⚠️ Alpaca stream not ready, cannot {description}")
+            coro.close()
+            return
+        future = asyncio.run_coroutine_threadsafe(coro, polygon_stream.event_loop)
+        def log_future_result(fut):
+            try:
+                fut.result()
+            except Exception as e:
+                print(f"[SOCKETIO] ERROR in {description}: {e}")
+        future.add_done_callback(log_future_result)
+
+    def emit_watchlist():
+        import backend.app.shared_state as shared_state
+        socketio.emit('watchlist', {'symbols': sorted(shared_state.watchlist)})
+
+    @socketio.on('add_to_watchlist')
+    def handle_add_to_watchlist(data):
+        """Add one or more symbols to the watchlist; each runs its own breakout logic."""
+        import backend.app.shared_state as shared_state
+        polygon_stream = get_polygon_stream()
+        symbols = data.get("symbols") or [data.get("symbol", "")]
+        symbols = [s.upper() for s in symbols if s]
+        new_symbols = [s for s in symbols if s not in shared_state.watchlist]
+        with ticker_states.pin_lock:
+            for symbol in new_symbols:
+                shared_state.watchlist.add(symbol)
+                ticker_states[symbol]  # create per-symbol state
+        if new_symbols:
+            shared_state.breakout_ready = True
+            print(f"[SOCKETIO] Watchlist += {new_symbols} ({len(shared_state.watchlist)} symbols)")
+            schedule_on_stream(polygon_stream.subscribe_to_tickers(new_symbols), f"subscribe to {new_symbols}")
+            sync_shards()
+        emit_watchlist()
+
+    @socketio.on('remove_from_watchlist')
+    def handle_remove_from_watchlist(data):
+        import backend.app.shared_state as shared_state
+        polygon_stream = get_polygon_stream()
+        symbol = data.get("symbol", "").upper()
+        if symbol not in shared_state.watchlist:
+            return
+        shared_state.watchlist.discard(symbol)
+        print(f"[SOCKETIO] Watchlist -= {symbol} ({len(shared_state.watchlist)} symbols)")
+        sync_shards()
+        # Keep streaming the charted symbol and anything we're still holding
+        state = ticker_states.get(symbol)
+        if symbol != shared_state.watched_ticker and not (state and state.get("position")):
+            schedule_on_stream(polygon_stream.unsubscribe_from_ticker(symbol), f"unsubscribe from {symbol}")
+        emit_watchlist()
+
+    @socketio.on('get_watchlist')
+    def handle_get_watchlist():
+        emit_watchlist()
+
+    @socketio.on('start_scanner')
+    def handle_start_scanner(data=None):
+        """Start (or reconfigure) the momentum scanner; results arrive as 'scanner_results'."""
+        from .trading.scanner.momentum_scanner import get_scanner_service
+        service = get_scanner_service()
+        data = data or {}
+        if data.get("sort_by") in ("change_pct", "gap_pct", "intraday_pct", "rvol", "float_rotation", "dollar_volume", "volume"):
+            service.sort_by = data["sort_by"]
+        if isinstance(data.get("filters"), dict):
+            service.scanner.filters.update(
+                {k: v for k, v in data["filters"].items() if k in service.scanner.filters}
+            )
+        service.start()
+        socketio.emit('scanner_results', service.payload())
+
+    @socketio.on('stop_scanner')
+    def handle_stop_scanner():
+        from .trading.scanner.momentum_scanner import get_scanner_service
+        get_scanner_service().stop()
+
     @socketio.on('get_selected_ticker')
     def handle_get_selected_ticker():
         socketio.emit('ticker_selected', {'ticker': selected_ticker})
@@ -119,8 +278,14 @@ def register_socket_events(socketio):
     def handle_set_entry_type(data):
         symbol = data.get("symbol", "").upper()
         entry_type = data.get("entry_type", "").lower()
-        if symbol and entry_type in ["10s", "1m", "5m", "custom", "none"]:
-            ticker_states[symbol]["active_entry_type"] = None if entry_type == "none" else entry_type
+        from .trading.core.trade_tape import TAPE_BARS, tape_entries_available
+        if entry_type in TAPE_BARS and not tape_entries_available():
+            logger.warning("[%s] Tape entry type %s is not available with shard workers", symbol, entry_type)
+            socketio.emit('error', {'message': f'Tape entry type {entry_type} is not available with shard workers.'})
+            return
+        if symbol and (entry_type in ["10s", "1m", "5m", "custom", "none"] or entry_type in TAPE_BARS):
+            from .trading.core.strategy import set_entry_type
+            set_entry_type(symbol, None if entry_type == "none" else entry_type)
             
             # Clear custom level if switching away from custom entry type
             if entry_type != "custom" and "custom_level_entry" in ticker_states[symbol]:
@@ -130,6 +295,7 @@ def register_socket_events(socketio):
             print(f"[{symbol}] 🔁 Active entry type set to: {ticker_states[symbol]['active_entry_type']}")
             print(f"[SOCKETIO] active_entry_type for {symbol} is now: {ticker_states[symbol]['active_entry_type']}")
             socketio.emit("entry_type_set", {"symbol": symbol, "entry_type": ticker_states[symbol]["active_entry_type"] or "none"})
+            sync_shards(symbol)
         else:
             print(f"⚠️ Invalid entry type or symbol: {entry_type}, {symbol}")
 
@@ -147,10 +313,15 @@ def register_socket_events(socketio):
                     return
                     
                 state = ticker_states.get(symbol)
+                if state is not None and "custom_level_entry" not in state and get_polygon_stream().shard_pool is not None:
+                    # Sharded mode: the tick path that normally creates the tracker runs in a worker
+                    from .trading.entries.custom_level import CustomLevelEntry
+                    state["custom_level_entry"] = CustomLevelEntry(symbol, None)
                 if state and "custom_level_entry" in state:
                     state["custom_level_entry"].update_level(custom_level)
                     print(f"[{symbol}] 🔧 Custom level updated to ${custom_level:.2f}")
                     socketio.emit("custom_level_set", {"symbol": symbol, "level": custom_level})
+                    sync_shards(symbol)
                 else:
                     print(f"⚠️ No custom level entry tracker found for {symbol}")
             except ValueError:
@@ -158,6 +329,69 @@ def register_socket_events(socketio):
         else:
             print(f"⚠️ Invalid symbol or level: {symbol}, {custom_level}")
 
+    def _level_entry(symbol):
+        state = ticker_states[symbol]
+        if "custom_level_entry" not in state:
+            from .trading.entries.custom_level import CustomLevelEntry
+            state["custom_level_entry"] = CustomLevelEntry(symbol, None)
+        return state["custom_level_entry"]
+
+    @socketio.on("add_level")
+    def handle_add_level(data):
+        """Add a level: {symbol, price, direction: up|down, kind, action: entry|alert|null, cross}."""
+        symbol = data.get("symbol", "").upper()
+        try:
+            price = float(data.get("price"))
+            if not symbol or price <= 0:
+                raise ValueError(price)
+            level = _level_entry(symbol).add_level(
+                price, data.get("direction", "up"), data.get("kind", "custom"), data.get("action", "entry"),
+                bool(data.get("cross", False)),
+            )
+        except (TypeError, ValueError) as e:
+            print(f"⚠️ Invalid level for {symbol}: {data} ({e})")
+            return
+        print(f"[{symbol}] 🔧 Level {level.id} added at ${level.price:.2f} ({level.direction}, {level.action})")
+        sync_shards(symbol)
+
+    @socketio.on("add_round_levels")
+    def handle_add_round_levels(data):
+        """Half/whole-dollar levels around the last price: {symbol, above, below, step, action}."""
+        symbol = data.get("symbol", "").upper()
+        quote = ticker_states[symbol].get("last_quote") if symbol else None
+        if quote is None:
+            print(f"⚠️ No quote yet for {symbol}; cannot place round-number levels")
+            return
+        price = (quote.bid_price + quote.ask_price) / 2
+        added = _level_entry(symbol).add_round_levels(
+            price, int(data.get("above", 2)), int(data.get("below", 0)), float(data.get("step", 0.5)),
+            data.get("action", "alert"),
+        )
+        print(f"[{symbol}] 🔧 Added round-number levels: {[level.price for level in added]}")
+        sync_shards(symbol)
+
+    @socketio.on("remove_level")
+    def handle_remove_level(data):
+        symbol = data.get("symbol", "").upper()
+        entry = ticker_states[symbol].get("custom_level_entry") if symbol else None
+        if entry is not None and entry.remove_level(data.get("id")):
+            sync_shards(symbol)
+
+    @socketio.on("clear_levels")
+    def handle_clear_levels(data):
+        symbol = data.get("symbol", "").upper()
+        entry = ticker_states[symbol].get("custom_level_entry") if symbol else None
+        if entry is not None:
+            entry.clear_levels(data.get("kind"))
+            sync_shards(symbol)
+
+    @socketio.on("get_levels")
+    def handle_get_levels(data):
+        """Full level list once (levels_snapshot); after that the client applies levels_diff messages."""
+        symbol = data.get("symbol", "").upper()
+        if symbol:
+            _level_entry(symbol).emit_levels_snapshot()
+
     @socketio.on("request_candles")
     def handle_request_candles(data):
         symbol = data.get("symbol", "").upper()
@@ -187,7 +421,7 @@ def register_socket_events(socketio):
             serialized_candles = []
             for candle in candles:
                 serialized_candle = {
-                    "time": int(candle["timestamp"].timestamp()) if hasattr(candle["timestamp"], "timestamp") else candle["timestamp"],
+                    "time": to_ms(candle["timestamp"]) // 1000,
                     "open": candle["open"],
                     "high": candle["high"],
                     "low": candle["low"],
@@ -207,10 +441,6 @@ def register_socket_events(socketio):
 
     # ✅ Allow AlpacaStream to emit updates to frontend
     try:
-        from . import polygon_stream
-        if polygon_stream is not None:
-            polygon_stream.set_socketio(socketio)
-        else:
-            print("[Warning] polygon_stream is not initialized yet; will set socketio later.")
+        get_polygon_stream().set_socketio(socketio)
     except Exception as e:
         print(f"[Warning] Could not set socketio on polygon_stream: {e}")
\ No newline at end of file
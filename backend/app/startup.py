@@ -0,0 +1,127 @@
+# app/startup.py
+
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimeline:
+    """Start/end offsets (ms since startup began) of each startup step, for the log and /startup."""
+
+    def __init__(self, t0=None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.steps = []
+        self._lock = threading.Lock()
+
+    def _ms(self, t):
+        return round((t - self.t0) * 1000, 1)
+
+    def run(self, name, fn, *args):
+        start = time.perf_counter()
+        error = None
+        try:
+            return fn(*args)
+        except Exception as e:
+            error = str(e)
+            logger.exception(f"[Startup] {name} failed")
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.steps.append({
+                    "step": name,
+                    "thread": threading.current_thread().name,
+                    "start_ms": self._ms(start),
+                    "end_ms": self._ms(end),
+                    "duration_ms": round((end - start) * 1000, 1),
+                    "error": error,
+                })
+
+    def run_async(self, name, fn, *args):
+        thread = threading.Thread(target=self.run, args=(name, fn) + args, name=f"startup-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def mark(self, name):
+        now = time.perf_counter()
+        with self._lock:
+            self.steps.append({"step": name, "thread": threading.current_thread().name,
+                               "start_ms": self._ms(now), "end_ms": self._ms(now), "duration_ms": 0.0, "error": None})
+
+    def to_dict(self):
+        with self._lock:
+            steps = sorted(self.steps, key=lambda s: s["start_ms"])
+        return {"total_ms": max((s["end_ms"] for s in steps), default=0.0), "steps": steps}
+
+    def log(self):
+        for step in self.to_dict()["steps"]:
+            status = f" FAILED: {step['error']}" if step["error"] else ""
+            logger.info(f"[Startup] {step['step']:<18} {step['start_ms']:>8.1f} → {step['end_ms']:>8.1f} ms "
+                        f"({step['duration_ms']:.1f} ms){status}")
+
+
+_timeline = None
+
+def get_startup_timeline():
+    return _timeline.to_dict() if _timeline is not None else {"total_ms": 0.0, "steps": []}
+
+
+def _configure_logging():
+    from .utils.log_utils import configure_logging
+    configure_logging()
+    # Explicitly set tracker logger to INFO
+    logging.getLogger('backend.app.trading.pullbacks.tracker').setLevel(logging.INFO)
+
+
+def warm_imports():
+    """Import the heavy trading modules (pandas via the trackers) so the first live quote doesn't pay for it."""
+    import pandas  # noqa: F401
+    from .trading.pullbacks import tracker  # noqa: F401
+    from .trading.core import candle_builder, breakout_logic, trade_manager  # noqa: F401
+
+
+def start(t0=None):
+    """
+    Bring the backend up: configure logging, build the Flask app and fork any shard workers on the
+    calling thread, then initialise the DB, restore the last state snapshot and sync positions from
+    the broker, start the Polygon stream and warm the heavy imports concurrently.
+    Returns the app as soon as it can serve requests; the background steps finish on their own
+    and the full timeline is logged (and served at /startup) once they have.
+    """
+    global _timeline
+    from . import create_app, sync_state_with_broker, start_polygon_thread, start_shard_pool
+    from .db import init_db
+
+    timeline = _timeline = StartupTimeline(t0)
+    timeline.run("configure_logging", _configure_logging)
+    app = timeline.run("create_app", create_app)
+    # The shard workers are forked, so they start before the background threads below (the log listener is
+    # paused around the fork by log_utils)
+    timeline.run("shard_pool", start_shard_pool)
+
+    def restore_state():
+        # Snapshot first so the broker sync can merge into the restored positions
+        from .shared_state import ticker_states
+        from .snapshots import restore_snapshots, get_snapshot_writer
+        writer = get_snapshot_writer()
+        timeline.run("restore_snapshots", lambda: restore_snapshots(ticker_states, writer.directory, writer=writer))
+        timeline.run("broker_sync", sync_state_with_broker)
+        writer.start()
+        ticker_states.start_budget_checker()
+
+    background = [
+        timeline.run_async("init_db", init_db),
+        timeline.run_async("state_restore", restore_state),
+        timeline.run_async("polygon_stream", start_polygon_thread),
+        timeline.run_async("warm_imports", warm_imports),
+    ]
+    timeline.mark("ready_to_serve")
+
+    def report():
+        for thread in background:
+            thread.join()
+        timeline.log()
+
+    threading.Thread(target=report, name="startup-report", daemon=True).start()
+    return app
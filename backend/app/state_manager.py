@@ -0,0 +1,187 @@
+# app/state_manager.py
+
+import os
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Total budget for per-symbol runtime state (candles, trackers, quotes)
+STATE_MEMORY_BUDGET_MB = float(os.getenv("MOMO_STATE_MEMORY_BUDGET_MB", "256"))
+# Budget is checked this often, on its own thread (the size walk takes seconds with long candle histories)
+STATE_BUDGET_CHECK_SEC = float(os.getenv("MOMO_STATE_BUDGET_CHECK_SEC", "10"))
+
+
+def estimate_size(obj, _seen=None):
+    """
+    Approximate deep size of obj in bytes.
+    DataFrames (PullbackTracker.df) are measured with memory_usage(deep=True) instead of walking them.
+    """
+    if _seen is None:
+        _seen = set()
+    obj_id = id(obj)
+    if obj_id in _seen:
+        return 0
+    _seen.add(obj_id)
+
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        try:
+            return int(obj.memory_usage(deep=True).sum())
+        except Exception:
+            return sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, _seen) + estimate_size(value, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for item in obj:
+            size += estimate_size(item, _seen)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += estimate_size(vars(obj), _seen)
+    elif hasattr(obj, "__slots__"):
+        for slot in obj.__slots__:
+            if hasattr(obj, slot):
+                size += estimate_size(getattr(obj, slot), _seen)
+    return size
+
+
+class TickerStates(dict):
+    """
+    Per-symbol state map (behaves like the old defaultdict) with LRU tracking and a memory budget.
+    Symbols are ordered by when they were last quoted; when the estimated total exceeds the budget,
+    the least recently quoted symbols that are not pinned (open position, charted, watchlisted) are evicted.
+    The budget is enforced by start_budget_checker()'s thread, never on the quote path.
+
+    Code that pins a symbol (opens a position, charts or watchlists it) does so under pin_lock; eviction
+    re-checks the pin and drops the symbol under the same lock, so a symbol can't be pinned in between.
+    on_evict(symbols) is called after each eviction round (the app stops streaming them there, or the
+    next quote would just recreate their state).
+    """
+
+    def __init__(self, default_factory, budget_mb=STATE_MEMORY_BUDGET_MB, is_pinned=None, on_evict=None):
+        super().__init__()
+        self.default_factory = default_factory
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.is_pinned = is_pinned or (lambda symbol, state: False)
+        self.on_evict = on_evict
+        self.pin_lock = threading.RLock()
+        self._lru = OrderedDict()  # symbol -> last touch (monotonic seconds)
+        # Guards _lru between the quote thread and the budget checker
+        self._lru_lock = threading.Lock()
+        self._checker = None
+        self._stop = threading.Event()
+        self.evicted = 0
+
+    def __missing__(self, symbol):
+        state = self.default_factory()
+        self[symbol] = state
+        return state
+
+    def __setitem__(self, symbol, state):
+        super().__setitem__(symbol, state)
+        self.touch(symbol)
+
+    def __delitem__(self, symbol):
+        super().__delitem__(symbol)
+        with self._lru_lock:
+            self._lru.pop(symbol, None)
+
+    def pop(self, symbol, *default):
+        with self._lru_lock:
+            self._lru.pop(symbol, None)
+        return super().pop(symbol, *default)
+
+    def touch(self, symbol):
+        """Mark symbol as just quoted (LRU bookkeeping only)."""
+        with self._lru_lock:
+            lru = self._lru
+            lru[symbol] = time.monotonic()
+            lru.move_to_end(symbol)
+
+    def start_budget_checker(self, interval=STATE_BUDGET_CHECK_SEC):
+        """Enforce the budget every `interval` seconds on a daemon thread."""
+        if self._checker is None or not self._checker.is_alive():
+            self._stop.clear()
+            self._checker = threading.Thread(target=self._run_checker, args=(interval,),
+                                             name="state-budget", daemon=True)
+            self._checker.start()
+        return self._checker
+
+    def stop_budget_checker(self):
+        self._stop.set()
+
+    def _run_checker(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.enforce_budget()
+            except Exception as e:
+                logger.exception(f"[StateManager] Budget check failed: {e}")
+
+    def memory_usage(self):
+        """Estimated bytes per symbol."""
+        usage = {}
+        for symbol, state in list(self.items()):
+            try:
+                usage[symbol] = estimate_size(state)
+            except RuntimeError:
+                # Mutated by the quote thread mid-walk; one retry, then count it as empty this round
+                try:
+                    usage[symbol] = estimate_size(state)
+                except RuntimeError:
+                    usage[symbol] = 0
+        return usage
+
+    def enforce_budget(self):
+        """Evict least recently quoted, unpinned symbols until the estimated total fits the budget."""
+        usage = self.memory_usage()
+        total = sum(usage.values())
+        if total <= self.budget_bytes:
+            return []
+        evicted = []
+        with self._lru_lock:
+            order = list(self._lru)
+        for symbol in order:
+            if total <= self.budget_bytes:
+                break
+            with self.pin_lock:
+                state = self.get(symbol)
+                if state is None or self.is_pinned(symbol, state):
+                    continue
+                self.pop(symbol, None)
+            total -= usage.get(symbol, 0)
+            evicted.append(symbol)
+        if evicted:
+            self.evicted += len(evicted)
+            logger.info(f"[StateManager] Evicted {len(evicted)} idle symbols to stay under "
+                        f"{self.budget_bytes / 1e6:.0f}MB: {', '.join(evicted)}")
+            if self.on_evict is not None:
+                self.on_evict(evicted)
+        if total > self.budget_bytes:
+            logger.warning(f"[StateManager] State still {total / 1e6:.1f}MB after eviction (all remaining symbols pinned)")
+        return evicted
+
+    def memory_report(self):
+        """Per-symbol memory usage and idle time, largest first."""
+        now = time.monotonic()
+        usage = self.memory_usage()
+        symbols = []
+        for symbol, size in sorted(usage.items(), key=lambda kv: kv[1], reverse=True):
+            state = self.get(symbol) or {}
+            last = self._lru.get(symbol)
+            symbols.append({
+                "symbol": symbol,
+                "bytes": size,
+                "idle_sec": round(now - last, 1) if last is not None else None,
+                "pinned": self.is_pinned(symbol, state),
+                "candles": {key: len(state.get(key) or []) for key in ("candles_10s", "candles", "candles_5m")},
+            })
+        return {
+            "total_bytes": sum(usage.values()),
+            "budget_bytes": self.budget_bytes,
+            "evicted_total": self.evicted,
+            "symbols": symbols,
+        }
@@ -0,0 +1,171 @@
+# app/state_views.py
+
+"""
+Pre-serialized JSON for the state routes (/state/<symbol>, /positions).
+
+Each view is kept as encoded bytes with an ETag, next to a cheap signature of what it was built from (the
+same idea as snapshots._signature). A request only recomputes the signature; the body is re-encoded when
+that changed, and a client sending the current ETag in If-None-Match gets a 304 with no body. /positions
+looks at positions and quotes only, so its cost doesn't grow with candle history.
+
+Encoded with orjson when it's installed (stdlib json otherwise). Objects without a JSON form are written
+via their to_dict() when they have one, else as "<ClassName>".
+"""
+
+import json
+import time
+import hashlib
+from collections import deque
+from datetime import date, datetime
+
+from flask import Response
+
+from .utils.metrics import observe, incr
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    to_dict = getattr(value, "to_dict", None)
+    if to_dict is not None:
+        return to_dict()
+    if isinstance(value, (deque, set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    item = getattr(value, "item", None)  # numpy scalars
+    if item is not None:
+        return item()
+    return f"<{type(value).__name__}>"
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj):
+        """obj as JSON bytes."""
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+else:
+    def dumps(obj):
+        """obj as JSON bytes."""
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+class CachedView:
+    __slots__ = ("signature", "body", "etag")
+
+    def __init__(self, signature, body):
+        self.signature = signature
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+_views = {}  # view key -> CachedView
+
+
+def _cached(key, signature, build):
+    view = _views.get(key)
+    if view is not None and view.signature == signature:
+        incr("state_view_hit", label=key[0])
+        return view
+    start = time.perf_counter_ns()
+    view = _views[key] = CachedView(signature, dumps(build()))
+    observe("state_view_encode", time.perf_counter_ns() - start)
+    incr("state_view_miss", label=key[0])
+    return view
+
+
+def _quote_signature(quote):
+    if quote is None:
+        return None
+    return quote.timestamp_ms, quote.bid_price, quote.ask_price, quote.bid_size, quote.ask_size
+
+
+def _candle_signature(candle):
+    if not candle:
+        return None
+    return candle["timestamp"], candle["high"], candle["low"], candle["close"], candle["volume"]
+
+
+def _position_signature(position):
+    # Position fields are all scalars, so a tuple of the items is a snapshot of it
+    return tuple(position.items()) if position else position
+
+
+def _state_signature(state):
+    """Fingerprint of everything /state serves; in-progress candles and the quote change on every tick."""
+    rings = tuple((len(candles), candles[-1]["timestamp"] if candles else None)
+                  for candles in (state.candles_10s, state.candles, state.candles_5m))
+    current = tuple(_candle_signature(c) for c in (state.current_candle_10s, state.current_candle, state.current_candle_5m))
+    position = state.position
+    custom = state.custom_level_entry
+    extra = tuple((key, len(value) if isinstance(value, (list, deque)) else repr(value))
+                  for key, value in state.extra.items())
+    return (
+        rings, current, _quote_signature(state.last_quote), state.active_entry_type, len(state.breakouts),
+        _position_signature(position),
+        (custom.custom_level, custom.entry_triggered, len(custom.levels), custom.levels.version) if custom is not None else None,
+        tuple(key for key in ("pullback_tracker_10s", "pullback_tracker_1m", "pullback_tracker_5m",
+                              "dispatcher", "indicators", "quote_stats", "tape") if getattr(state, key) is not None),
+        extra,
+    )
+
+
+def state_view(symbol, state):
+    """The CachedView of a symbol's full state."""
+    return _cached(("state", symbol), _state_signature(state), lambda: dict(state.items()))
+
+
+def _position_row(symbol, pos, quote):
+    bid = quote.bid_price if quote is not None else None
+    ask = quote.ask_price if quote is not None else None
+    last_price = None
+    if bid is not None and ask is not None:
+        last_price = (bid + ask) / 2
+    elif bid is not None:
+        last_price = bid
+    elif ask is not None:
+        last_price = ask
+    entry_price = pos.get("entry_price")
+    size = pos.get("size")
+    unrealized = None
+    diff_per_share = None
+    if last_price is not None and entry_price is not None and size is not None:
+        diff_per_share = last_price - entry_price
+        unrealized = diff_per_share * size
+    return {
+        "symbol": symbol,
+        **pos,
+        "last_price": last_price,
+        "bid": bid,
+        "ask": ask,
+        "unrealized": unrealized,
+        "diff_per_share": diff_per_share,
+    }
+
+
+def positions_view(ticker_states):
+    """The CachedView of every open position with its quote-derived P&L."""
+    open_positions = [(symbol, state.position, state.last_quote)
+                      for symbol, state in list(ticker_states.items()) if state.position]
+    signature = tuple((symbol, _position_signature(pos), _quote_signature(quote)) for symbol, pos, quote in open_positions)
+    return _cached(("positions",), signature,
+                   lambda: [_position_row(symbol, pos, quote) for symbol, pos, quote in open_positions])
+
+
+def forget(symbol):
+    """Drop a symbol's cached state view (symbol gone from ticker_states)."""
+    _views.pop(("state", symbol), None)
+
+
+def json_response(view, request):
+    """200 with the cached body and its ETag, or 304 if the client already has it."""
+    if request.if_none_match.contains(view.etag):
+        response = Response(status=304)
+    else:
+        response = Response(view.body, mimetype="application/json")
+    response.set_etag(view.etag)
+    return response
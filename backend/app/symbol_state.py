@@ -0,0 +1,155 @@
+# app/symbol_state.py
+
+"""
+Per-symbol runtime state: candles, trackers, levels, position and last quote as slotted attributes.
+
+Hot code reads attributes (state.last_quote, state.candles_10s); everything else can keep treating the
+state as a dict — state["position"], state.get(...), "custom_level_entry" in state, setdefault/pop — so
+snapshots, shard sync and the routes didn't have to change. Keys that aren't slots (tape bars, trackers for
+tick/volume bars, position_size, ...) live in `extra`.
+
+The BASE keys are always present, as in the old default dict; the other slots count as present once they
+hold something other than None. Created only by ticker_states (TickerStates.__missing__).
+"""
+
+from collections import deque
+
+# The old default_symbol_state() keys; 1m candles are "candles" / "current_candle"
+BASE = (
+    "active_entry_type",  # "10s", "1m", "5m", "custom", a tape bar type, or None; set via strategy.set_entry_type
+    "position",           # Active position info
+    "candles_10s", "current_candle_10s",
+    "candles", "current_candle",
+    "candles_5m", "current_candle_5m",
+    "breakouts",
+    "last_quote",
+)
+OPTIONAL = (
+    "pullback_tracker_10s", "pullback_tracker_1m", "pullback_tracker_5m",
+    "custom_level_entry",
+    "dispatcher",
+    "indicators",
+    "quote_stats",
+    "tape",
+)
+_BASE = frozenset(BASE)
+_SLOTS = frozenset(BASE + OPTIONAL)
+_MISSING = object()
+
+
+class SymbolState:
+    __slots__ = BASE + OPTIONAL + ("extra",)
+
+    def __init__(self):
+        self.active_entry_type = None
+        self.position = None
+        self.candles_10s = []
+        self.current_candle_10s = None
+        self.candles = []
+        self.current_candle = None
+        self.candles_5m = []
+        self.current_candle_5m = None
+        self.breakouts = []
+        self.last_quote = None
+        self.pullback_tracker_10s = None
+        self.pullback_tracker_1m = None
+        self.pullback_tracker_5m = None
+        self.custom_level_entry = None
+        self.dispatcher = None
+        self.indicators = None
+        self.quote_stats = None
+        self.tape = None
+        self.extra = {}
+
+    # --- dict compatibility ---
+
+    def __getitem__(self, key):
+        if key in _SLOTS:
+            value = getattr(self, key)
+            if value is None and key not in _BASE:
+                raise KeyError(key)
+            return value
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in _SLOTS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.pop(key)
+
+    def __contains__(self, key):
+        if key in _SLOTS:
+            return key in _BASE or getattr(self, key) is not None
+        return key in self.extra
+
+    def get(self, key, default=None):
+        if key in _SLOTS:
+            value = getattr(self, key)
+            return default if value is None and key not in _BASE else value
+        return self.extra.get(key, default)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+            return default
+        return self[key]
+
+    def pop(self, key, default=_MISSING):
+        """Remove key and return its value; BASE keys go back to their defaults (None or empty)."""
+        if key in _SLOTS:
+            value = getattr(self, key)
+            if value is None and key not in _BASE:
+                if default is _MISSING:
+                    raise KeyError(key)
+                return default
+            setattr(self, key, [] if isinstance(value, list) and key in _BASE else None)
+            return value
+        if default is _MISSING:
+            return self.extra.pop(key)
+        return self.extra.pop(key, default)
+
+    def update(self, other=(), **kwargs):
+        for key, value in (other.items() if hasattr(other, "items") else other):
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def keys(self):
+        return [key for key in BASE + OPTIONAL if key in self] + list(self.extra)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def __repr__(self):
+        return f"SymbolState({', '.join(self.keys())})"
+
+    def to_dict(self):
+        """JSON-safe view for /state/<symbol>: plain values as-is, objects by their to_dict() or class name."""
+        return {key: _jsonable(value) for key, value in self.items()}
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, deque)):
+        return [_jsonable(v) for v in value]
+    to_dict = getattr(value, "to_dict", None)
+    if to_dict is not None:
+        return _jsonable(to_dict())
+    return f"<{type(value).__name__}>"
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for the event bus (no API key needed).
+Checks sync dispatch order, that a failing subscriber doesn't stop the others, async dispatch, topic
+validation and the default candle_close wiring.
+"""
+
+import sys
+import os
+
+# Add the repo root to the path so the backend.app package imports resolve
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.events import EventBus, get_bus
+
+
+def test_sync_dispatch_order():
+    bus = EventBus()
+    calls = []
+    bus.subscribe("candle_close", lambda symbol, tf, candle: calls.append(("a", symbol, tf)))
+    bus.subscribe("candle_close", lambda symbol, tf, candle: calls.append(("b", symbol, tf)))
+    bus.publish("candle_close", "BUS", "10s", {})
+    assert calls == [("a", "BUS", "10s"), ("b", "BUS", "10s")]
+    bus.publish("quote", "BUS", None)  # no subscribers: nothing happens
+    assert len(calls) == 2
+
+
+def test_failing_subscriber_is_isolated():
+    bus = EventBus()
+    calls = []
+
+    def broken(symbol, quote):
+        raise RuntimeError("boom")
+
+    bus.subscribe("quote", broken)
+    bus.subscribe("quote", lambda symbol, quote: calls.append(symbol))
+    bus.publish("quote", "BUS", None)
+    assert calls == ["BUS"]
+
+
+def test_async_dispatch():
+    bus = EventBus()
+    calls = []
+    bus.subscribe("order", lambda symbol, order: calls.append(order["price"]), mode="async")
+    for price in (1.0, 2.0, 3.0):
+        bus.publish("order", "BUS", {"price": price})
+    bus.drain()
+    assert calls == [1.0, 2.0, 3.0] and bus.backlog() == 0
+
+
+def test_unknown_topic_and_mode():
+    bus = EventBus()
+    for topic, mode in (("quotes", "sync"), ("quote", "later")):
+        try:
+            bus.subscribe(topic, print, mode)
+        except ValueError:
+            continue
+        assert False, f"subscribe({topic!r}, mode={mode!r}) should have raised"
+
+
+def test_default_wiring():
+    subscribers = get_bus().subscribers()
+    names = [name.rsplit(".", 1)[-1] for name in subscribers["candle_close"]["sync"]]
+    # Indicators before the entry checks, the chart last
+    assert names[0] == "on_candle_close" and names[-1] == "emit_closed_candle"
+    assert subscribers["order"]["async"] and not subscribers["order"]["sync"]
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the event bus")
+    test_sync_dispatch_order()
+    test_failing_subscriber_is_isolated()
+    test_async_dispatch()
+    test_unknown_topic_and_mode()
+    test_default_wiring()
+    print("✅ Event bus test completed successfully!")
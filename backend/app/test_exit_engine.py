@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for the exit engine (no API key needed).
+Drives ExitMachine directly, the way a backtester would: the default plan against the fixed TP1/TP2/stop
+rules, scale-outs, each trailing mode, time stops, and that the trigger band never hides a tick that acts.
+"""
+
+import sys
+import os
+import json
+import random
+
+# Add the repo root to the path so the backend.app package imports resolve
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.trading.exits.engine import ExitMachine, load_plan
+
+POSITION = {"entry_price": 5.00, "size": 1000, "tp1": 5.15, "tp2": 5.30, "stop": 4.90,
+            "tp1_hit": False, "tp2_hit": False, "sl_hit": False}
+
+
+def tick(machine, price, spread=0.02, ts_ms=None):
+    return machine.on_tick(price, round(price - spread / 2, 4), round(price + spread / 2, 4), ts_ms)
+
+
+def test_default_plan_matches_standard_exit():
+    machine = ExitMachine.from_position(dict(POSITION), load_plan({}))
+    assert tick(machine, 5.10) == ()
+    actions = tick(machine, 5.15)
+    assert [(a.reason, a.qty, a.tranche) for a in actions] == [("target", 500, 1), ("stop_moved", 0, None)]
+    assert machine.stop == 5.00 and machine.size == 500
+    actions = tick(machine, 5.00)
+    assert [(a.reason, a.qty, a.closes) for a in actions] == [("breakeven", 500, True)]
+    assert machine.closed and tick(machine, 4.00) == ()
+
+
+def test_scale_out_tranches():
+    plan = load_plan({"targets": [[0.10, 0.25], [0.20, 0.25], [0.30, 0.25], [0.40, 0.25]], "breakeven_after": 2})
+    machine = ExitMachine.from_position(dict(POSITION, size=1001), plan)
+    sold = []
+    for price in (5.11, 5.21, 5.31, 5.41):
+        sold += [a.qty for a in tick(machine, price) if a.reason == "target"]
+    assert sold == [250, 250, 250, 251] and machine.closed
+
+
+def test_resume_after_first_target():
+    # A restored position that already took TP1 resumes with the rest on TP2 and the breakeven stop
+    machine = ExitMachine.from_position(dict(POSITION, size=500, stop=5.00, tp1_hit=True), load_plan({}))
+    assert machine.next_target == 1 and machine.stop == 5.00
+    assert [(a.reason, a.qty) for a in tick(machine, 5.30)] == [("target", 500)]
+
+
+def test_trailing_cents_and_pct():
+    machine = ExitMachine.from_position(dict(POSITION), load_plan({"targets": [[1.0, 1.0]], "trail": {"mode": "cents", "value": 0.05}}))
+    for price in (5.01, 5.08, 5.20, 5.16):
+        assert tick(machine, price) == ()
+    assert round(machine.stop, 4) == 5.14 and machine.stop_reason == "trail"
+    assert [a.reason for a in tick(machine, 5.14)] == ["trail"]
+
+    machine = ExitMachine.from_position(dict(POSITION), load_plan({"targets": [[1.0, 1.0]], "trail": {"mode": "pct", "value": 2}}))
+    tick(machine, 5.51)
+    assert round(machine.stop, 4) == 5.39
+
+
+def test_trailing_candle_low_after_first_target():
+    plan = load_plan({"trail": {"mode": "candle_low", "timeframe": "10s", "value": 0.01, "after": 1}})
+    machine = ExitMachine.from_position(dict(POSITION), plan)
+    candle = {"timestamp": 0, "open": 5.1, "high": 5.14, "low": 5.08, "close": 5.12}
+    machine.on_candle("10s", candle)
+    assert machine.stop == 4.90  # not active before the first target
+    tick(machine, 5.16)
+    machine.on_candle("1m", candle)
+    assert machine.stop == 5.00  # wrong timeframe: still breakeven
+    machine.on_candle("10s", candle)
+    assert machine.stop == 5.07 and machine.stop_reason == "trail"
+
+
+def test_time_stop():
+    machine = ExitMachine.from_position(dict(POSITION), load_plan({"time_stop_sec": 60}), now_ms=1_000_000)
+    assert machine.deadline_ms == 1_060_000
+    assert machine.on_candle("10s", {"timestamp": 1_040_000, "low": 5.0, "close": 5.01}) == ()
+    assert [a.reason for a in machine.on_candle("10s", {"timestamp": 1_050_000, "low": 5.0, "close": 5.01})] == ["time"]
+    machine = ExitMachine.from_position(dict(POSITION), load_plan({"time_stop_sec": 60}), now_ms=1_000_000)
+    assert [a.reason for a in tick(machine, 5.02, ts_ms=1_060_000)] == ["time"]
+
+
+def test_band_never_hides_an_action():
+    rng = random.Random(11)
+    plans = [{}, {"trail": {"mode": "cents", "value": 0.04}}, {"trail": {"mode": "pct", "value": 1.5, "after": 1}},
+             {"targets": [[0.08, 0.3], [0.16, 0.3], [0.24, 0.4]]}]
+    for spec in plans:
+        for _ in range(50):
+            fast = ExitMachine.from_position(dict(POSITION), load_plan(spec))
+            full = ExitMachine.from_position(dict(POSITION), load_plan(spec))
+            price = 5.0
+            for _ in range(400):
+                price = round(price + rng.gauss(0, 0.015), 2)
+                spread = rng.choice((0.01, 0.02, 0.04))
+                bid, ask = round(price - spread / 2, 4), round(price + spread / 2, 4)
+                low, high = fast.band()
+                skipped = low < bid and ask < high
+                expected = full.on_tick(price, bid, ask)
+                got = () if skipped else fast.on_tick(price, bid, ask)
+                assert list(got) == list(expected), (spec, price, skipped)
+                assert fast.stop == full.stop
+
+
+def test_restored_position_is_display_only():
+    from math import inf
+    from backend.app.shared_state import ticker_states
+    from backend.app.trading.core.trade_monitor import check_trade_targets
+    from backend.app.trading.exits.standard_exit import StandardExit
+    from backend.app.trading.exits.managed_exit import ManagedExit
+    ticker_states.pop("RST", None)
+    state = ticker_states["RST"]
+    state.position = dict(POSITION, restored=True)
+    # Far below the stop: nothing may sell until the broker confirms the position
+    check_trade_targets("RST", 4.00, 3.99, 4.01)
+    assert state.position is not None and not state.position["sl_hit"]
+    assert StandardExit("RST", state).trigger_band() == (-inf, inf)
+    assert ManagedExit("RST", state).trigger_band() == (-inf, inf)
+    ticker_states.pop("RST", None)
+
+
+def test_trail_survives_dispatcher_rebuild():
+    from backend.app.shared_state import ticker_states
+    from backend.app.trading.core.strategy import SymbolDispatcher
+    saved = os.environ.get("MOMO_EXIT_PLAN")
+    os.environ["MOMO_EXIT_PLAN"] = json.dumps({"targets": [[1.0, 1.0]], "trail": {"mode": "cents", "value": 0.05}})
+    ticker_states.pop("TRL", None)
+    try:
+        state = ticker_states["TRL"]
+        state.position = dict(POSITION)
+        dispatcher = SymbolDispatcher("TRL", state, "10s", exit_name="managed")
+        dispatcher.exit.on_tick("TRL", 5.20, 5.19, 5.21)  # ratchets the trail, no orders
+        assert state.position["stop"] == 5.14 and state.position["high_water"] == 5.19
+        # Entry type change (or restart + snapshot restore): a new exit resumes from the position
+        rebuilt = SymbolDispatcher("TRL", state, "1m", exit_name="managed")
+        assert rebuilt.exit.trigger_band() == (5.14, 5.19)
+        rebuilt.exit.on_tick("TRL", 5.17, 5.16, 5.18)
+        assert state.position["stop"] == 5.14 and state.position["stop_reason"] == "trail"
+    finally:
+        if saved is None:
+            os.environ.pop("MOMO_EXIT_PLAN", None)
+        else:
+            os.environ["MOMO_EXIT_PLAN"] = saved
+        ticker_states.pop("TRL", None)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the exit engine")
+    test_default_plan_matches_standard_exit()
+    test_scale_out_tranches()
+    test_resume_after_first_target()
+    test_trailing_cents_and_pct()
+    test_trailing_candle_low_after_first_target()
+    test_time_stop()
+    test_band_never_hides_an_action()
+    test_restored_position_is_display_only()
+    test_trail_survives_dispatcher_rebuild()
+    print("✅ Exit engine test completed successfully!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for the indicator engine (no API key needed).
+Feeds synthetic candles spanning two sessions through the incremental indicators and checks every value
+against the vectorized batch implementation, and that seeding from history then continuing incrementally
+lands on the same numbers.
+"""
+
+import sys
+import os
+import math
+import random
+import time
+
+# Add the repo root to the path so the backend.app package imports resolve
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.trading.indicators.incremental import IndicatorSet
+from backend.app.trading.indicators.batch import compute, seed_indicator_set, session_starts
+
+KEYS = ("ema9", "ema20", "macd", "macd_signal", "macd_hist", "atr", "vwap", "vwap_dist_pct")
+# 2026-10-15 13:30 UTC (09:30 ET); the 1m candles run past midnight ET into the next session
+START_MS = 1_792_071_000_000
+
+
+def make_candles(n=1500, seed=3, interval_ms=60_000):
+    rng = random.Random(seed)
+    price = 5.0
+    candles = []
+    for i in range(n):
+        open_ = price
+        close = max(0.5, open_ * (1 + rng.gauss(0, 0.004)))
+        high = max(open_, close) * (1 + abs(rng.gauss(0, 0.002)))
+        low = min(open_, close) * (1 - abs(rng.gauss(0, 0.002)))
+        volume = 0 if i % 97 == 0 else rng.randint(100, 50_000)
+        candles.append({"timestamp": START_MS + i * interval_ms, "open": open_, "high": high,
+                        "low": low, "close": close, "volume": volume})
+        price = close
+    return candles
+
+
+def assert_close(a, b, what):
+    assert math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9), f"{what}: incremental {a} != batch {b}"
+
+
+def test_incremental_matches_batch():
+    candles = make_candles()
+    batch = compute(candles)
+    indicators = IndicatorSet("1m")
+    for i, candle in enumerate(candles):
+        values = indicators.update(candle)
+        for key in KEYS:
+            assert_close(values[key], float(batch[key][i]), f"{key}[{i}]")
+    # The candles cross an ET day boundary, so VWAP restarted once
+    assert len(set(session_starts(batch["time"]))) == 2
+
+
+def test_seed_then_continue():
+    candles = make_candles()
+    split = 900
+    seeded = seed_indicator_set("1m", candles[:split])
+    reference = IndicatorSet("1m")
+    for candle in candles[:split]:
+        reference.update(candle)
+    for key in KEYS:
+        assert_close(seeded.last[key], reference.last[key], f"seeded {key}")
+    for candle in candles[split:]:
+        a, b = seeded.update(candle), reference.update(candle)
+        for key in KEYS:
+            assert_close(a[key], b[key], f"continued {key} at {candle['timestamp']}")
+
+
+def test_peek_does_not_commit():
+    candles = make_candles(50)
+    indicators = IndicatorSet("1m")
+    for candle in candles[:-1]:
+        indicators.update(candle)
+    before = dict(indicators.last)
+    peeked = indicators.peek(candles[-1])
+    assert indicators.last == before
+    committed = indicators.update(candles[-1])
+    for key in KEYS:
+        assert_close(peeked[key], committed[key], f"peek {key}")
+
+
+def test_update_cost():
+    candles = make_candles(20_000, interval_ms=10_000)
+    indicators = IndicatorSet("10s")
+    start = time.perf_counter()
+    for candle in candles:
+        indicators.update(candle)
+    per_update_us = (time.perf_counter() - start) / len(candles) * 1e6
+    start = time.perf_counter()
+    seed_indicator_set("10s", candles)
+    seed_ms = (time.perf_counter() - start) * 1000
+    print(f"✅ Incremental update {per_update_us:.2f} us/candle, batch seed of {len(candles)} candles {seed_ms:.1f} ms")
+    assert per_update_us < 100
+
+
+if __name__ == "__main__":
+    print("🧪 Testing incremental indicators against the batch implementation")
+    test_incremental_matches_batch()
+    test_seed_then_continue()
+    test_peek_does_not_commit()
+    test_update_cost()
+    print("✅ Indicator test completed successfully!")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-level custom entries (no API key needed).
+Checks the sorted level book against a brute-force scan, reclaim arming, the diff messages, and that the
+single custom level keeps its old behaviour.
+"""
+
+import sys
+import os
+import random
+
+# Add the repo root to the path so the backend.app package imports resolve
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.trading.entries.levels import LevelBook
+from backend.app.trading.entries.custom_level import CustomLevelEntry, PRIMARY
+
+
+def test_check_matches_brute_force():
+    rng = random.Random(5)
+    book = LevelBook("LVL")
+    pending = {}
+    for _ in range(300):
+        direction = rng.choice(("up", "down"))
+        level = book.add(round(rng.uniform(4, 6), 2), direction)
+        pending[level.id] = (level.price, direction)
+    price = 5.0
+    for _ in range(3000):
+        price = round(price + rng.gauss(0, 0.03), 2)
+        low, high = book.band()
+        expected = {lid for lid, (p, d) in pending.items() if (price >= p if d == "up" else price <= p)}
+        fired = {level.id for level in book.check(price)}
+        assert fired == expected
+        if low < price < high:
+            assert not fired  # inside the band nothing can fire
+        for lid in fired:
+            del pending[lid]
+    assert len(book) == len(pending)
+
+
+def test_reclaim_needs_a_cross():
+    book = LevelBook("LVL")
+    book.check(5.20)
+    level = book.add(5.00, "up", "reclaim", cross=True)
+    assert not level.armed
+    assert book.check(5.10) == []
+    assert book.check(4.98) == [] and level.armed  # lost it
+    assert [l.id for l in book.check(5.01)] == [level.id]  # and took it back
+
+
+def test_diff_messages():
+    book = LevelBook("LVL")
+    a = book.add(5.0)
+    b = book.add(5.5, action="alert")
+    diff = book.changes()
+    assert diff["version"] == 1 and {l["id"] for l in diff["added"]} == {a.id, b.id} and diff["removed"] == []
+    assert book.changes() is None
+    book.remove(a.id)
+    book.check(5.6)
+    diff = book.changes()
+    assert diff["version"] == 2 and diff["added"] == [] and diff["removed"] == sorted([a.id, b.id])
+    # Added and removed within one batch: only the removal goes out
+    c = book.add(6.0)
+    book.remove(c.id)
+    assert book.changes()["removed"] == [c.id]
+
+
+def test_round_levels():
+    book = LevelBook("LVL")
+    added = book.add_round_levels(4.73, above=3, below=2)
+    assert [(l.price, l.kind, l.direction) for l in added] == [
+        (5.0, "whole", "up"), (5.5, "half", "up"), (6.0, "whole", "up"), (4.5, "half", "down"), (4.0, "whole", "down")]
+
+
+def test_primary_level_compatibility():
+    entry = CustomLevelEntry("LVL", 5.00)
+    assert entry.custom_level == 5.00 and not entry.entry_triggered
+    # Like the old price >= custom_level check: fires even when already above it
+    assert entry.check_tick_for_entry("LVL", 5.02, 5.01, 5.03)
+    assert entry.entry_triggered and entry.custom_level == 5.00
+    assert not entry.check_tick_for_entry("LVL", 5.05, 5.04, 5.06)
+    entry.reset()
+    assert entry.check_tick_for_entry("LVL", 5.05, 5.04, 5.06)
+    # Extra levels: alerts don't enter, entry levels do
+    entry.add_level(5.50, action="alert")
+    entry.add_level(5.60)
+    assert not entry.check_tick_for_entry("LVL", 5.52, 5.51, 5.53)
+    assert entry.check_tick_for_entry("LVL", 5.61, 5.60, 5.62)
+    # Snapshot round trip keeps the added levels but not the primary one
+    entry.add_level(4.00, "down", "breakout")
+    restored = CustomLevelEntry("LVL", entry.custom_level)
+    restored.entry_triggered = entry.entry_triggered
+    restored.load_levels(entry.export_levels())
+    assert sorted(restored.levels.by_id) == sorted(entry.levels.by_id)
+    assert PRIMARY not in restored.levels.by_id
+
+
+def test_cross_level_added_after_quiet_ticks():
+    import backend.app.shared_state as shared_state
+    from backend.app.trading.core import trade_manager
+    from backend.app.trading.core.strategy import set_entry_type
+    from backend.app.trading.core.breakout_logic import process_quote_for_breakout
+    from backend.app.trading.stream.polygon_stream import SimpleQuote
+    symbol = "XLV"
+    entries = []
+    real_trigger = trade_manager.handle_breakout_trigger
+    trade_manager.handle_breakout_trigger = lambda *args: entries.append(args)
+    saved = shared_state.watched_ticker, shared_state.breakout_ready
+    shared_state.ticker_states.pop(symbol, None)
+    shared_state.watched_ticker, shared_state.breakout_ready = symbol, True
+    try:
+        state = set_entry_type(symbol, "custom")
+
+        def tick(bid, ask, ts):
+            # What PolygonStream._process_quote does before the breakout check
+            quote = SimpleQuote(symbol, ask, bid, 100, 100, timestamp_ms=ts)
+            state.last_quote = quote
+            process_quote_for_breakout(symbol, quote)
+
+        # No levels yet: the band skips these ticks, so the book never sees the price
+        tick(10.99, 11.01, 1)
+        level = state.custom_level_entry.add_level(10.0, "up", cross=True)
+        assert not level.armed
+        tick(10.99, 11.01, 2)
+        assert entries == []
+        tick(9.98, 10.00, 3)   # lose the level
+        tick(10.01, 10.03, 4)  # and reclaim it
+        assert len(entries) == 1
+    finally:
+        trade_manager.handle_breakout_trigger = real_trigger
+        shared_state.watched_ticker, shared_state.breakout_ready = saved
+        shared_state.ticker_states.pop(symbol, None)
+
+
+def test_custom_entry_respects_entry_filters():
+    import backend.app.shared_state as shared_state
+    from backend.app.trading.core import trade_manager
+    from backend.app.trading.core.strategy import set_entry_type
+    from backend.app.trading.core.breakout_logic import process_quote_for_breakout
+    from backend.app.trading.indicators import engine
+    from backend.app.trading.indicators.microstructure import update_quote_stats
+    from backend.app.trading.stream.polygon_stream import SimpleQuote
+    symbol = "XLF"
+    entries = []
+    real_trigger, real_filters = trade_manager.handle_breakout_trigger, engine.ENTRY_FILTERS
+    trade_manager.handle_breakout_trigger = lambda *args: entries.append(args)
+    engine.ENTRY_FILTERS = {"max_spread"}
+    saved = shared_state.watched_ticker, shared_state.breakout_ready
+    shared_state.ticker_states.pop(symbol, None)
+    shared_state.watched_ticker, shared_state.breakout_ready = symbol, True
+    try:
+        state = set_entry_type(symbol, "custom")
+        level = state.custom_level_entry.add_level(10.0, "up")
+
+        def tick(bid, ask, ts):
+            quote = SimpleQuote(symbol, ask, bid, 100, 100, timestamp_ms=ts)
+            update_quote_stats(symbol, quote)
+            state.last_quote = quote
+            process_quote_for_breakout(symbol, quote)
+
+        # A 5% wide quote: the level is reached but the spread gate blocks the entry
+        tick(9.80, 10.30, 1)
+        assert entries == []
+        # The level is still armed, and enters once the spread is tight again
+        assert state.custom_level_entry.levels.get(level.id) is level
+        tick(10.05, 10.06, 600_000)
+        assert len(entries) == 1 and state.custom_level_entry.levels.get(level.id) is None
+    finally:
+        trade_manager.handle_breakout_trigger = real_trigger
+        engine.ENTRY_FILTERS = real_filters
+        shared_state.watched_ticker, shared_state.breakout_ready = saved
+        shared_state.ticker_states.pop(symbol, None)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing custom price levels")
+    test_check_matches_brute_force()
+    test_reclaim_needs_a_cross()
+    test_diff_messages()
+    test_round_levels()
+    test_primary_level_compatibility()
+    test_cross_level_added_after_quiet_ticks()
+    test_custom_entry_respects_entry_filters()
+    print("✅ Level test completed successfully!")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for the rolling quote microstructure stats (no API key needed).
+Checks the O(1) windows against a brute-force scan of the same quotes, and the spread/rate/imbalance entry gates.
+"""
+
+import sys
+import os
+import random
+
+# Add the repo root to the path so the backend.app package imports resolve
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.shared_state import ticker_states
+from backend.app.trading.stream.polygon_stream import SimpleQuote
+from backend.app.trading.indicators.microstructure import QuoteStats, update_quote_stats, passes_quote_filters
+
+
+def _quotes(n, seed=9):
+    rng = random.Random(seed)
+    ts, mid = 1_760_000_000_000, 5.0
+    quotes = []
+    for _ in range(n):
+        ts += rng.choice((0, 1, 5, 40, 200, 900, 3000))
+        mid = max(1.0, mid + rng.gauss(0, 0.01))
+        half = rng.choice((0.005, 0.01, 0.02, 0.05))
+        quotes.append((ts, round(mid - half, 2), round(mid + half, 2), rng.randint(0, 30), rng.randint(0, 30)))
+    return quotes
+
+
+def test_windows_match_brute_force():
+    stats = QuoteStats(("1s", "10s"))
+    seen = []
+    for ts, bid, ask, bid_size, ask_size in _quotes(4000):
+        stats.update(ts, bid, ask, bid_size, ask_size)
+        mid = (bid + ask) / 2
+        total = bid_size + ask_size
+        seen.append((ts, (ask - bid) / mid * 100, (bid_size - ask_size) / total if total else 0.0))
+        for window in stats.windows:
+            inside = [(s, i) for t, s, i in seen if t > ts - window.ms]
+            assert window.count == len(inside)
+            assert abs(window.spread_mean - sum(s for s, _ in inside) / len(inside)) < 1e-9
+            assert window.spread_max == max(s for s, _ in inside)
+            assert abs(window.imbalance_mean - sum(i for _, i in inside) / len(inside)) < 1e-9
+            assert window.quote_rate == len(inside) * 1000 / window.ms
+
+
+def test_time_since_last_change():
+    stats = QuoteStats(("5s",))
+    stats.update(1_000, 5.00, 5.02, 10, 10)
+    stats.update(1_500, 5.00, 5.02, 12, 3)  # size change only
+    assert stats.stable_ms == 500
+    stats.update(2_000, 5.01, 5.02, 12, 3)
+    assert stats.stable_ms == 0
+    assert stats.to_dict()["windows"]["5s"]["quotes"] == 3
+
+
+def test_entry_gates():
+    symbol = "QSTAT"
+    ticker_states.pop(symbol, None)
+    assert passes_quote_filters(symbol, {"max_spread"})  # no stats yet: don't block
+    ts = 1_760_000_000_000
+    for i in range(20):
+        update_quote_stats(symbol, SimpleQuote(symbol=symbol, ask_price=5.01, bid_price=5.00, ask_size=5,
+                                               bid_size=20, timestamp_ms=ts + i * 100))
+    assert passes_quote_filters(symbol, {"max_spread", "min_quote_rate", "bid_imbalance"})
+    # One wide quote fails the spread gate even though the window mean is still tight
+    update_quote_stats(symbol, SimpleQuote(symbol=symbol, ask_price=5.20, bid_price=5.00, ask_size=5,
+                                           bid_size=20, timestamp_ms=ts + 2_100))
+    assert not passes_quote_filters(symbol, {"max_spread"})
+    # Offers stacking up on the ask flip the imbalance
+    for i in range(40):
+        update_quote_stats(symbol, SimpleQuote(symbol=symbol, ask_price=5.01, bid_price=5.00, ask_size=50,
+                                               bid_size=2, timestamp_ms=ts + 2_200 + i * 100))
+    assert passes_quote_filters(symbol, {"max_spread"}) and not passes_quote_filters(symbol, {"bid_imbalance"})
+    # A quiet tape: one quote after a long gap
+    update_quote_stats(symbol, SimpleQuote(symbol=symbol, ask_price=5.01, bid_price=5.00, ask_size=50,
+                                           bid_size=60, timestamp_ms=ts + 60_000))
+    assert not passes_quote_filters(symbol, {"min_quote_rate"})
+    ticker_states.pop(symbol, None)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing quote microstructure stats")
+    test_windows_match_brute_force()
+    test_time_since_last_change()
+    test_entry_gates()
+    print("✅ Quote stats test completed successfully!")
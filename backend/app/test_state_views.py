@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the cached /state and /positions JSON (no API key needed).
+Checks that unchanged state reuses the encoded body, that quotes and position changes re-encode it, and
+the ETag / If-None-Match round trip.
+"""
+
+import sys
+import os
+import json
+
+# Add the repo root to the path so the backend.app package imports resolve
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask, request
+
+from backend.app.state_manager import TickerStates
+from backend.app.shared_state import default_symbol_state
+from backend.app.state_views import state_view, positions_view, json_response
+from backend.app.trading.stream.polygon_stream import SimpleQuote
+from backend.app.trading.pullbacks.tracker import PullbackTracker
+
+
+def _quote(bid, ask, ts=1_700_000_000_000):
+    return SimpleQuote("SVW", ask, bid, 100, 200, timestamp_ms=ts)
+
+
+def _states():
+    states = TickerStates(default_symbol_state)
+    state = states["SVW"]
+    state.candles_10s.extend({"timestamp": 1_700_000_000_000 + i * 10_000, "open": 5.0, "high": 5.1,
+                              "low": 4.9, "close": 5.0, "volume": 100} for i in range(500))
+    state.pullback_tracker_10s = PullbackTracker("SVW", interval="10s")
+    state.last_quote = _quote(5.00, 5.02)
+    states["IDLE"]
+    return states
+
+
+def test_state_view_is_cached_until_state_changes():
+    states = _states()
+    state = states["SVW"]
+    first = state_view("SVW", state)
+    body = json.loads(first.body)
+    assert len(body["candles_10s"]) == 500 and body["last_quote"]["bid_price"] == 5.00
+    assert body["pullback_tracker_10s"] == "<PullbackTracker>"
+    assert state_view("SVW", state) is first
+    state.last_quote = _quote(5.01, 5.03, 1_700_000_000_100)
+    second = state_view("SVW", state)
+    assert second is not first and second.etag != first.etag
+    state.candles_10s.append(dict(state.candles_10s[-1], timestamp=1_800_000_000_000))
+    assert state_view("SVW", state) is not second
+
+
+def test_positions_view():
+    states = _states()
+    state = states["SVW"]
+    assert json.loads(positions_view(states).body) == []
+    state.position = {"entry_type": "10s", "entry_price": 4.90, "size": 1000, "tp1_hit": False}
+    view = positions_view(states)
+    rows = json.loads(view.body)
+    assert [row["symbol"] for row in rows] == ["SVW"]
+    assert abs(rows[0]["unrealized"] - 110.0) < 1e-6 and rows[0]["bid"] == 5.00
+    assert positions_view(states) is view
+    state.position["tp1_hit"] = True  # mutated in place
+    assert positions_view(states) is not view
+
+
+def test_etag_round_trip():
+    view = state_view("SVW", _states()["SVW"])
+    app = Flask(__name__)
+    with app.test_request_context("/state/SVW"):
+        response = json_response(view, request)
+        assert response.status_code == 200 and response.get_etag()[0] == view.etag
+    with app.test_request_context("/state/SVW", headers={"If-None-Match": f'"{view.etag}"'}):
+        response = json_response(view, request)
+        assert response.status_code == 304 and not response.get_data()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing cached state views")
+    test_state_view_is_cached_until_state_changes()
+    test_positions_view()
+    test_etag_round_trip()
+    print("✅ State view test completed successfully!")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the slotted per-symbol state (no API key needed).
+Checks that SymbolState still behaves like the old state dict (present keys, get/pop/setdefault, extra
+keys) and that the /state view serializes.
+"""
+
+import sys
+import os
+import json
+
+# Add the repo root to the path so the backend.app package imports resolve
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.symbol_state import SymbolState, BASE
+from backend.app.shared_state import ticker_states
+from backend.app.trading.stream.polygon_stream import SimpleQuote
+from backend.app.trading.pullbacks.tracker import PullbackTracker
+
+
+def test_mapping_compatibility():
+    state = SymbolState()
+    # Like the old default dict: the base keys are there from the start, nothing else is
+    assert set(state.keys()) == set(BASE)
+    assert "position" in state and state["position"] is None
+    assert "pullback_tracker_10s" not in state and state.get("pullback_tracker_10s", 1) == 1
+    try:
+        state["custom_level_entry"]
+        assert False, "optional slots are missing until set"
+    except KeyError:
+        pass
+    state["position"] = {"size": 100}
+    assert state.position == {"size": 100}
+    assert state.pop("position") == {"size": 100} and state.position is None
+    # Keys that aren't slots go to extra
+    state["tape_bars_500t"] = []
+    assert state.setdefault("tape_bars_500t", None) == [] and state.extra == {"tape_bars_500t": []}
+    assert state.setdefault("position_size", 500) == 500 and state.get("position_size") == 500
+    assert state.pop("nope", None) is None
+    assert state.pop("quote_stats", None) is None
+
+
+def test_state_created_in_one_place():
+    ticker_states.pop("SST", None)
+    state = ticker_states["SST"]
+    assert isinstance(state, SymbolState) and state.candles_10s == [] and state.candles is not state.candles_5m
+    assert ticker_states["SST"] is state
+    ticker_states.pop("SST", None)
+
+
+def test_state_view_serializes():
+    state = SymbolState()
+    state.last_quote = SimpleQuote("SST", 5.02, 5.00, 300, 200, timestamp_ms=1_700_000_000_000)
+    state.pullback_tracker_10s = PullbackTracker("SST", interval="10s")
+    state.candles_10s.append({"timestamp": 1_700_000_000_000, "open": 5.0, "high": 5.1, "low": 4.9,
+                              "close": 5.05, "volume": 900})
+    view = json.loads(json.dumps(state.to_dict()))
+    assert view["last_quote"]["bid_price"] == 5.00
+    assert view["pullback_tracker_10s"] == "<PullbackTracker>"
+    assert view["candles_10s"][0]["close"] == 5.05
+
+
+if __name__ == "__main__":
+    print("🧪 Testing SymbolState")
+    test_mapping_compatibility()
+    test_state_created_in_one_place()
+    test_state_view_serializes()
+    print("✅ SymbolState test completed successfully!")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the trade tape (no API key needed).
+Builds time, tick and volume bars from random prints and checks them against a brute-force aggregation,
+plus the odd-lot/average-price handling and the bounded print ring.
+"""
+
+import sys
+import os
+import random
+
+# Add the repo root to the path so the backend.app package imports resolve
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.trading.core.trade_tape import TradeTape, parse_bar_type, MAX_BARS
+
+
+def _prints(n, seed=3):
+    rng = random.Random(seed)
+    ts, price = 1_760_000_000_000, 5.0
+    prints = []
+    for _ in range(n):
+        ts += rng.randint(0, 400)
+        price = round(max(0.5, price + rng.gauss(0, 0.01)), 2)
+        prints.append((ts, price, rng.choice((100, 100, 200, 500, 1000))))
+    return prints
+
+
+def test_time_bars_match_brute_force():
+    state = {}
+    tape = TradeTape("TAPE", state, bar_types=())
+    prints = _prints(5000)
+    for ts, price, size in prints:
+        tape.add(ts, price, size)
+    buckets = {}
+    for ts, price, size in prints:
+        buckets.setdefault(ts - ts % 60_000, []).append((price, size))
+    expected = [buckets[start] for start in sorted(buckets)][:-1]  # the last bucket is still open
+    bars = state["tape_bars_1m"]
+    assert len(bars) == len(expected)
+    for bar, trades in zip(bars, expected):
+        assert bar["open"] == trades[0][0] and bar["close"] == trades[-1][0]
+        assert bar["high"] == max(p for p, _ in trades) and bar["low"] == min(p for p, _ in trades)
+        assert bar["volume"] == sum(s for _, s in trades) and bar["trades"] == len(trades)
+        assert bar["vwap"] == round(sum(p * s for p, s in trades) / bar["volume"], 4)
+    assert state["tape_current_1m"]["timestamp"] == max(buckets)
+    assert tape.volume == sum(s for _, _, s in prints)
+
+
+def test_tick_and_volume_bars():
+    state = {}
+    tape = TradeTape("TAPE", state, bar_types=("50t", "10000v"))
+    prints = _prints(2000)
+    for ts, price, size in prints:
+        tape.add(ts, price, size)
+    assert len(state["tape_bars_50t"]) == 40 and all(bar["trades"] == 50 for bar in state["tape_bars_50t"])
+    assert state["tape_current_50t"] is None
+    volume_bars = state["tape_bars_10000v"]
+    assert all(bar["volume"] >= 10000 for bar in volume_bars)
+    assert sum(bar["volume"] for bar in volume_bars) + (state["tape_current_10000v"] or {"volume": 0})["volume"] == tape.volume
+    assert parse_bar_type("500t") == ("ticks", 500) and parse_bar_type("20000v") == ("volume", 20000)
+    for bad in ("500", "t", "0t", "5m"):
+        try:
+            parse_bar_type(bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+
+def test_non_price_prints_count_volume_only():
+    state = {}
+    tape = TradeTape("TAPE", state, bar_types=())
+    tape.add(1_000, 5.00, 100)
+    tape.add(2_000, 4.50, 30, [37])  # odd lot far off the market
+    tape.add(3_000, 5.60, 500, [2])  # average price trade
+    tape.add(4_000, 5.02, 200, [14])  # intermarket sweep: a regular print
+    bar = state["tape_current_10s"]
+    assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (5.00, 5.02, 5.00, 5.02)
+    assert bar["volume"] == 830 and bar["trades"] == 4
+    assert tape.last_price == 5.02 and tape.recent(2)[0]["p"] == 5.60
+
+
+def test_ring_and_bar_lists_are_bounded():
+    state = {}
+    tape = TradeTape("TAPE", state, bar_types=("1t",), size=100)
+    for ts, price, size in _prints(MAX_BARS * 2):
+        tape.add(ts, price, size)
+    assert len(tape.prints) == 100 and len(tape.recent(500)) == 100
+    assert len(state["tape_bars_1t"]) <= MAX_BARS + MAX_BARS // 4
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the trade tape")
+    test_time_bars_match_brute_force()
+    test_tick_and_volume_bars()
+    test_non_price_prints_count_volume_only()
+    test_ring_and_bar_lists_are_bounded()
+    print("✅ Trade tape test completed successfully!")
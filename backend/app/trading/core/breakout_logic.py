@@ -1,122 +1,65 @@
 # app/trading/core/breakout_logic.py
 
 import logging
-from datetime import datetime, timezone
-import sys
 
 import backend.app.shared_state as shared_state
 from ..pullbacks.tracker import PullbackTracker, Candle
-from ..core.trade_monitor import check_trade_targets  # ✅ Ensure correct import
-from ..core.trade_manager import handle_breakout_trigger
-from ..core.execution import submit_bracket_order
-from ..core.candle_builder import handle_new_quote
-from ..entries.custom_level import CustomLevelEntry
+from ..core.strategy import get_dispatcher
+from ...utils.metrics import timed
 
 logger = logging.getLogger(__name__)
 
+@timed("breakout_tick")
 def process_quote_for_breakout(symbol, quote):
     """
     Handles breakout logic for both quote objects (with .timestamp) and Polygon trade dicts.
     Only calls handle_new_quote if the input has a .timestamp attribute.
     """
     # logger.info(f"[BREAKOUT] Called for symbol={symbol}, watched_ticker={shared_state.watched_ticker}")
+    if shared_state.replay.active:
+        return
     if not shared_state.breakout_ready:
-        logger.warning(f"[BREAKOUT] Not ready: breakout_ready is False. Skipping breakout logic.")
+        logger.warning("[BREAKOUT] Not ready: breakout_ready is False. Skipping breakout logic.")
         return
-    if shared_state.watched_ticker is None:
-        logger.warning(f"[BREAKOUT] watched_ticker is None! No breakout logic will run.")
-    if symbol != shared_state.watched_ticker:
+    if shared_state.watched_ticker is None and not shared_state.watchlist:
+        logger.warning("[BREAKOUT] watched_ticker is None! No breakout logic will run.")
+    if not shared_state.is_active_symbol(symbol):
         return
     state = shared_state.ticker_states.get(symbol)
     if not state:
-        logger.info(f"No state for {symbol}")
+        logger.info("No state for %s", symbol)
         return
     bid = getattr(quote, "bid_price", None) or getattr(quote, "bp", None)
     ask = getattr(quote, "ask_price", None) or getattr(quote, "ap", None)
     # logger.info(f"[BREAKOUT] {symbol} bid={bid} ask={ask}")
     if bid is None or ask is None:
-        logger.warning(f"[{symbol}] Skipping breakout check — missing bid/ask")
+        logger.warning("[%s] Skipping breakout check — missing bid/ask", symbol)
+        return
+    dispatcher = get_dispatcher(symbol, state)
+    # Fast path: nothing can trigger strictly inside the band (see core/strategy.py)
+    low, high = dispatcher.band
+    if low < bid and ask < high:
         return
     midpoint = (bid + ask) / 2
-    entry_type = state.get("active_entry_type")
-    # Always check the correct tracker for the active entry_type at tick level
-    if entry_type == "10s":
-        if "pullback_tracker_10s" not in state:
-            state["pullback_tracker_10s"] = PullbackTracker(symbol, interval="10s")
-        tracker = state["pullback_tracker_10s"]
-        breakout_hit = tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
-        position = state.get("position")
-        if position:
-            try:
-                check_trade_targets(symbol, midpoint, bid, ask)
-            except Exception as e:
-                logger.exception(f"[{symbol}] Failed to check trade targets", exc_info=e)
-    elif entry_type == "1m":
-        if "pullback_tracker_1m" not in state:
-            state["pullback_tracker_1m"] = PullbackTracker(symbol, interval="1m")
-        tracker = state["pullback_tracker_1m"]
-        breakout_hit = tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
-        position = state.get("position")
-        if position:
-            try:
-                check_trade_targets(symbol, midpoint, bid, ask)
-            except Exception as e:
-                logger.exception(f"[{symbol}] Failed to check trade targets", exc_info=e)
-    elif entry_type == "5m":
-        if "pullback_tracker_5m" not in state:
-            state["pullback_tracker_5m"] = PullbackTracker(symbol, interval="5m")
-        tracker = state["pullback_tracker_5m"]
-        breakout_hit = tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
-        position = state.get("position")
-        if position:
-            try:
-                check_trade_targets(symbol, midpoint, bid, ask)
-            except Exception as e:
-                logger.exception(f"[{symbol}] Failed to check trade targets", exc_info=e)
-    elif entry_type == "custom":
-        # Get or create custom level entry tracker
-        if "custom_level_entry" not in state:
-            # Default to None to avoid unwanted entries
-            state["custom_level_entry"] = CustomLevelEntry(symbol, None)
-            logger.info(f"[{symbol}] Created custom level entry with no default level")
-            # Emit initial breakout levels
-            state["custom_level_entry"].emit_breakout_levels()
-        
-        tracker = state["custom_level_entry"]
-        breakout_hit = tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
-        
-        # Handle breakout if triggered
-        if breakout_hit:
-            logger.info(f"[{symbol}] Custom level breakout triggered at ${midpoint:.2f}")
-            try:
-                handle_breakout_trigger(symbol, midpoint, "custom", bid, ask)
-            except Exception as e:
-                logger.exception(f"[{symbol}] Failed to handle custom level breakout", exc_info=e)
-        
-        position = state.get("position")
-        if position:
-            try:
-                check_trade_targets(symbol, midpoint, bid, ask)
-            except Exception as e:
-                logger.exception(f"[{symbol}] Failed to check trade targets", exc_info=e)
-    else:
-        # logger.info(f"[BREAKOUT] {symbol} No valid entry_type set, skipping breakout check.")
-        pass
+    for handler in dispatcher.tick:
+        handler(symbol, midpoint, bid, ask)
+    # Handlers may have entered, moved the stop or closed; recompute from the new state
+    dispatcher.refresh_band()
 
+@timed("breakout_10s_close")
 def process_quote_for_breakout_10s(symbol: str, candle_dict, tracker=None):
-    logger.info(f"[BREAKOUT-10S] Called for symbol={symbol}, watched_ticker={shared_state.watched_ticker}")
-    if not shared_state.breakout_ready:
+    logger.info("[BREAKOUT-10S] Called for symbol=%s, watched_ticker=%s", symbol, shared_state.watched_ticker)
+    if not shared_state.breakout_ready or shared_state.replay.active:
         #logger.warning(f"[BREAKOUT-10S] Not ready: breakout_ready is False. Skipping breakout logic.")
         return
-    if shared_state.watched_ticker is None:
-        logger.warning(f"[BREAKOUT-10S] watched_ticker is None! No breakout logic will run.")
-    if symbol != shared_state.watched_ticker:
+    if shared_state.watched_ticker is None and not shared_state.watchlist:
+        logger.warning("[BREAKOUT-10S] watched_ticker is None! No breakout logic will run.")
+    if not shared_state.is_active_symbol(symbol):
         #logger.info(f"[BREAKOUT-10S] Skipping: symbol {symbol} != watched_ticker {shared_state.watched_ticker}")
         return
-    from ..pullbacks.tracker import PullbackTracker, Candle
     state = shared_state.ticker_states.get(symbol)
     if not state:
-        logger.info(f"No state for {symbol} (10s)")
+        logger.info("No state for %s (10s)", symbol)
         return
     # Convert dict to Candle object if needed
     if isinstance(candle_dict, dict):
@@ -130,44 +73,37 @@ def process_quote_for_breakout_10s(symbol: str, candle_dict, tracker=None):
         )
     else:
         candle = candle_dict
-    if "pullback_tracker_10s" not in state:
-        state["pullback_tracker_10s"] = PullbackTracker(symbol, interval="10s")
-    tracker = state["pullback_tracker_10s"]
+    tracker = state.pullback_tracker_10s
+    if tracker is None:
+        tracker = state.pullback_tracker_10s = PullbackTracker(symbol, interval="10s")
     # Always add finalized candle to tracker for logging
     tracker.add_candle(candle)
-    bid = state.get("last_quote").bid_price if state.get("last_quote") else None
-    ask = state.get("last_quote").ask_price if state.get("last_quote") else None
+    last_quote = state.last_quote
+    bid = last_quote.bid_price if last_quote else None
+    ask = last_quote.ask_price if last_quote else None
     # logger.info(f"[BREAKOUT-10S] {symbol} bid={bid} ask={ask}")
     if bid is None or ask is None:
-        logger.warning(f"[{symbol}] (10s) Skipping breakout check — missing bid/ask")
+        logger.warning("[%s] (10s) Skipping breakout check — missing bid/ask", symbol)
         return
     midpoint = (bid + ask) / 2
-    entry_type = state.get("active_entry_type")
-    logger.info(f"[BREAKOUT-10S] {symbol} entry_type={entry_type}")
-    if entry_type is None:
-        logger.warning(f"[BREAKOUT-10S] active_entry_type is None for {symbol}! No entries will be taken.")
-        logger.info(f"[{symbol}] (10s) Skipping entry: active_entry_type is None")
-        tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
+    handlers = get_dispatcher(symbol, state).close_10s
+    if not handlers:
+        logger.info("[%s] (10s) No close-time entry check for entry type %s", symbol, state.active_entry_type)
         return
-    if entry_type == "10s":
-        logger.info(f"[BREAKOUT-10S] {symbol} Checking for 10s breakout at price={midpoint}")
-        breakout_hit = tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
-        # If we're in a trade, check TP1/TP2/SL (same as 1m logic)
-        position = state.get("position")
-        if position:
-            try:
-                check_trade_targets(symbol, midpoint, bid, ask)
-            except Exception as e:
-                logger.exception(f"[{symbol}] (10s) Failed to check trade targets", exc_info=e)
-    else:
-        tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
+    logger.info("[BREAKOUT-10S] %s Checking for 10s breakout at price=%s", symbol, midpoint)
+    for handler in handlers:
+        handler(symbol, midpoint, bid, ask)
+    get_dispatcher(symbol, state).refresh_band()
 
+@timed("breakout_5m_close")
 def process_quote_for_breakout_5m(symbol: str, candle_dict, tracker=None):
-    if symbol != shared_state.watched_ticker:
+    if not shared_state.breakout_ready or shared_state.replay.active:
+        return
+    if not shared_state.is_active_symbol(symbol):
         return
     state = shared_state.ticker_states.get(symbol)
     if not state:
-        logger.info(f"No state for {symbol} (5m)")
+        logger.info("No state for %s (5m)", symbol)
         return
 
     # Convert dict to Candle object if needed
@@ -185,37 +121,37 @@ def process_quote_for_breakout_5m(symbol: str, candle_dict, tracker=None):
 
     # Use per-symbol, per-interval tracker
     if tracker is None:
-        if "pullback_tracker_5m" not in state:
-            state["pullback_tracker_5m"] = PullbackTracker(symbol, interval="5m")
-        tracker = state["pullback_tracker_5m"]
+        tracker = state.pullback_tracker_5m
+        if tracker is None:
+            tracker = state.pullback_tracker_5m = PullbackTracker(symbol, interval="5m")
     tracker.add_candle(candle)
 
-    last_quote = state.get("last_quote")
+    last_quote = state.last_quote
     bid = getattr(last_quote, "bid_price", None) if last_quote else None
     ask = getattr(last_quote, "ask_price", None) if last_quote else None
     if bid is None or ask is None:
-        logger.warning(f"[{symbol}] (5m) Skipping breakout check — missing bid/ask")
+        logger.warning("[%s] (5m) Skipping breakout check — missing bid/ask", symbol)
         return
 
     midpoint = (bid + ask) / 2
-    entry_type = state.get("active_entry_type")
-    if entry_type is None:
-        logger.info(f"[{symbol}] (5m) Skipping entry: active_entry_type is None")
-        tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
-        return
-    if entry_type == "5m":
-        breakout_hit = tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
-        position = state.get("position")
-        if position:
-            try:
-                check_trade_targets(symbol, midpoint, bid, ask)
-            except Exception as e:
-                logger.exception(f"[{symbol}] (5m) Failed to check trade targets", exc_info=e)
-    else:
-        tracker.check_tick_for_entry(symbol, midpoint, bid, ask)
+    dispatcher = get_dispatcher(symbol, state)
+    if dispatcher.close_5m:
+        for handler in dispatcher.close_5m:
+            handler(symbol, midpoint, bid, ask)
+        dispatcher.refresh_band()
+
+def on_candle_closed(symbol, timeframe, candle):
+    """candle_close subscriber: the close-time breakout checks for the candle's timeframe."""
+    if timeframe == "10s":
+        process_quote_for_breakout_10s(symbol, candle)
+    elif timeframe == "1m":
+        # The candle dict carries no bid/ask, so this only logs; 1m entries are checked per tick
+        process_quote_for_breakout(symbol, candle)
+    elif timeframe == "5m":
+        process_quote_for_breakout_5m(symbol, candle)
 
 def _get_current_candle(state):
-    candles = state.get("candles", [])
+    candles = state.candles
     if not candles:
         return None
 
@@ -6,6 +6,10 @@ from ...shared_state import ticker_states
 from ...db import insert_trade, insert_execution
 from ...utils.hotkey_utils import trigger_hotkey
 from ...utils.voice_utils import announce_new_trade
+from ...utils.metrics import timed, incr
+from ...utils import tracing
+from ...events import publish
+from .strategy import refresh_trigger_band
 
 logger = logging.getLogger(__name__)
 
@@ -15,19 +19,23 @@ def submit_bracket_order(symbol: str, entry: float, qty: int, tp1: float, tp2: f
     # Announce new trade with robotic voice
     announce_new_trade(symbol, entry)
     
-    ticker_states[symbol]["position"] = {
-        "entry_price": entry,
-        "size": qty,
-        "tp1": tp1,
-        "tp2": tp2,
-        "stop": stop,
-        "tp1_hit": False,
-        "tp2_hit": False,
-        "sl_hit": False,
-        "order_id": None
-    }
-    # Optionally record to DB
-    insert_execution({
+    with ticker_states.pin_lock:
+        ticker_states[symbol]["position"] = {
+            "entry_price": entry,
+            "size": qty,
+            "tp1": tp1,
+            "tp2": tp2,
+            "stop": stop,
+            "tp1_hit": False,
+            "tp2_hit": False,
+            "sl_hit": False,
+            "order_id": None
+        }
+    trace_id = tracing.record_order(symbol, "buy", qty, entry, kind="bracket_order")
+    ticker_states[symbol]["position"]["trace_id"] = trace_id
+    refresh_trigger_band(symbol)
+    # Recorded to the DB off the order path (order subscriber)
+    publish("order", symbol, {
         "symbol": symbol,
         "quantity": qty,
         "price": entry,
@@ -35,10 +43,13 @@ def submit_bracket_order(symbol: str, entry: float, qty: int, tp1: float, tp2: f
         "datetime": "simulated",
         "trade_id": None,
         "commission": None,
-        "entry_type": None
+        "entry_type": None,
+        "trace_id": trace_id
     })
 
+@timed("submit_order")
 def submit_order(symbol: str, qty: int, side: str, bid: float, ask: float):
+    incr("order", label=side.lower())
     # Send hotkey FIRST for buy orders (entry) - before any logging or recording
     if side.lower() == "buy":
         trigger_hotkey("buy_ask")
@@ -48,8 +59,10 @@ def submit_order(symbol: str, qty: int, side: str, bid: float, ask: float):
     
     price = round(bid if side == "sell" else ask, 2)
     logger.info(f"[{symbol}] (SIM) {side.upper()} order: qty={qty} @ ${price}")
+    # Link the order to the quote that triggered it (per-hop latencies land in /traces)
+    trace_id = tracing.record_order(symbol, side.lower(), qty, price, kind="submit_order")
     
-    insert_execution({
+    publish("order", symbol, {
         "symbol": symbol,
         "quantity": qty,
         "price": price,
@@ -57,17 +70,19 @@ def submit_order(symbol: str, qty: int, side: str, bid: float, ask: float):
         "datetime": "simulated",
         "trade_id": None,
         "commission": None,
-        "entry_type": None
+        "entry_type": None,
+        "trace_id": trace_id
     })
-    return {"symbol": symbol, "qty": qty, "side": side, "price": price, "simulated": True}
+    return {"symbol": symbol, "qty": qty, "side": side, "price": price, "simulated": True, "trace_id": trace_id}
 
 def submit_stop_limit_order(symbol: str, qty: int, stop_price: float, limit_price: float):
     # Send hotkey FIRST for stop limit orders (stop loss) - before any logging or recording
     trigger_hotkey("sell_all_bid")
     
     logger.info(f"[{symbol}] (SIM) Stop-limit order: qty={qty}, stop={stop_price}, limit={limit_price}")
+    trace_id = tracing.record_order(symbol, "sell", qty, stop_price, kind="stop_limit_order")
     
-    insert_execution({
+    publish("order", symbol, {
         "symbol": symbol,
         "quantity": qty,
         "price": stop_price,
@@ -75,6 +90,12 @@ def submit_stop_limit_order(symbol: str, qty: int, stop_price: float, limit_pric
         "datetime": "simulated",
         "trade_id": None,
         "commission": None,
-        "entry_type": None
+        "entry_type": None,
+        "trace_id": trace_id
     })
-    return {"symbol": symbol, "qty": qty, "side": "sell", "price": stop_price, "simulated": True}
\ No newline at end of file
+    return {"symbol": symbol, "qty": qty, "side": "sell", "price": stop_price, "simulated": True, "trace_id": trace_id}
+
+
+def record_execution(symbol: str, order: dict):
+    """order subscriber (async): write the order's executions row."""
+    insert_execution(order)
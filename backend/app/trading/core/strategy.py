@@ -0,0 +1,206 @@
+# app/trading/core/strategy.py
+
+"""
+Entry/exit strategy interface, registry and per-symbol dispatch.
+
+A strategy declares the events it handles in `events`: "tick" and/or "close_10s", "close_1m", "close_5m".
+When a symbol's entry type changes, set_entry_type() builds a SymbolDispatcher holding tuples of the
+bound handlers the active strategies asked for, so the tick path just loops over a tuple.
+
+Each strategy also reports a trigger band: the (low, high) prices between which a tick cannot make it act.
+The dispatcher keeps the intersection, so a quote with low < bid and ask < high is skipped with two comparisons.
+The band must be refreshed (refresh_trigger_band) whenever a level or position appears or changes;
+a stale band that is too narrow only costs extra handler calls, one that is too wide misses triggers.
+"""
+
+import os
+import logging
+from math import inf
+
+logger = logging.getLogger(__name__)
+
+EVENTS = ("tick", "close_10s", "close_1m", "close_5m")
+
+ENTRY_STRATEGIES = {}
+EXIT_STRATEGIES = {}
+# "standard" (fixed TP1/TP2/stop, check_trade_targets) or "managed" (exits/engine.py plan from MOMO_EXIT_PLAN)
+DEFAULT_EXIT = os.getenv("MOMO_EXIT_STRATEGY", "standard")
+_builtins_loaded = False
+
+
+class EntryStrategy:
+    """Base for entry strategies. Handlers get (symbol, price, bid, ask) and return True when they entered."""
+
+    name = None
+    events = ()
+
+    def __init__(self, symbol, state):
+        self.symbol = symbol
+        self.state = state
+
+    def on_tick(self, symbol, price, bid, ask):
+        return False
+
+    def on_candle_close(self, symbol, price, bid, ask):
+        return False
+
+    def trigger_band(self):
+        """(low, high) such that on_tick is a no-op while low < bid and ask < high. Default: never skip."""
+        return inf, -inf
+
+
+class ExitStrategy:
+    """Base for exit strategies managing an open position. Same handler signature as entries."""
+
+    name = None
+    events = ()
+
+    def __init__(self, symbol, state):
+        self.symbol = symbol
+        self.state = state
+
+    def on_tick(self, symbol, price, bid, ask):
+        pass
+
+    def on_candle_close(self, symbol, price, bid, ask):
+        pass
+
+    def on_candle(self, timeframe, candle):
+        """Every closed candle of the symbol, whatever the entry's events (see notify_candle_closed)."""
+        pass
+
+    def trigger_band(self):
+        return inf, -inf
+
+
+def register_entry(cls):
+    """Class decorator: make an EntryStrategy selectable by its name as an entry type."""
+    ENTRY_STRATEGIES[cls.name] = cls
+    return cls
+
+
+def register_exit(cls):
+    EXIT_STRATEGIES[cls.name] = cls
+    return cls
+
+
+def _load_builtin_strategies():
+    global _builtins_loaded
+    if _builtins_loaded:
+        return
+    # Imported for their @register_* side effect
+    from ..entries import pullback_10sec, pullback_1min, custom_level, tape_bars  # noqa: F401
+    from ..exits import standard_exit, managed_exit  # noqa: F401
+    _builtins_loaded = True
+
+
+class SymbolDispatcher:
+    """The active strategies for one symbol and the handlers to call for each event, in entry-then-exit order."""
+
+    __slots__ = ("entry_type", "entry", "exit", "tick", "close_10s", "close_1m", "close_5m", "band", "_banded")
+
+    def __init__(self, symbol, state, entry_type, exit_name=DEFAULT_EXIT):
+        _load_builtin_strategies()
+        self.entry_type = entry_type
+        entry_cls = ENTRY_STRATEGIES.get(entry_type)
+        if entry_cls is None and entry_type is not None:
+            logger.warning("[Strategy] Unknown entry type %s for %s; no entries will be taken", entry_type, symbol)
+        self.entry = entry_cls(symbol, state) if entry_cls is not None else None
+        # No entry strategy, no position management (matches running with active_entry_type None)
+        exit_cls = EXIT_STRATEGIES.get(exit_name)
+        if exit_cls is None:
+            logger.warning("[Strategy] Unknown exit strategy %s; using %s", exit_name, "standard")
+            exit_cls = EXIT_STRATEGIES["standard"]
+        self.exit = exit_cls(symbol, state) if self.entry is not None else None
+        strategies = [s for s in (self.entry, self.exit) if s is not None]
+        # The exit runs on the events the entry subscribed to (and that it handles itself)
+        entry_events = set(self.entry.events) if self.entry is not None else set()
+        handlers = {}
+        for event in EVENTS:
+            handlers[event] = tuple(
+                s.on_tick if event == "tick" else s.on_candle_close
+                for s in strategies if event in s.events and event in entry_events
+            )
+        self.tick = handlers["tick"]
+        self.close_10s = handlers["close_10s"]
+        self.close_1m = handlers["close_1m"]
+        self.close_5m = handlers["close_5m"]
+        self._banded = tuple(s for s in strategies if "tick" in s.events and "tick" in entry_events)
+        self.refresh_band()
+
+    def refresh_band(self):
+        """Recompute the quiet price band from the tick strategies; no tick handlers means every tick is quiet."""
+        low, high = -inf, inf
+        for strategy in self._banded:
+            s_low, s_high = strategy.trigger_band()
+            if s_low > low:
+                low = s_low
+            if s_high < high:
+                high = s_high
+        self.band = (low, high)
+        return self.band
+
+
+def get_dispatcher(symbol, state):
+    """The symbol's dispatcher, built on first use. set_entry_type() rebuilds it when the entry type changes."""
+    dispatcher = state.dispatcher
+    if dispatcher is None:
+        dispatcher = state.dispatcher = SymbolDispatcher(symbol, state, state.active_entry_type)
+    return dispatcher
+
+
+def set_entry_type(symbol, entry_type, state=None):
+    """Set a symbol's active entry type and rebuild its dispatcher. Returns the state.
+    The only writer of active_entry_type: dispatch never re-checks it per tick."""
+    if state is None:
+        from ...shared_state import ticker_states
+        state = ticker_states[symbol]
+    state.active_entry_type = entry_type
+    state.dispatcher = SymbolDispatcher(symbol, state, entry_type)
+    return state
+
+
+def refresh_trigger_band(symbol, state=None):
+    """Call after changing anything a strategy triggers on (levels, position). No-op before dispatch starts."""
+    if state is None:
+        from ...shared_state import ticker_states
+        state = ticker_states.get(symbol)
+    dispatcher = state.dispatcher if state else None
+    if dispatcher is not None:
+        dispatcher.refresh_band()
+
+
+def notify_candle_closed(symbol, timeframe, candle, state=None):
+    """Hand a closed candle to the symbol's exit while a position is open (candle-low trails, time stops)."""
+    if state is None:
+        from ...shared_state import ticker_states
+        state = ticker_states[symbol]
+    dispatcher = state.dispatcher
+    if dispatcher is None or dispatcher.exit is None or not state.position:
+        return
+    from ... import shared_state
+    if not shared_state.breakout_ready or shared_state.replay.active or not shared_state.is_active_symbol(symbol):
+        return
+    dispatcher.exit.on_candle(timeframe, candle)
+    dispatcher.refresh_band()
+
+
+def manage_position_tick(symbol, state, bid, ask):
+    """
+    Run only the symbol's exit on a quote (the sharded ingest process: entries run in the shard workers,
+    positions here). Returns False when there is no exit to run (no entry type set).
+    """
+    dispatcher = get_dispatcher(symbol, state)
+    if dispatcher.exit is None:
+        return False
+    low, high = dispatcher.band
+    if low < bid and ask < high:
+        return True
+    dispatcher.exit.on_tick(symbol, (bid + ask) / 2, bid, ask)
+    dispatcher.refresh_band()
+    return True
+
+
+def available_entry_types():
+    _load_builtin_strategies()
+    return sorted(ENTRY_STRATEGIES)
@@ -6,11 +6,16 @@ from datetime import datetime
 from ...state import active_trades
 from ...shared_state import ticker_states
 from ..core.execution import submit_bracket_order, submit_order, submit_stop_limit_order
+from ..core.strategy import refresh_trigger_band
 from ...utils.timezone_utils import get_eastern_time
+from ...utils.metrics import timed
+from ...utils import tracing
 
 logger = logging.getLogger(__name__)
 
+@timed("handle_breakout_trigger")
 def handle_breakout_trigger(symbol: str, entry_price: float, entry_type: str, bid: float, ask: float):
+    tracing.hop("handle_breakout_trigger")
     # Prevent multiple open positions
     for sym, state in ticker_states.items():
         if state.get("position") is not None and sym != symbol:
@@ -45,22 +50,26 @@ def handle_breakout_trigger(symbol: str, entry_price: float, entry_type: str, bi
     # Store entry order ID for tracking
     state["entry_order_id"] = getattr(entry_order, "id", None)
 
-    # Update state for tracking
-    state["position"] = {
-        "entry_type": entry_type,
-        "entry_price": entry_price,
-        "size": position_size,
-        "tp1": tp1,
-        "tp2": tp2,
-        "stop": stop,
-        "tp1_hit": False,
-        "tp2_hit": False,
-        "sl_hit": False,
-        "tp1_order_id": None,
-        "tp2_order_id": None,
-        "sl_order_id": None,
-        "half_closed": False
-    }
+    # Update state for tracking. A position pins the symbol, so it's set under pin_lock (see TickerStates)
+    with ticker_states.pin_lock:
+        state = ticker_states[symbol]
+        state["position"] = {
+            "entry_type": entry_type,
+            "entry_price": entry_price,
+            "size": position_size,
+            "tp1": tp1,
+            "tp2": tp2,
+            "stop": stop,
+            "tp1_hit": False,
+            "tp2_hit": False,
+            "sl_hit": False,
+            "tp1_order_id": None,
+            "tp2_order_id": None,
+            "sl_order_id": None,
+            "half_closed": False,
+            "trace_id": entry_order.get("trace_id") if isinstance(entry_order, dict) else None
+        }
+    refresh_trigger_band(symbol, state)
 
     # Optionally disable further breakout triggers for this entry type
     if entry_type in state:
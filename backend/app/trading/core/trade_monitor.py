@@ -5,22 +5,67 @@ from ...shared_state import ticker_states
 from ..core.execution import submit_order, submit_stop_limit_order
 from ...db import insert_trade, insert_execution
 from datetime import datetime, timedelta
-from ...utils.timezone_utils import get_eastern_time, to_eastern_iso
+from ...utils.timezone_utils import get_eastern_time
+from ..utils.time_tools import eastern_iso
 
 from ...utils.voice_utils import announce_trade_exit
 from ...utils.hotkey_utils import trigger_hotkey, trigger_hotkey_sequence
+from ...utils.metrics import timed
+from ...utils import tracing
 
 logger = logging.getLogger(__name__)
 
 
+def record_exit(symbol: str, trade: dict, shares: int, exit_price: float) -> str:
+    """Record the buy and sell executions and the round trip for `shares` of `trade` sold at exit_price. Returns the exit time."""
+    now = eastern_iso()
+    entry_time = trade.get("entry_time") or now
+    entry_price = trade.get("entry_price")
+    entry_type = trade.get("entry_type")
+    profit_loss = (exit_price - entry_price) * shares if entry_price and exit_price and shares else 0
+    insert_execution({
+        "symbol": symbol,
+        "quantity": shares,
+        "price": entry_price,
+        "side": "Buy",
+        "datetime": entry_time,
+        "trade_id": None,
+        "commission": None,
+        "entry_type": entry_type,
+        "trace_id": trade.get("trace_id")
+    })
+    insert_execution({
+        "symbol": symbol,
+        "quantity": shares,
+        "price": exit_price,
+        "side": "Sell",
+        "datetime": now,
+        "trade_id": None,
+        "commission": None,
+        "entry_type": entry_type,
+        "trace_id": tracing.current_trace_id()
+    })
+    insert_trade({
+        "symbol": symbol,
+        "shares": shares,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "entry_type": entry_type,
+        "entry_time": entry_time,
+        "exit_time": now,
+        "profit_loss": profit_loss
+    })
+    return now
 
+
+@timed("check_trade_targets")
 def check_trade_targets(symbol: str, price: float, bid: float, ask: float):
     #logger.info(f"Checking trade targets for {symbol} at {price}")
     state = ticker_states.get(symbol)
-    if not state or "position" not in state:
-        return
+    trade = state.position if state else None
+    if trade is None or trade.get("restored"):
+        return  # No position, or restored from a snapshot and not yet confirmed by the broker
 
-    trade = state["position"]
     if trade["sl_hit"] or trade["tp2_hit"]:
         return  # Trade already closed
 
@@ -41,43 +86,7 @@ def check_trade_targets(symbol: str, price: float, bid: float, ask: float):
         # Announce TP1 exit with robotic voice
         announce_trade_exit(symbol, ask, "take profit one")
         # Record trade for first half
-        now = to_eastern_iso()
-        entry_time = trade.get("entry_time") or now
-        entry_price = trade.get("entry_price")
-        exit_price = ask if ask is not None else bid
-        entry_type = trade.get("entry_type")
-        shares = half
-        profit_loss = (exit_price - entry_price) * shares if entry_price and exit_price and shares else 0
-        insert_execution({
-            "symbol": symbol,
-            "quantity": shares,
-            "price": entry_price,
-            "side": "Buy",
-            "datetime": entry_time,
-            "trade_id": None,
-            "commission": None,
-            "entry_type": entry_type
-        })
-        insert_execution({
-            "symbol": symbol,
-            "quantity": shares,
-            "price": exit_price,
-            "side": "Sell",
-            "datetime": now,
-            "trade_id": None,
-            "commission": None,
-            "entry_type": entry_type
-        })
-        insert_trade({
-            "symbol": symbol,
-            "shares": shares,
-            "entry_price": entry_price,
-            "exit_price": exit_price,
-            "entry_type": entry_type,
-            "entry_time": entry_time,
-            "exit_time": now,
-            "profit_loss": profit_loss
-        })
+        now = record_exit(symbol, trade, half, ask if ask is not None else bid)
         # For the remaining half, update entry_time to now (for next trade record)
         trade["entry_time"] = now
         # entry_price remains the same for the second half
@@ -94,43 +103,7 @@ def check_trade_targets(symbol: str, price: float, bid: float, ask: float):
         # Announce TP2 exit with robotic voice
         announce_trade_exit(symbol, ask, "take profit two")
         # Record trade in DB for remaining shares
-        now = to_eastern_iso()
-        entry_time = trade.get("entry_time") or now
-        entry_price = trade.get("entry_price")
-        exit_price = ask if ask is not None else bid
-        entry_type = trade.get("entry_type")
-        shares = remaining
-        profit_loss = (exit_price - entry_price) * shares if entry_price and exit_price and shares else 0
-        insert_execution({
-            "symbol": symbol,
-            "quantity": shares,
-            "price": entry_price,
-            "side": "Buy",
-            "datetime": entry_time,
-            "trade_id": None,
-            "commission": None,
-            "entry_type": entry_type
-        })
-        insert_execution({
-            "symbol": symbol,
-            "quantity": shares,
-            "price": exit_price,
-            "side": "Sell",
-            "datetime": now,
-            "trade_id": None,
-            "commission": None,
-            "entry_type": entry_type
-        })
-        insert_trade({
-            "symbol": symbol,
-            "shares": shares,
-            "entry_price": entry_price,
-            "exit_price": exit_price,
-            "entry_type": entry_type,
-            "entry_time": entry_time,
-            "exit_time": now,
-            "profit_loss": profit_loss
-        })
+        record_exit(symbol, trade, remaining, ask if ask is not None else bid)
         state.pop("position", None)  # ✅ Clean up
 
     # ✅ Stop Hit (after SL or breakeven)
@@ -153,41 +126,5 @@ def check_trade_targets(symbol: str, price: float, bid: float, ask: float):
         # Announce stop loss exit with robotic voice
         announce_trade_exit(symbol, price, "stop loss")
         # Record trade in DB for remaining shares
-        now = to_eastern_iso()
-        entry_time = trade.get("entry_time") or now
-        entry_price = trade.get("entry_price")
-        exit_price = ask if ask is not None else bid
-        entry_type = trade.get("entry_type")
-        shares = remaining
-        profit_loss = (exit_price - entry_price) * shares if entry_price and exit_price and shares else 0
-        insert_execution({
-            "symbol": symbol,
-            "quantity": shares,
-            "price": entry_price,
-            "side": "Buy",
-            "datetime": entry_time,
-            "trade_id": None,
-            "commission": None,
-            "entry_type": entry_type
-        })
-        insert_execution({
-            "symbol": symbol,
-            "quantity": shares,
-            "price": exit_price,
-            "side": "Sell",
-            "datetime": now,
-            "trade_id": None,
-            "commission": None,
-            "entry_type": entry_type
-        })
-        insert_trade({
-            "symbol": symbol,
-            "shares": shares,
-            "entry_price": entry_price,
-            "exit_price": exit_price,
-            "entry_type": entry_type,
-            "entry_time": entry_time,
-            "exit_time": now,
-            "profit_loss": profit_loss
-        })
+        record_exit(symbol, trade, remaining, ask if ask is not None else bid)
         state.pop("position", None)  # ✅ Clean up
\ No newline at end of file
@@ -0,0 +1,213 @@
+# app/trading/core/trade_tape.py
+
+"""
+Trade tape: Polygon T events kept as a bounded ring of recent prints per symbol, and bars built from them.
+
+Quote candles can only approximate volume with ask_size + bid_size; tape bars carry the traded volume, trade
+count and VWAP, with OHLC from the prints. Every symbol gets 10s/1m/5m time bars (state "tape_bars_<tf>",
+in-progress bar in "tape_current_<tf>"). MOMO_TAPE_BARS adds tick bars ("500t": every 500 prints) and volume
+bars ("20000v": closes on the print that takes it to 20,000 shares); each of those feeds its own
+PullbackTracker and indicator set and is selectable as an entry type of the same name (except with shard
+workers, see tape_entries_available).
+
+Prints carrying a condition in NON_PRICE_CONDITIONS (average price, odd lot, out of sequence, ...) count
+towards volume and trades but don't move the price: they're booked at the last regular print.
+"""
+
+import os
+import logging
+from collections import deque
+
+from ...shared_state import ticker_states
+from ..utils.time_tools import INTERVAL_MS
+from ...utils.metrics import timed, incr
+from ..sharding.workers import MOMO_SHARD_WORKERS
+
+logger = logging.getLogger(__name__)
+
+TAPE_SIZE = int(os.getenv("MOMO_TAPE_SIZE", "2000"))
+# Closed bars kept per bar type
+MAX_BARS = int(os.getenv("MOMO_TAPE_MAX_BARS", "1000"))
+TIME_FRAMES = ("10s", "1m", "5m")
+# Polygon trade condition ids that don't set last/high/low: average price (2), cash (7), derivatively
+# priced (10), sold out of sequence (13, 32), official open/close reports (15, 16), next day (20), price
+# variation (21), prior reference price (22), seller (29), sold + stopped (33), odd lot (37), contingent (52, 53)
+NON_PRICE_CONDITIONS = frozenset({2, 7, 10, 13, 15, 16, 20, 21, 22, 29, 32, 33, 37, 52, 53})
+
+_BAR_KINDS = {"t": "ticks", "v": "volume"}
+
+
+def parse_bar_type(bar):
+    """'500t' → ("ticks", 500), '20000v' → ("volume", 20000). ValueError otherwise."""
+    kind = _BAR_KINDS.get(bar[-1:])
+    if kind is None or not bar[:-1].isdigit() or int(bar[:-1]) <= 0:
+        raise ValueError(f"Tape bar type must look like 500t (ticks) or 20000v (shares), got {bar!r}")
+    return kind, int(bar[:-1])
+
+
+TAPE_BARS = tuple(bar.strip().lower() for bar in os.getenv("MOMO_TAPE_BARS", "").split(",") if bar.strip())
+for _bar in TAPE_BARS:
+    parse_bar_type(_bar)
+
+
+def tape_entries_available():
+    """
+    Whether tape bar types can be used as entry types. Not with shard workers: trade prints stay in the
+    ingest process, so the workers that run the entry checks never build tape bars.
+    """
+    return MOMO_SHARD_WORKERS == 0
+
+
+class _Bars:
+    """Closed bars of one type in state[bars_key], the open one in state[current_key]."""
+
+    __slots__ = ("name", "state", "bars_key", "current_key", "current", "pv")
+
+    def __init__(self, name, state):
+        self.name = name
+        self.state = state
+        self.bars_key = f"tape_bars_{name}"
+        self.current_key = f"tape_current_{name}"
+        self.current = state.get(self.current_key)
+        self.pv = 0.0
+        state.setdefault(self.bars_key, [])
+
+    def _open(self, ts, price):
+        bar = self.current = self.state[self.current_key] = {
+            "timestamp": ts, "open": price, "high": price, "low": price, "close": price,
+            "volume": 0, "trades": 0, "vwap": price,
+        }
+        self.pv = 0.0
+        return bar
+
+    def _close(self):
+        bar = self.current
+        if bar["volume"]:
+            bar["vwap"] = round(self.pv / bar["volume"], 4)
+        bars = self.state[self.bars_key]
+        bars.append(bar)
+        if len(bars) > MAX_BARS + MAX_BARS // 4:
+            del bars[:len(bars) - MAX_BARS]
+        self.current = self.state[self.current_key] = None
+        return bar
+
+    def _update(self, bar, price, size):
+        if price > bar["high"]:
+            bar["high"] = price
+        elif price < bar["low"]:
+            bar["low"] = price
+        bar["close"] = price
+        bar["volume"] += size
+        bar["trades"] += 1
+        self.pv += price * size
+
+
+class TimeBars(_Bars):
+    """10s/1m/5m bars, bucket-start ms timestamps. A print in a later bucket closes the open bar."""
+
+    __slots__ = ("ms",)
+
+    def __init__(self, name, state):
+        super().__init__(name, state)
+        self.ms = INTERVAL_MS[name]
+
+    def add(self, ts, price, size):
+        """Book a print; returns the bar it closed, if any."""
+        bar = self.current
+        start = ts - ts % self.ms
+        closed = None
+        if bar is None or start > bar["timestamp"]:
+            if bar is not None:
+                closed = self._close()
+            bar = self._open(start, price)
+        self._update(bar, price, size)
+        return closed
+
+
+class CountBars(_Bars):
+    """Tick or volume bars: timestamped by their first print, with "end" the last print's time."""
+
+    __slots__ = ("kind", "threshold")
+
+    def __init__(self, name, state):
+        super().__init__(name, state)
+        self.kind, self.threshold = parse_bar_type(name)
+
+    def add(self, ts, price, size):
+        bar = self.current
+        if bar is None:
+            bar = self._open(ts, price)
+        self._update(bar, price, size)
+        if (bar["trades"] if self.kind == "ticks" else bar["volume"]) >= self.threshold:
+            bar["end"] = ts
+            return self._close()
+        return None
+
+
+class TradeTape:
+    """Recent prints and trade bars for one symbol."""
+
+    def __init__(self, symbol, state, bar_types=TAPE_BARS, size=TAPE_SIZE):
+        self.symbol = symbol
+        self.state = state
+        self.prints = deque(maxlen=size)  # (ts_ms, price, size, conditions)
+        self.last_price = None
+        self.volume = 0
+        self.trades = 0
+        self.builders = tuple([TimeBars(tf, state) for tf in TIME_FRAMES] + [CountBars(bar, state) for bar in bar_types])
+
+    def add(self, ts, price, size, conditions=None):
+        """Book one print into the ring and every bar type. Returns the bars it closed (usually ())."""
+        self.prints.append((ts, price, size, conditions))
+        self.volume += size
+        self.trades += 1
+        if conditions and not NON_PRICE_CONDITIONS.isdisjoint(conditions):
+            if self.last_price is not None:
+                price = self.last_price
+        else:
+            self.last_price = price
+        closed = ()
+        for builder in self.builders:
+            bar = builder.add(ts, price, size)
+            if bar is not None:
+                closed += ((builder.name, bar),)
+        return closed
+
+    def recent(self, limit=100):
+        """The last `limit` prints as dicts, oldest first."""
+        prints = self.prints
+        start = max(0, len(prints) - limit)
+        return [{"t": ts, "p": price, "s": size, "c": conditions}
+                for ts, price, size, conditions in (prints[i] for i in range(start, len(prints)))]
+
+
+def get_tape(symbol, state=None):
+    """The symbol's TradeTape, created on its first print."""
+    if state is None:
+        state = ticker_states[symbol]
+    tape = state.get("tape")
+    if tape is None:
+        tape = state["tape"] = TradeTape(symbol, state)
+    return tape
+
+
+def _on_bar_closed(symbol, state, name, bar):
+    incr("tape_bar_closed", label=name)
+    if name not in TAPE_BARS:
+        return
+    # Tick/volume bars drive their own tracker and indicators like the quote candles do
+    from ..indicators.engine import on_candle_close
+    from ..pullbacks.tracker import feed_closed_candle
+    on_candle_close(symbol, name, bar)
+    feed_closed_candle(symbol, name, bar)
+
+
+@timed("trade_tape")
+def handle_trade(symbol, event):
+    """Polygon T event (p price, s size, t ms, c conditions) → the symbol's tape."""
+    tape = ticker_states[symbol].tape
+    if tape is None:
+        tape = get_tape(symbol)
+    closed = tape.add(event["t"], event["p"], event.get("s", 0), event.get("c"))
+    for name, bar in closed:
+        _on_bar_closed(symbol, tape.state, name, bar)
@@ -4,26 +4,37 @@ from ...shared_state import ticker_states
 from ..core.trade_manager import on_entry_filled
 from ...db import insert_trade, insert_execution
 from datetime import datetime
+from ...events import publish
 
 def handle_trade_update(data):
     """
     Handles updates from Alpaca's trade_updates stream.
-    This can be extended to handle fills, cancellations, partial fills, etc.
+    Fills are published on the event bus (on_fill records them); other events are only logged.
     """
     symbol = getattr(data, 'symbol', None)
     event = getattr(data, 'event', None)
-    price = getattr(data, 'price', None)
-    filled_qty = getattr(data, 'filled_qty', None)  # Should be int
-    side = getattr(data, 'side', None)  # 'buy' or 'sell'
-    event_time = getattr(data, 'timestamp', None) or datetime.utcnow().isoformat()
-
     if not symbol:
         return
 
     print(f"[{symbol}] 🔄 Trade update event: {event}")
+    if event == "fill":
+        publish("fill", symbol, {
+            "price": getattr(data, 'price', None),
+            "filled_qty": getattr(data, 'filled_qty', None),  # Should be int
+            "side": getattr(data, 'side', None),  # 'buy' or 'sell'
+            "timestamp": getattr(data, 'timestamp', None) or datetime.utcnow().isoformat(),
+        })
+
+
+def on_fill(symbol, fill):
+    """fill subscriber: record the execution (and the round trip on sells) and update the position."""
+    price = fill["price"]
+    filled_qty = fill["filled_qty"]
+    side = fill["side"]
+    event_time = fill["timestamp"]
 
-    # Only record executions/trades on fill events
-    if event == "fill" and filled_qty and price is not None:
+    # Only record executions/trades for fills with a quantity and price
+    if filled_qty and price is not None:
         # Record execution
         insert_execution({
             "symbol": symbol,
@@ -71,7 +82,7 @@ def handle_trade_update(data):
                 if pos["size"] == 0:
                     print(f"[{symbol}] Position fully closed, removing from state.")
                     state["position"] = None
-    elif event == "fill" and side == "buy":
+    elif side == "buy":
         print(f"[{symbol}] ✅ Entry order filled at {price}")
         # Call on_entry_filled to submit exit orders after entry fill
         state = ticker_states.get(symbol)
@@ -85,7 +96,7 @@ def handle_trade_update(data):
             bid = price  # Use fill price as bid/ask for now
             ask = price
             on_entry_filled(symbol, entry_price, qty, bid, ask, tp1, tp2, stop)
-    elif event == "fill":
+    else:
         print(f"[{symbol}] ✅ Order filled at {price}")
         # Extend with additional logic if needed
 
@@ -1,57 +1,186 @@
 import logging
+from math import inf
 from typing import Optional
 
+from ..core.strategy import EntryStrategy, register_entry, refresh_trigger_band
+from .levels import LevelBook
+from ..indicators.engine import passes_entry_filters
+from ...shared_state import ticker_states
+from ...utils import tracing
+from ...events import publish
+
 logger = logging.getLogger(__name__)
 
+PRIMARY = "custom"  # id of the level set through set_custom_level / update_level
+
+
 class CustomLevelEntry:
+    """
+    The symbol's price levels (LevelBook). The single level the UI sets is the PRIMARY entry level and keeps
+    the old custom_level / entry_triggered interface; add_level() adds any number of others.
+    """
+
     def __init__(self, symbol: str, custom_level: float = None):
         self.symbol = symbol
-        self.custom_level = custom_level
-        self.entry_triggered = False
+        self.levels = LevelBook(symbol)
+        self._custom_level = custom_level
+        self._triggered = False
         if custom_level is not None:
+            self.levels.add(custom_level, level_id=PRIMARY)
             logger.info(f"[CUSTOM-LEVEL] Created custom level entry for {symbol} at ${custom_level:.2f}")
         else:
             logger.info(f"[CUSTOM-LEVEL] Created custom level entry for {symbol} with no level set")
-    
+
+    @property
+    def custom_level(self) -> Optional[float]:
+        return self._custom_level
+
+    @property
+    def entry_triggered(self) -> bool:
+        return self._triggered
+
+    @entry_triggered.setter
+    def entry_triggered(self, triggered: bool):
+        self._triggered = triggered
+        if triggered:
+            self.levels.remove(PRIMARY)
+        elif self._custom_level is not None and self.levels.get(PRIMARY) is None:
+            self.levels.add(self._custom_level, level_id=PRIMARY)
+
+    def check_tick(self, price: float, emit: bool = True) -> list:
+        """Levels reached at this price (fired levels leave the book); alerts are sent here."""
+        fired = self.levels.check(price)
+        if fired:
+            for level in fired:
+                if level.id == PRIMARY:
+                    self._triggered = True
+                if level.action == "alert":
+                    self.emit_level_alert(level, price)
+            if emit:
+                self.emit_levels_diff()
+        return fired
+
     def check_tick_for_entry(self, symbol: str, price: float, bid: float, ask: float) -> bool:
         """
-        Check if the current tick should trigger an entry at the custom level.
+        Check if the current tick should trigger an entry at one of the levels.
         Returns True if entry should be triggered.
         """
-        if self.entry_triggered or self.custom_level is None:
+        fired = self.check_tick(price, emit=False)
+        if not fired:
             return False
-        
-        # Check if price crosses above the custom level
-        if price >= self.custom_level:
-            logger.info(f"[CUSTOM-LEVEL] {symbol} price {price:.2f} >= custom level {self.custom_level:.2f} - triggering entry")
-            self.entry_triggered = True
-            return True
-        
-        return False
-    
+        entries = [level for level in fired if level.action == "entry"]
+        # Same MOMO_ENTRY_FILTERS gates as the pullback entries, on the 1m indicators. Like them, a rejected
+        # level stays armed so a later tick can still enter
+        if entries and not passes_entry_filters(symbol, "1m", price):
+            self.levels.restore(entries)
+            if any(level.id == PRIMARY for level in entries):
+                self._triggered = False
+            entries = []
+        self.emit_levels_diff()
+        for level in entries:
+            logger.info("[CUSTOM-LEVEL] %s price %.2f reached %s level %.2f (%s) - triggering entry",
+                        symbol, price, level.kind, level.price, level.direction)
+        return bool(entries)
+
     def reset(self):
         """Reset the entry trigger state"""
         self.entry_triggered = False
+        self.emit_levels_diff()
+        refresh_trigger_band(self.symbol)
         logger.info(f"[CUSTOM-LEVEL] Reset entry trigger for {self.symbol}")
-    
+
     def update_level(self, new_level: float):
         """Update the custom level and reset trigger state"""
-        self.custom_level = new_level
-        self.entry_triggered = False
+        self._custom_level = new_level
+        self._triggered = False
+        if new_level is not None:
+            self.levels.add(new_level, level_id=PRIMARY)
+        else:
+            self.levels.remove(PRIMARY)
+        refresh_trigger_band(self.symbol)
         if new_level is not None:
             logger.info(f"[CUSTOM-LEVEL] Updated custom level for {self.symbol} to ${new_level:.2f}")
         else:
             logger.info(f"[CUSTOM-LEVEL] Cleared custom level for {self.symbol}")
-        
+
         # Emit updated breakout levels to frontend
         self.emit_breakout_levels()
-    
+        self.emit_levels_diff()
+
+    def _current_price(self) -> Optional[float]:
+        """Mid of the symbol's last quote, if it has one."""
+        state = ticker_states.get(self.symbol)
+        quote = state.last_quote if state else None
+        if quote is None or quote.bid_price is None or quote.ask_price is None:
+            return None
+        return (quote.bid_price + quote.ask_price) / 2
+
+    def add_level(self, price: float, direction: str = "up", kind: str = "custom", action: str = "entry", cross: bool = False):
+        level = self.levels.add(price, direction, kind, action, cross,
+                                last_price=self._current_price() if cross else None)
+        refresh_trigger_band(self.symbol)
+        self.emit_levels_diff()
+        logger.info(f"[CUSTOM-LEVEL] Added {kind} level {level.id} for {self.symbol} at ${level.price:.2f} ({direction}, action={action})")
+        return level
+
+    def add_round_levels(self, price: float, above: int = 2, below: int = 0, step: float = 0.5, action: str = "alert"):
+        added = self.levels.add_round_levels(price, above, below, step, action)
+        refresh_trigger_band(self.symbol)
+        self.emit_levels_diff()
+        return added
+
+    def remove_level(self, level_id: str) -> bool:
+        if level_id == PRIMARY:
+            self.update_level(None)
+            return True
+        removed = self.levels.remove(level_id)
+        refresh_trigger_band(self.symbol)
+        self.emit_levels_diff()
+        return removed
+
+    def clear_levels(self, kind: str = None):
+        """Remove every added level (or those of one kind); the primary level is left alone."""
+        for level in list(self.levels.by_id.values()):
+            if level.id != PRIMARY and (kind is None or level.kind == kind):
+                self.levels.remove(level.id)
+        refresh_trigger_band(self.symbol)
+        self.emit_levels_diff()
+
+    def export_levels(self) -> list:
+        """The added levels (not the primary one) for snapshots and shard sync."""
+        return [level for level in self.levels.export() if level["id"] != PRIMARY]
+
+    def load_levels(self, items: list):
+        """Replace the added levels with exported ones; the primary level is left alone."""
+        for level in list(self.levels.by_id.values()):
+            if level.id != PRIMARY:
+                self.levels.remove(level.id)
+        self.levels.load(items)
+        refresh_trigger_band(self.symbol)
+        self.emit_levels_diff()
+
+    def _emit(self, event, payload):
+        publish("level_change", self.symbol, event, payload)
+
+    def emit_levels_diff(self):
+        """Send what changed since the last diff as one levels_diff message."""
+        diff = self.levels.changes()
+        if diff is not None:
+            self._emit('levels_diff', diff)
+
+    def emit_levels_snapshot(self):
+        self._emit('levels_snapshot', self.levels.snapshot())
+
+    def emit_level_alert(self, level, price):
+        logger.info("[CUSTOM-LEVEL] 🔔 %s reached %s level %.2f at %.2f", self.symbol, level.kind, level.price, price)
+        self._emit('level_alert', {'symbol': self.symbol, 'price': price, 'level': level.to_dict()})
+
     def emit_breakout_levels(self):
         """Emit current breakout levels including custom level"""
         from ...shared_state import ticker_states
         state = ticker_states.get(self.symbol)
         if state is None:
-            logger.warning(f"No state found for {self.symbol}")
+            logger.warning("No state found for %s", self.symbol)
             return
             
         # Get all trackers for this symbol
@@ -73,23 +202,49 @@ class CustomLevelEntry:
         # Add custom level
         if self.custom_level is not None and not self.entry_triggered:
             levels.append(self.custom_level)
-            logger.info(f"📊 {self.symbol} custom breakout level: {self.custom_level}")
+            logger.debug("📊 %s custom breakout level: %s", self.symbol, self.custom_level)
         else:
             levels.append(None)
-            logger.info(f"📊 {self.symbol} custom breakout level: None")
+            logger.debug("📊 %s custom breakout level: None", self.symbol)
         
-        # Emit to frontend
+        logger.info("📡 Emitting breakout levels for %s: %s", self.symbol, levels)
+        self._emit('breakout_levels', {
+            'symbol': self.symbol,
+            'levels': levels
+        })
+
+@register_entry
+class CustomLevelStrategy(EntryStrategy):
+    """Enter when price reaches one of the symbol's entry levels (CustomLevelEntry in state['custom_level_entry'])."""
+
+    name = "custom"
+    events = ("tick",)
+
+    def __init__(self, symbol, state):
+        super().__init__(symbol, state)
+        if "custom_level_entry" not in state:
+            # Default to None to avoid unwanted entries
+            state["custom_level_entry"] = CustomLevelEntry(symbol, None)
+            logger.info(f"[{symbol}] Created custom level entry with no default level")
+            # Emit initial breakout levels
+            state["custom_level_entry"].emit_breakout_levels()
+
+    def on_tick(self, symbol, price, bid, ask):
+        # Looked up per tick: setting a new level from the UI may replace the entry object
+        if not self.state.custom_level_entry.check_tick_for_entry(symbol, price, bid, ask):
+            return False
+        tracing.hop("check_tick_for_entry_custom")
+        logger.info("[%s] Custom level breakout triggered at $%.2f", symbol, price)
         try:
-            import sys
-            app_module = sys.modules.get('backend.app')
-            if app_module and hasattr(app_module, 'socketio'):
-                socketio = app_module.socketio
-                logger.info(f"📡 Emitting breakout levels for {self.symbol}: {levels}")
-                socketio.emit('breakout_levels', {
-                    'symbol': self.symbol,
-                    'levels': levels
-                })
-            else:
-                logger.warning(f"socketio not available, cannot emit breakout levels for {self.symbol}")
+            from ..core.trade_manager import handle_breakout_trigger
+            handle_breakout_trigger(symbol, price, "custom", bid, ask)
         except Exception as e:
-            logger.warning(f"Failed to emit breakout levels: {e}") 
\ No newline at end of file
+            logger.exception(f"[{symbol}] Failed to handle custom level breakout", exc_info=e)
+        return True
+
+    def trigger_band(self):
+        # Up levels fire on mid >= level (ask < level rules that out), down levels on mid <= level
+        entry = self.state.custom_level_entry
+        if entry is None:
+            return -inf, inf
+        return entry.levels.band()
@@ -0,0 +1,215 @@
+# app/trading/entries/levels.py
+
+"""
+Price levels for a symbol, kept in two sorted books so a tick finds every level it reached with a bisect.
+
+An "up" level fires when price >= level and a "down" level when price <= level; levels fire once and leave
+the book. A level added with cross=True that price is already past waits in the other book until price
+comes back through it (a reclaim or a breakdown), then arms.
+
+Changes are collected so the chart gets one levels_diff message per batch instead of the full list.
+"""
+
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from math import floor, inf
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("up", "down")
+ACTIONS = (None, "entry", "alert")
+
+
+class Level:
+    __slots__ = ("id", "price", "direction", "kind", "action", "armed")
+
+    def __init__(self, id, price, direction="up", kind="custom", action="entry", armed=True):
+        self.id = id
+        self.price = price
+        self.direction = direction
+        self.kind = kind
+        self.action = action
+        self.armed = armed
+
+    def to_dict(self):
+        return {"id": self.id, "price": self.price, "direction": self.direction, "kind": self.kind,
+                "action": self.action, "armed": self.armed}
+
+    def __lt__(self, other):
+        return self.price < other.price
+
+
+class LevelBook:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        # Levels waiting for price to rise to them / fall to them, sorted by price, with their prices alongside
+        self.up = []
+        self.up_prices = []
+        self.down = []
+        self.down_prices = []
+        self.by_id = {}
+        self.last_price = None
+        self.version = 0
+        self._next_id = 1
+        self._added = {}
+        self._removed = set()
+        # Ticks check from the stream thread while the UI adds and removes levels
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, level_id):
+        return self.by_id.get(level_id)
+
+    def _insert(self, level, book):
+        prices, levels = (self.up_prices, self.up) if book == "up" else (self.down_prices, self.down)
+        i = bisect_right(prices, level.price)
+        prices.insert(i, level.price)
+        levels.insert(i, level)
+
+    def _detach(self, level):
+        for prices, levels in ((self.up_prices, self.up), (self.down_prices, self.down)):
+            i = bisect_left(prices, level.price)
+            while i < len(levels) and prices[i] == level.price:
+                if levels[i] is level:
+                    del prices[i], levels[i]
+                    return
+                i += 1
+
+    def add(self, price, direction="up", kind="custom", action="entry", cross=False, level_id=None, last_price=None):
+        """
+        Add a level (replacing any with the same id) and return it. last_price is the current price for
+        cross; ticks skipped by the trigger band never reach check(), so the book's own can be stale.
+        """
+        with self._lock:
+            if last_price is not None:
+                self.last_price = last_price
+            if direction not in DIRECTIONS:
+                raise ValueError(f"Level direction must be one of {DIRECTIONS}, got {direction!r}")
+            if action not in ACTIONS:
+                raise ValueError(f"Level action must be one of {ACTIONS}, got {action!r}")
+            if level_id is None:
+                level_id = f"L{self._next_id}"
+                self._next_id += 1
+            elif level_id in self.by_id:
+                self.remove(level_id)
+            price = float(price)
+            level = Level(level_id, price, direction, kind, action)
+            last = self.last_price
+            if cross and last is not None and (last >= price if direction == "up" else last <= price):
+                # Already past it: wait in the opposite book for price to come back through first
+                level.armed = False
+                self._insert(level, "down" if direction == "up" else "up")
+            else:
+                self._insert(level, direction)
+            self.by_id[level_id] = level
+            self._added[level_id] = level.to_dict()
+            self._removed.discard(level_id)
+            return level
+
+    def remove(self, level_id):
+        with self._lock:
+            level = self.by_id.pop(level_id, None)
+            if level is None:
+                return False
+            self._detach(level)
+            self._added.pop(level_id, None)
+            self._removed.add(level_id)
+            return True
+
+    def clear(self, kind=None):
+        for level_id in [lid for lid, level in self.by_id.items() if kind is None or level.kind == kind]:
+            self.remove(level_id)
+
+    def add_round_levels(self, price, above=2, below=0, step=0.5, action="alert"):
+        """Auto levels at the next `above` / previous `below` multiples of step (half and whole dollars)."""
+        added = []
+        base = floor(price / step)
+        for n in range(1, above + 1):
+            level = round((base + n) * step, 2)
+            added.append(self.add(level, "up", "whole" if level == int(level) else "half", action,
+                                  level_id=f"R{level:g}"))
+        for n in range(below):
+            level = round((base - n) * step, 2)
+            if level > 0 and level < price:
+                added.append(self.add(level, "down", "whole" if level == int(level) else "half", action,
+                                      level_id=f"R{level:g}"))
+        return added
+
+    def check(self, price):
+        """Levels reached at this price, removed from the book (and unarmed ones that armed). Usually []."""
+        with self._lock:
+            self.last_price = price
+            fired = []
+            i = bisect_right(self.up_prices, price)
+            if i:
+                reached = self.up[:i]
+                del self.up[:i], self.up_prices[:i]
+                fired.extend(reached)
+            j = bisect_left(self.down_prices, price)
+            if j < len(self.down):
+                reached = self.down[j:]
+                del self.down[j:], self.down_prices[j:]
+                fired.extend(reached)
+            if not fired:
+                return fired
+            result = []
+            for level in fired:
+                if not level.armed:
+                    # Came back through: now wait for the move it was set for
+                    level.armed = True
+                    self._insert(level, level.direction)
+                    self._added[level.id] = level.to_dict()
+                    continue
+                del self.by_id[level.id]
+                self._added.pop(level.id, None)
+                self._removed.add(level.id)
+                result.append(level)
+            return result
+
+    def restore(self, levels):
+        """Put levels check() just fired back in the book, as if they hadn't been reached."""
+        with self._lock:
+            for level in levels:
+                if level.id in self.by_id:
+                    continue  # replaced in the meantime
+                self._insert(level, level.direction)
+                self.by_id[level.id] = level
+                self._removed.discard(level.id)
+
+    def band(self):
+        """(low, high) with no level between: check() finds nothing while low < bid and ask < high."""
+        return (self.down_prices[-1] if self.down_prices else -inf), (self.up_prices[0] if self.up_prices else inf)
+
+    def changes(self):
+        """The levels_diff payload for everything changed since the last call, or None."""
+        with self._lock:
+            if not self._added and not self._removed:
+                return None
+            self.version += 1
+            diff = {"symbol": self.symbol, "version": self.version,
+                    "added": list(self._added.values()), "removed": sorted(self._removed)}
+            self._added = {}
+            self._removed = set()
+            return diff
+
+    def snapshot(self):
+        return {"symbol": self.symbol, "version": self.version,
+                "levels": [level.to_dict() for level in sorted(self.by_id.values())]}
+
+    def export(self):
+        """Active levels as dicts (snapshots, shard sync); load() takes them back."""
+        return [level.to_dict() for level in self.by_id.values()]
+
+    def load(self, items):
+        """Add exported levels back (replacing levels with the same ids)."""
+        for item in items:
+            if item["id"].startswith("L") and item["id"][1:].isdigit():
+                self._next_id = max(self._next_id, int(item["id"][1:]) + 1)
+            level = self.add(item["price"], item["direction"], item["kind"], item["action"], level_id=item["id"])
+            if not item.get("armed", True):
+                self._detach(level)
+                level.armed = False
+                self._insert(level, "down" if level.direction == "up" else "up")
@@ -0,0 +1,42 @@
+# app/trading/entries/pullback_10sec.py
+
+from math import inf
+
+from ..core.strategy import EntryStrategy, register_entry
+
+
+class PullbackEntry(EntryStrategy):
+    """
+    Enter when price breaks the pullback level tracked by the symbol's PullbackTracker for `interval`.
+    The tracker itself is fed closed candles by the candle builders whatever the entry type.
+    """
+
+    interval = None
+
+    def __init__(self, symbol, state):
+        super().__init__(symbol, state)
+        key = f"pullback_tracker_{self.interval}"
+        if key not in state:
+            from ..pullbacks.tracker import PullbackTracker
+            state[key] = PullbackTracker(symbol, interval=self.interval)
+        self.tracker = state[key]
+
+    def on_tick(self, symbol, price, bid, ask):
+        return self.tracker.check_breakout(symbol, price, bid, ask)
+
+    def on_candle_close(self, symbol, price, bid, ask):
+        return self.tracker.check_breakout(symbol, price, bid, ask)
+
+    def trigger_band(self):
+        # check_breakout fires on mid > level; ask < level rules that out
+        tracker = self.tracker
+        if tracker.last_breakout_level is None or tracker.breakout_triggered or not tracker.pullback_active:
+            return -inf, inf
+        return -inf, tracker.last_breakout_level
+
+
+@register_entry
+class Pullback10sEntry(PullbackEntry):
+    name = "10s"
+    interval = "10s"
+    events = ("tick", "close_10s")
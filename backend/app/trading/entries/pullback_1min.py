@@ -0,0 +1,18 @@
+# app/trading/entries/pullback_1min.py
+
+from ..core.strategy import register_entry
+from .pullback_10sec import PullbackEntry
+
+
+@register_entry
+class Pullback1mEntry(PullbackEntry):
+    name = "1m"
+    interval = "1m"
+    events = ("tick",)
+
+
+@register_entry
+class Pullback5mEntry(PullbackEntry):
+    name = "5m"
+    interval = "5m"
+    events = ("tick", "close_5m")
@@ -0,0 +1,11 @@
+# app/trading/entries/tape_bars.py
+
+from ..core.strategy import register_entry
+from ..core.trade_tape import TAPE_BARS
+from .pullback_10sec import PullbackEntry
+
+# One pullback entry per MOMO_TAPE_BARS bar type ("500t", "20000v"), named like the bar type.
+# Their trackers are fed by the trade tape; breakouts are checked on every quote.
+for _bar in TAPE_BARS:
+    register_entry(type(f"Pullback{_bar.upper()}Entry", (PullbackEntry,),
+                        {"name": _bar, "interval": _bar, "events": ("tick",)}))
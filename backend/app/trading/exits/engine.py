@@ -0,0 +1,189 @@
+# app/trading/exits/engine.py
+
+"""
+Exit rules compiled into a small per-position state machine, updated in O(1) per tick and per closed candle.
+
+Nothing here touches the broker, the DB or app state: the machine returns ExitAction tuples and the caller
+acts on them (managed_exit.py live, or a backtester feeding recorded quotes and candles).
+
+Plan keys (MOMO_EXIT_PLAN as JSON; missing keys keep DEFAULT_PLAN, which behaves like check_trade_targets):
+  stop             initial stop in $ below entry, used when the position has no stop of its own
+  targets          [[offset $ above entry, fraction of the original size], ...]; the last target sells the rest.
+                   None uses the position's tp1/tp2 with half the size at each
+  breakeven_after  move the stop to the entry price once this many targets have filled (0 = never)
+  trail            {"mode": "cents" | "pct" | "candle_low", "value": x, "timeframe": "1m", "after": n}
+                   cents/pct trail the highest bid by x $ / x %; candle_low raises the stop to each closed
+                   `timeframe` candle's low minus x. Active once n targets have filled
+  time_stop_sec    sell what's left this long after the position was opened
+"""
+
+import os
+import json
+from collections import namedtuple
+from math import inf
+
+from ..utils.time_tools import interval_ms, MS_PER_SEC
+
+DEFAULT_PLAN = {
+    "stop": 0.10,
+    "targets": None,
+    "breakeven_after": 1,
+    "trail": None,
+    "time_stop_sec": None,
+}
+TRAIL_MODES = ("cents", "pct", "candle_low")
+
+# reason: "target", "stop_moved" (qty 0) or what closed the position: "stop", "breakeven", "trail", "time".
+# tranche is the 1-based target number for "target" actions.
+ExitAction = namedtuple("ExitAction", "reason qty price closes tranche")
+
+
+def load_plan(spec=None):
+    """DEFAULT_PLAN updated with spec (dict or JSON string; defaults to MOMO_EXIT_PLAN). ValueError if invalid."""
+    if spec is None:
+        spec = os.getenv("MOMO_EXIT_PLAN") or {}
+    if isinstance(spec, str):
+        spec = json.loads(spec)
+    plan = dict(DEFAULT_PLAN)
+    plan.update(spec)
+    if plan["targets"] is not None:
+        if not plan["targets"]:
+            raise ValueError("Exit plan targets must not be empty (use null for the position's tp1/tp2)")
+        plan["targets"] = [(float(offset), float(fraction)) for offset, fraction in plan["targets"]]
+    if plan["trail"]:
+        trail = {"value": 0.0, "timeframe": "1m", "after": 0}
+        trail.update(plan["trail"])
+        if trail.get("mode") not in TRAIL_MODES:
+            raise ValueError(f"Unknown trailing stop mode {trail.get('mode')!r}; expected one of {TRAIL_MODES}")
+        interval_ms(trail["timeframe"])
+        plan["trail"] = trail
+    return plan
+
+
+class ExitMachine:
+    """
+    Exit state for one long position. on_tick checks, in order: the next target (ask >= target), the stop
+    (price <= stop), the time stop, then ratchets a cents/pct trailing stop. At most one target fills per
+    call, like check_trade_targets. The stop only ever moves up.
+    """
+
+    __slots__ = ("entry_price", "size", "stop", "stop_reason", "targets", "next_target", "breakeven_after",
+                 "trail_mode", "trail_value", "trail_timeframe", "trail_after", "high_water", "deadline_ms",
+                 "closed")
+
+    def __init__(self, entry_price, size, stop, targets=(), breakeven_after=1, trail=None, deadline_ms=None,
+                 next_target=0):
+        self.entry_price = entry_price
+        self.size = size
+        self.stop = -inf if stop is None else stop
+        self.stop_reason = "stop"
+        self.targets = tuple(targets)  # (price, qty); the last target's qty is whatever is left
+        self.next_target = next_target
+        self.breakeven_after = breakeven_after
+        trail = trail or {}
+        self.trail_mode = trail.get("mode")
+        self.trail_value = trail.get("value", 0.0)
+        self.trail_timeframe = trail.get("timeframe")
+        self.trail_after = trail.get("after", 0)
+        self.high_water = -inf
+        self.deadline_ms = deadline_ms
+        self.closed = size <= 0
+
+    @classmethod
+    def from_position(cls, position, plan=None, now_ms=None):
+        """
+        Compile a position dict (entry_price, size, stop, tp1/tp2, tp1_hit...) with a plan. Positions that
+        already filled targets (targets_hit, or tp1_hit) resume with the rest split over the remaining targets,
+        and a stop moved by an earlier machine keeps its reason and trailing high (stop_reason, high_water).
+        """
+        plan = load_plan() if plan is None else plan
+        entry = float(position["entry_price"])
+        size = int(position["size"])
+        if plan["targets"] is None:
+            levels = [(position.get(key), 0.5) for key in ("tp1", "tp2") if position.get(key) is not None]
+        else:
+            levels = [(round(entry + offset, 2), fraction) for offset, fraction in plan["targets"]]
+        done = position.get("targets_hit")
+        if done is None:
+            done = int(bool(position.get("tp1_hit")))
+        rest = sum(fraction for _, fraction in levels[done:]) or 1.0
+        targets = [(price, int(size * fraction / rest) if i >= done else 0) for i, (price, fraction) in enumerate(levels)]
+        stop = position.get("stop")
+        if stop is None and plan["stop"] is not None:
+            stop = round(entry - plan["stop"], 2)
+        deadline = position.get("exit_deadline_ms")
+        if deadline is None and plan["time_stop_sec"] and now_ms is not None:
+            deadline = now_ms + int(plan["time_stop_sec"] * MS_PER_SEC)
+        machine = cls(entry, size, stop, targets, plan["breakeven_after"], plan["trail"], deadline, done)
+        machine.stop_reason = position.get("stop_reason") or "stop"
+        if position.get("high_water") is not None:
+            machine.high_water = position["high_water"]
+        return machine
+
+    @property
+    def trail_active(self):
+        return self.trail_mode is not None and self.next_target >= self.trail_after
+
+    def _raise_stop(self, price, reason):
+        if price > self.stop:
+            self.stop = price
+            self.stop_reason = reason
+            return True
+        return False
+
+    def _close(self, reason, price):
+        qty, self.size, self.closed = self.size, 0, True
+        return (ExitAction(reason, qty, price, True, None),)
+
+    def _take_target(self, ask):
+        i = self.next_target
+        qty = self.targets[i][1]
+        self.next_target = i + 1
+        if self.next_target == len(self.targets) or qty >= self.size:
+            qty = self.size
+        self.size -= qty
+        self.closed = self.size <= 0
+        actions = [ExitAction("target", qty, ask, self.closed, i + 1)] if qty > 0 else []
+        if not self.closed and self.next_target == self.breakeven_after:
+            self._raise_stop(round(self.entry_price, 2), "breakeven")
+            actions.append(ExitAction("stop_moved", 0, self.stop, False, None))
+        return actions
+
+    def on_tick(self, price, bid, ask, ts_ms=None):
+        """Feed a quote (mid, bid, ask); returns the actions to take (usually none)."""
+        if self.closed:
+            return ()
+        if ask is not None and self.next_target < len(self.targets) and ask >= self.targets[self.next_target][0]:
+            return self._take_target(ask)
+        if price <= self.stop:
+            return self._close(self.stop_reason, price)
+        if self.deadline_ms is not None and ts_ms is not None and ts_ms >= self.deadline_ms:
+            return self._close("time", price)
+        if bid is not None and bid > self.high_water and self.trail_mode in ("cents", "pct") and self.trail_active:
+            self.high_water = bid
+            if self.trail_mode == "cents":
+                self._raise_stop(round(bid - self.trail_value, 4), "trail")
+            else:
+                self._raise_stop(round(bid * (1 - self.trail_value / 100), 4), "trail")
+        return ()
+
+    def on_candle(self, timeframe, candle):
+        """Feed a closed candle dict (bucket-start ms timestamp); handles time stops and candle-low trailing."""
+        if self.closed:
+            return ()
+        if self.deadline_ms is not None and candle["timestamp"] + interval_ms(timeframe) >= self.deadline_ms:
+            return self._close("time", candle["close"])
+        if self.trail_mode == "candle_low" and timeframe == self.trail_timeframe and self.trail_active:
+            self._raise_stop(round(candle["low"] - self.trail_value, 4), "trail")
+        return ()
+
+    def band(self):
+        """(low, high) trigger band for the tick fast path: on_tick does nothing while low < bid and ask < high."""
+        if self.closed:
+            return -inf, inf
+        high = self.targets[self.next_target][0] if self.next_target < len(self.targets) else inf
+        if self.trail_mode in ("cents", "pct") and self.trail_active and self.high_water < high:
+            # A new high bid moves the stop; ask < high_water rules it out
+            high = self.high_water
+        # The time stop is checked on candle close, so it doesn't narrow the band
+        return self.stop, high
@@ -0,0 +1,123 @@
+# app/trading/exits/managed_exit.py
+
+import logging
+from math import inf
+
+from ..core.strategy import ExitStrategy, register_exit, EVENTS
+from ..utils.time_tools import now_ms
+from .engine import ExitMachine, load_plan
+
+logger = logging.getLogger(__name__)
+
+ANNOUNCE = {"stop": "stop loss", "breakeven": "stop loss", "trail": "trailing stop", "time": "time stop"}
+NUMBERS = ("one", "two", "three", "four", "five", "six", "seven", "eight")
+
+
+@register_exit
+class ManagedExit(ExitStrategy):
+    """
+    Runs the open position through an ExitMachine compiled from MOMO_EXIT_PLAN (trailing and time stops,
+    N scale-outs). Select with MOMO_EXIT_STRATEGY=managed. Orders, hotkeys, voice and DB records go through
+    the same calls as check_trade_targets; the position dict is kept in sync so /positions and snapshots see
+    the current size and stop, and a rebuilt machine (new dispatcher, restart) resumes a trailed stop.
+    """
+
+    name = "managed"
+    events = EVENTS
+
+    def __init__(self, symbol, state):
+        super().__init__(symbol, state)
+        self.plan = load_plan()
+        self._position = None
+        self._exit = None
+
+    def _machine(self):
+        position = self.state.position
+        if not position or position.get("restored") or position.get("sl_hit") or position.get("closed"):
+            return None, None
+        if position is not self._position:
+            self._position = position
+            self._exit = ExitMachine.from_position(position, self.plan, self._now())
+            position["exit_deadline_ms"] = self._exit.deadline_ms
+        return position, self._exit
+
+    def _now(self):
+        # Quote time, so time stops agree with candle timestamps (and replays)
+        quote = self.state.last_quote
+        ts = getattr(quote, "timestamp_ms", None)
+        return ts if ts is not None else now_ms()
+
+    def on_tick(self, symbol, price, bid, ask):
+        try:
+            position, machine = self._machine()
+            if machine is not None:
+                actions = machine.on_tick(price, bid, ask, self._now())
+                if actions:
+                    self._apply(symbol, position, machine, actions, bid, ask)
+                else:
+                    _sync_stop(position, machine)
+        except Exception as e:
+            logger.exception(f"[{symbol}] Failed to run exit plan", exc_info=e)
+
+    on_candle_close = on_tick
+
+    def on_candle(self, timeframe, candle):
+        try:
+            position, machine = self._machine()
+            if machine is None:
+                return
+            actions = machine.on_candle(timeframe, candle)
+            if actions:
+                quote = self.state.last_quote
+                bid = getattr(quote, "bid_price", None)
+                ask = getattr(quote, "ask_price", None)
+                self._apply(self.symbol, position, machine, actions, bid, ask)
+            else:
+                _sync_stop(position, machine)
+        except Exception as e:
+            logger.exception(f"[{self.symbol}] Failed to run exit plan on {timeframe} close", exc_info=e)
+
+    def trigger_band(self):
+        _, machine = self._machine()
+        return machine.band() if machine is not None else (-inf, inf)
+
+    def _apply(self, symbol, position, machine, actions, bid, ask):
+        from ..core.execution import submit_order
+        from ..core.trade_monitor import record_exit
+        from ...utils.hotkey_utils import trigger_hotkey_sequence
+        from ...utils.voice_utils import announce_trade_exit
+
+        exit_price = ask if ask is not None else bid
+        for action in actions:
+            if action.reason == "stop_moved":
+                trigger_hotkey_sequence(["break_even"])
+                logger.info(f"✅ [{symbol}] Stop moved to breakeven ({action.price}).")
+                continue
+            if action.reason != "target":
+                trigger_hotkey_sequence(["cancel_all", "sell_all_bid"])
+            submit_order(symbol=symbol, qty=action.qty, side="sell", bid=bid, ask=ask)
+            if action.reason == "target":
+                number = NUMBERS[action.tranche - 1] if action.tranche <= len(NUMBERS) else str(action.tranche)
+                logger.info(f"✅ [{symbol}] Target {action.tranche} hit at {action.price}, sold {action.qty}.")
+                announce_trade_exit(symbol, action.price, f"take profit {number}")
+            else:
+                logger.info(f"❌ [{symbol}] {ANNOUNCE[action.reason]} at {action.price} (stop {machine.stop}). Trade closed.")
+                announce_trade_exit(symbol, action.price, ANNOUNCE[action.reason])
+            # Following trade records start from this exit, as in check_trade_targets
+            position["entry_time"] = record_exit(symbol, position, action.qty, exit_price)
+
+        position["size"] = machine.size
+        _sync_stop(position, machine)
+        position["targets_hit"] = machine.next_target
+        position["tp1_hit"] = machine.next_target >= 1
+        if machine.closed:
+            position["sl_hit"] = actions[-1].reason != "target"
+            position["tp2_hit"] = not position["sl_hit"]
+            self.state.position = None
+
+
+def _sync_stop(position, machine):
+    # Trailing ratchets return no actions, so the stop is written back on every call
+    position["stop"] = machine.stop if machine.stop != -inf else None
+    position["stop_reason"] = machine.stop_reason
+    position["high_water"] = machine.high_water if machine.high_water != -inf else None
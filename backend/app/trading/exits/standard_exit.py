@@ -0,0 +1,41 @@
+# app/trading/exits/standard_exit.py
+
+import logging
+from math import inf
+
+from ..core.strategy import ExitStrategy, register_exit, EVENTS
+
+logger = logging.getLogger(__name__)
+
+
+@register_exit
+class StandardExit(ExitStrategy):
+    """TP1 / TP2 / stop management of the open position (check_trade_targets) on every event the entry uses."""
+
+    name = "standard"
+    events = EVENTS
+
+    def __init__(self, symbol, state):
+        super().__init__(symbol, state)
+        from ..core.trade_monitor import check_trade_targets
+        self._check = check_trade_targets
+
+    def on_tick(self, symbol, price, bid, ask):
+        position = self.state.position
+        # Restored from a snapshot and not yet confirmed by the broker: display only
+        if position and not position.get("restored"):
+            try:
+                self._check(symbol, price, bid, ask)
+            except Exception as e:
+                logger.exception(f"[{symbol}] Failed to check trade targets", exc_info=e)
+
+    on_candle_close = on_tick
+
+    def trigger_band(self):
+        # TP checks are ask >= tp, the stop is mid <= stop (so bid > stop is safe)
+        trade = self.state.position
+        if not trade or trade.get("restored") or trade.get("sl_hit") or trade.get("tp2_hit"):
+            return -inf, inf
+        target = trade.get("tp2") if trade.get("tp1_hit") else trade.get("tp1")
+        stop = trade.get("stop")
+        return (-inf if stop is None else stop), (inf if target is None else target)
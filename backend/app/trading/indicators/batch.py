@@ -0,0 +1,121 @@
+# app/trading/indicators/batch.py
+
+"""
+Vectorized versions of the incremental indicators for seeding from history (backfill, restored snapshots).
+Same conventions as incremental.py; test_indicators.py checks the two agree.
+"""
+
+import numpy as np
+
+from ..utils.time_tools import get_session_calendar
+from .incremental import IndicatorSet, EMA_FAST, EMA_SLOW, MACD_FAST, MACD_SLOW, MACD_SIGNAL, ATR_PERIOD
+
+
+def _ema(values, alpha):
+    import pandas as pd
+    return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def ema(values, period):
+    return _ema(values, 2.0 / (period + 1))
+
+
+def true_range(high, low, close):
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr[0] = high[0] - low[0]
+    return tr
+
+
+def atr(high, low, close, period=ATR_PERIOD):
+    return _ema(true_range(high, low, close), 1.0 / period)
+
+
+def macd(close, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def session_starts(timestamps):
+    """ET session-day start (epoch ms) for each timestamp."""
+    calendar = get_session_calendar()
+    return np.fromiter((calendar.day(int(ts)).start for ts in timestamps), dtype=np.int64, count=len(timestamps))
+
+
+def vwap(timestamps, high, low, close, volume):
+    """Session VWAP of the typical price; also returns the per-row cumulative price*volume and volume."""
+    typical = (high + low + close) / 3.0
+    pv = typical * volume
+    sessions = session_starts(timestamps)
+    # Index of the first row of each row's session, then cumulative sums minus everything before it
+    first = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]])
+    seg_start = np.repeat(first, np.diff(np.r_[first, len(sessions)]))
+    cum_pv = np.cumsum(pv)
+    cum_vol = np.cumsum(volume)
+    base_pv = np.where(seg_start > 0, cum_pv[seg_start - 1], 0.0)
+    base_vol = np.where(seg_start > 0, cum_vol[seg_start - 1], 0.0)
+    session_pv = cum_pv - base_pv
+    session_vol = cum_vol - base_vol
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = np.where(session_vol > 0, session_pv / session_vol, typical)
+    return values, session_pv, session_vol, sessions
+
+
+def _arrays(candles):
+    ts = np.array([c["timestamp"] for c in candles], dtype=np.int64)
+    cols = {key: np.array([c[key] for c in candles], dtype=float) for key in ("high", "low", "close")}
+    volume = np.array([c.get("volume", 0) for c in candles], dtype=float)
+    return ts, cols["high"], cols["low"], cols["close"], volume
+
+
+def compute(candles):
+    """Every indicator for every candle, as arrays keyed like IndicatorSet values."""
+    ts, high, low, close, volume = _arrays(candles)
+    line, signal, hist = macd(close)
+    vwap_values = vwap(ts, high, low, close, volume)[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dist = (close - vwap_values) / vwap_values * 100
+    return {
+        "time": ts,
+        "ema9": ema(close, EMA_FAST),
+        "ema20": ema(close, EMA_SLOW),
+        "macd": line,
+        "macd_signal": signal,
+        "macd_hist": hist,
+        "atr": atr(high, low, close),
+        "vwap": vwap_values,
+        "vwap_dist_pct": dist,
+    }
+
+
+def seed_indicator_set(timeframe, candles):
+    """An IndicatorSet in the state it would have after update() on every candle, built with array math."""
+    indicators = IndicatorSet(timeframe)
+    if not candles:
+        return indicators
+    ts, high, low, close, volume = _arrays(candles)
+    fast, slow = ema(close, MACD_FAST), ema(close, MACD_SLOW)
+    line = fast - slow
+    indicators.ema_fast.value = float(ema(close, EMA_FAST)[-1])
+    indicators.ema_slow.value = float(ema(close, EMA_SLOW)[-1])
+    indicators.macd.fast.value = float(fast[-1])
+    indicators.macd.slow.value = float(slow[-1])
+    indicators.macd.signal.value = float(ema(line, MACD_SIGNAL)[-1])
+    indicators.atr.rma.value = float(atr(high, low, close)[-1])
+    indicators.atr.prev_close = float(close[-1])
+    _, session_pv, session_vol, sessions = vwap(ts, high, low, close, volume)
+    indicators.vwap.session_start = int(sessions[-1])
+    indicators.vwap.cum_pv = float(session_pv[-1])
+    indicators.vwap.cum_volume = float(session_vol[-1])
+    indicators.count = len(candles)
+    macd_line, macd_signal = float(line[-1]), indicators.macd.signal.value
+    vwap_value = (indicators.vwap.cum_pv / indicators.vwap.cum_volume if indicators.vwap.cum_volume
+                  else float((high[-1] + low[-1] + close[-1]) / 3.0))
+    indicators.last = IndicatorSet._values(
+        int(ts[-1]), float(close[-1]), indicators.ema_fast.value, indicators.ema_slow.value,
+        (macd_line, macd_signal, macd_line - macd_signal), indicators.atr.rma.value, vwap_value,
+    )
+    return indicators
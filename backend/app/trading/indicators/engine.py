@@ -0,0 +1,98 @@
+# app/trading/indicators/engine.py
+
+import os
+import logging
+
+from ...shared_state import ticker_states
+from ...utils.metrics import timed
+from .incremental import IndicatorSet
+from .microstructure import QUOTE_FILTERS, passes_quote_filters
+from ..core.trade_tape import TAPE_BARS
+
+logger = logging.getLogger(__name__)
+
+CANDLE_KEYS = {"10s": "candles_10s", "1m": "candles", "5m": "candles_5m"}
+CURRENT_KEYS = {"10s": "current_candle_10s", "1m": "current_candle", "5m": "current_candle_5m"}
+for _bar in TAPE_BARS:
+    # Tick/volume bars built from the trade tape
+    CANDLE_KEYS[_bar] = f"tape_bars_{_bar}"
+    CURRENT_KEYS[_bar] = f"tape_current_{_bar}"
+
+# Optional entry gates, comma separated: above_vwap, ema_trend (ema9 > ema20), macd_positive (histogram > 0),
+# and the quote gates max_spread, min_quote_rate, bid_imbalance (see microstructure.py)
+ENTRY_FILTERS = {f.strip() for f in os.getenv("MOMO_ENTRY_FILTERS", "").split(",") if f.strip()}
+
+
+def get_indicator_set(symbol, timeframe, create=True):
+    """
+    The running IndicatorSet for symbol/timeframe. The first time it's needed it is seeded from the
+    symbol's closed candles with the batch implementation (history, restored snapshots).
+    """
+    state = ticker_states.get(symbol) if not create else ticker_states[symbol]
+    if state is None:
+        return None
+    sets = state.get("indicators")
+    if sets is None:
+        sets = state["indicators"] = {}
+    indicators = sets.get(timeframe)
+    if indicators is None and create:
+        candles = state.get(CANDLE_KEYS[timeframe]) or []
+        if candles:
+            from .batch import seed_indicator_set
+            indicators = seed_indicator_set(timeframe, list(candles))
+        else:
+            indicators = IndicatorSet(timeframe)
+        sets[timeframe] = indicators
+    return indicators
+
+
+@timed("indicators_update")
+def on_candle_close(symbol, timeframe, candle):
+    """Feed a closed candle (already appended to the symbol's candle list) into its indicators."""
+    sets = ticker_states[symbol].get("indicators")
+    indicators = sets.get(timeframe) if sets else None
+    if indicators is None:
+        # Seeding from the list already includes this candle
+        return get_indicator_set(symbol, timeframe).last
+    return indicators.update(candle)
+
+
+def latest(symbol, timeframe):
+    """Values after the last closed candle, or None."""
+    state = ticker_states.get(symbol)
+    sets = state.get("indicators") if state else None
+    indicators = sets.get(timeframe) if sets else None
+    return indicators.last if indicators is not None else None
+
+
+def preview(symbol, timeframe):
+    """Values including the in-progress candle, without committing it."""
+    state = ticker_states.get(symbol)
+    if not state:
+        return None
+    indicators = get_indicator_set(symbol, timeframe)
+    current = state.get(CURRENT_KEYS[timeframe])
+    return indicators.peek(current) if current else indicators.last
+
+
+def passes_entry_filters(symbol, timeframe, price, filters=None):
+    """True if every configured MOMO_ENTRY_FILTERS gate passes (always True when none are set)."""
+    filters = ENTRY_FILTERS if filters is None else filters
+    if not filters:
+        return True
+    if not QUOTE_FILTERS.isdisjoint(filters) and not passes_quote_filters(symbol, filters):
+        return False
+    values = latest(symbol, timeframe)
+    if values is None:
+        # Not enough history to judge; don't block
+        return True
+    if "above_vwap" in filters and values["vwap"] is not None and price <= values["vwap"]:
+        logger.info("[Indicators] %s %s entry blocked: price %s not above VWAP %.4f", symbol, timeframe, price, values["vwap"])
+        return False
+    if "ema_trend" in filters and values["ema9"] <= values["ema20"]:
+        logger.info("[Indicators] %s %s entry blocked: EMA9 %.4f <= EMA20 %.4f", symbol, timeframe, values["ema9"], values["ema20"])
+        return False
+    if "macd_positive" in filters and values["macd_hist"] <= 0:
+        logger.info("[Indicators] %s %s entry blocked: MACD histogram %.5f <= 0", symbol, timeframe, values["macd_hist"])
+        return False
+    return True
@@ -0,0 +1,145 @@
+# app/trading/indicators/incremental.py
+
+"""
+Running indicators updated in O(1) per candle. Each has update() to commit a closed candle and peek()
+to see the value an in-progress candle would produce without changing state.
+
+Conventions (shared with batch.py so both give the same numbers):
+- EMA is seeded with the first value (pandas ewm(adjust=False)).
+- ATR is Wilder's smoothing (alpha = 1/period) of true range, seeded with the first candle's high - low.
+- VWAP uses the typical price (h + l + c) / 3 and restarts at each ET session day.
+"""
+
+from ..utils.time_tools import get_session_calendar
+
+EMA_FAST = 9
+EMA_SLOW = 20
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+ATR_PERIOD = 14
+
+
+class EMA:
+    __slots__ = ("period", "alpha", "value")
+
+    def __init__(self, period, alpha=None, value=None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.value = value
+
+    def peek(self, x):
+        return x if self.value is None else self.value + self.alpha * (x - self.value)
+
+    def update(self, x):
+        self.value = self.peek(x)
+        return self.value
+
+
+class MACD:
+    __slots__ = ("fast", "slow", "signal")
+
+    def __init__(self, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def peek(self, close):
+        line = self.fast.peek(close) - self.slow.peek(close)
+        signal = self.signal.peek(line)
+        return line, signal, line - signal
+
+    def update(self, close):
+        line = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal.update(line)
+        return line, signal, line - signal
+
+
+class ATR:
+    __slots__ = ("rma", "prev_close")
+
+    def __init__(self, period=ATR_PERIOD):
+        self.rma = EMA(period, alpha=1.0 / period)
+        self.prev_close = None
+
+    def _true_range(self, high, low):
+        if self.prev_close is None:
+            return high - low
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def peek(self, high, low, close):
+        return self.rma.peek(self._true_range(high, low))
+
+    def update(self, high, low, close):
+        value = self.rma.update(self._true_range(high, low))
+        self.prev_close = close
+        return value
+
+
+class VWAP:
+    __slots__ = ("session_start", "cum_pv", "cum_volume")
+
+    def __init__(self):
+        self.session_start = None
+        self.cum_pv = 0.0
+        self.cum_volume = 0.0
+
+    def _sums(self, ts_ms, high, low, close, volume):
+        session_start = get_session_calendar().day(ts_ms).start
+        typical = (high + low + close) / 3.0
+        if session_start != self.session_start:
+            return session_start, typical * volume, volume, typical
+        return session_start, self.cum_pv + typical * volume, self.cum_volume + volume, typical
+
+    def peek(self, ts_ms, high, low, close, volume):
+        _, pv, vol, typical = self._sums(ts_ms, high, low, close, volume)
+        return pv / vol if vol else typical
+
+    def update(self, ts_ms, high, low, close, volume):
+        self.session_start, self.cum_pv, self.cum_volume, typical = self._sums(ts_ms, high, low, close, volume)
+        return self.cum_pv / self.cum_volume if self.cum_volume else typical
+
+
+class IndicatorSet:
+    """All indicators for one symbol and timeframe, fed with candle dicts (epoch-ms timestamp, OHLCV)."""
+
+    __slots__ = ("timeframe", "ema_fast", "ema_slow", "macd", "atr", "vwap", "count", "last")
+
+    def __init__(self, timeframe):
+        self.timeframe = timeframe
+        self.ema_fast = EMA(EMA_FAST)
+        self.ema_slow = EMA(EMA_SLOW)
+        self.macd = MACD()
+        self.atr = ATR()
+        self.vwap = VWAP()
+        self.count = 0
+        self.last = None  # values after the last committed candle
+
+    @staticmethod
+    def _values(ts, close, ema_fast, ema_slow, macd, atr, vwap):
+        line, signal, hist = macd
+        return {
+            "time": ts,
+            "ema9": ema_fast,
+            "ema20": ema_slow,
+            "macd": line,
+            "macd_signal": signal,
+            "macd_hist": hist,
+            "atr": atr,
+            "vwap": vwap,
+            "vwap_dist_pct": (close - vwap) / vwap * 100 if vwap else None,
+        }
+
+    def update(self, candle):
+        """Commit a closed candle; returns the new values."""
+        ts, h, l, c, v = candle["timestamp"], candle["high"], candle["low"], candle["close"], candle.get("volume", 0)
+        self.count += 1
+        self.last = self._values(ts, c, self.ema_fast.update(c), self.ema_slow.update(c), self.macd.update(c),
+                                 self.atr.update(h, l, c), self.vwap.update(ts, h, l, c, v))
+        return self.last
+
+    def peek(self, candle):
+        """Values as if the in-progress candle closed now; state is unchanged."""
+        ts, h, l, c, v = candle["timestamp"], candle["high"], candle["low"], candle["close"], candle.get("volume", 0)
+        return self._values(ts, c, self.ema_fast.peek(c), self.ema_slow.peek(c), self.macd.peek(c),
+                            self.atr.peek(h, l, c), self.vwap.peek(ts, h, l, c, v))
@@ -0,0 +1,182 @@
+# app/trading/indicators/microstructure.py
+
+"""
+Rolling quote microstructure per symbol: spread mean/max, quote rate, bid/ask size imbalance and how long the
+inside quote has gone unchanged, over each window in MOMO_QUOTE_STATS_WINDOWS (default "5s,30s").
+
+Each window keeps a deque of (ts, spread, imbalance) with running sums for the means, and a monotonic deque of
+(ts, spread) whose head is the window max, so a quote costs O(1) amortized whatever the window length.
+Spreads are in % of the midpoint so one threshold works for $2 and $20 stocks. Windows are in quote time.
+
+Entry gates (MOMO_ENTRY_FILTERS, see engine.passes_entry_filters) use the MOMO_QUOTE_FILTER_WINDOW window:
+  max_spread      current and mean spread <= MOMO_FILTER_MAX_SPREAD_PCT
+  min_quote_rate  quotes per second >= MOMO_FILTER_MIN_QUOTE_RATE
+  bid_imbalance   mean (bid_size - ask_size) / (bid_size + ask_size) >= MOMO_FILTER_MIN_IMBALANCE
+"""
+
+import os
+import logging
+from collections import deque
+
+from ...shared_state import ticker_states
+from ...utils.metrics import timed
+from ..utils.time_tools import interval_ms
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = tuple(w.strip() for w in os.getenv("MOMO_QUOTE_STATS_WINDOWS", "5s,30s").split(",") if w.strip())
+FILTER_WINDOW = os.getenv("MOMO_QUOTE_FILTER_WINDOW", WINDOWS[0])
+MAX_SPREAD_PCT = float(os.getenv("MOMO_FILTER_MAX_SPREAD_PCT", "1.0"))
+MIN_QUOTE_RATE = float(os.getenv("MOMO_FILTER_MIN_QUOTE_RATE", "1.0"))
+MIN_IMBALANCE = float(os.getenv("MOMO_FILTER_MIN_IMBALANCE", "0.0"))
+if FILTER_WINDOW not in WINDOWS:
+    raise ValueError(f"MOMO_QUOTE_FILTER_WINDOW {FILTER_WINDOW!r} must be one of MOMO_QUOTE_STATS_WINDOWS {WINDOWS}")
+QUOTE_FILTERS = frozenset({"max_spread", "min_quote_rate", "bid_imbalance"})
+
+
+class RollingWindow:
+    __slots__ = ("name", "ms", "items", "spread_sum", "imbalance_sum", "maxes")
+
+    def __init__(self, name):
+        self.name = name
+        self.ms = interval_ms(name)
+        self.items = deque()  # (ts, spread_pct, imbalance)
+        self.spread_sum = 0.0
+        self.imbalance_sum = 0.0
+        self.maxes = deque()  # (ts, spread_pct), spreads decreasing: the head is the window max
+
+    def update(self, ts, spread, imbalance):
+        items = self.items
+        items.append((ts, spread, imbalance))
+        self.spread_sum += spread
+        self.imbalance_sum += imbalance
+        maxes = self.maxes
+        while maxes and maxes[-1][1] <= spread:
+            maxes.pop()
+        maxes.append((ts, spread))
+        cutoff = ts - self.ms
+        if items[0][0] <= cutoff:
+            while items[0][0] <= cutoff:
+                _, old_spread, old_imbalance = items.popleft()
+                self.spread_sum -= old_spread
+                self.imbalance_sum -= old_imbalance
+            if len(items) == 1:
+                # Drop accumulated float error whenever the window empties out
+                self.spread_sum, self.imbalance_sum = spread, imbalance
+            while maxes[0][0] <= cutoff:
+                maxes.popleft()
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    @property
+    def spread_mean(self):
+        return self.spread_sum / len(self.items) if self.items else None
+
+    @property
+    def spread_max(self):
+        return self.maxes[0][1] if self.maxes else None
+
+    @property
+    def quote_rate(self):
+        """Quotes per second over the full window length."""
+        return len(self.items) * 1000 / self.ms
+
+    @property
+    def imbalance_mean(self):
+        return self.imbalance_sum / len(self.items) if self.items else None
+
+    def to_dict(self):
+        mean, imbalance = self.spread_mean, self.imbalance_mean
+        return {
+            "quotes": len(self.items),
+            "quote_rate": round(self.quote_rate, 2),
+            "spread_mean_pct": round(mean, 4) if mean is not None else None,
+            "spread_max_pct": round(self.spread_max, 4) if self.maxes else None,
+            "imbalance": round(imbalance, 4) if imbalance is not None else None,
+        }
+
+
+class QuoteStats:
+    """All windows for one symbol, plus the current spread and when the inside quote last changed."""
+
+    __slots__ = ("windows", "by_name", "bid", "ask", "spread", "last_ms", "changed_ms")
+
+    def __init__(self, windows=WINDOWS):
+        self.windows = tuple(RollingWindow(name) for name in windows)
+        self.by_name = {w.name: w for w in self.windows}
+        self.bid = None
+        self.ask = None
+        self.spread = None
+        self.last_ms = None
+        self.changed_ms = None
+
+    def update(self, ts, bid, ask, bid_size, ask_size):
+        if bid != self.bid or ask != self.ask:
+            self.bid = bid
+            self.ask = ask
+            self.changed_ms = ts
+        self.last_ms = ts
+        mid = (bid + ask) / 2
+        spread = self.spread = (ask - bid) / mid * 100 if mid > 0 else 0.0
+        total = bid_size + ask_size
+        imbalance = (bid_size - ask_size) / total if total else 0.0
+        for window in self.windows:
+            window.update(ts, spread, imbalance)
+
+    @property
+    def stable_ms(self):
+        """Time the inside bid/ask has gone unchanged, as of the last quote."""
+        return self.last_ms - self.changed_ms if self.last_ms is not None else None
+
+    def window(self, name):
+        return self.by_name.get(name)
+
+    def to_dict(self):
+        return {
+            "bid": self.bid,
+            "ask": self.ask,
+            "spread_pct": round(self.spread, 4) if self.spread is not None else None,
+            "stable_ms": self.stable_ms,
+            "windows": {w.name: w.to_dict() for w in self.windows},
+        }
+
+
+@timed("quote_stats")
+def update_quote_stats(symbol, quote):
+    """Feed a quote into the symbol's rolling stats (quotes missing a side are skipped)."""
+    bid, ask = quote.bid_price, quote.ask_price
+    if bid is None or ask is None:
+        return
+    state = ticker_states[symbol]
+    stats = state.quote_stats
+    if stats is None:
+        stats = state.quote_stats = QuoteStats()
+    stats.update(quote.timestamp_ms, bid, ask, quote.bid_size or 0, quote.ask_size or 0)
+
+
+def get_quote_stats(symbol):
+    state = ticker_states.get(symbol)
+    return state.quote_stats if state else None
+
+
+def passes_quote_filters(symbol, filters):
+    """The quote gates among filters; True while there are no stats yet."""
+    stats = get_quote_stats(symbol)
+    window = stats.window(FILTER_WINDOW) if stats is not None else None
+    if window is None or not window.count:
+        return True
+    if "max_spread" in filters and (stats.spread > MAX_SPREAD_PCT or window.spread_mean > MAX_SPREAD_PCT):
+        logger.info("[Quotes] %s entry blocked: spread %.2f%% (%s mean %.2f%%) above %.2f%%",
+                    symbol, stats.spread, window.name, window.spread_mean, MAX_SPREAD_PCT)
+        return False
+    if "min_quote_rate" in filters and window.quote_rate < MIN_QUOTE_RATE:
+        logger.info("[Quotes] %s entry blocked: %.2f quotes/s over %s below %.2f",
+                    symbol, window.quote_rate, window.name, MIN_QUOTE_RATE)
+        return False
+    if "bid_imbalance" in filters and window.imbalance_mean < MIN_IMBALANCE:
+        logger.info("[Quotes] %s entry blocked: %s size imbalance %.3f below %.3f",
+                    symbol, window.name, window.imbalance_mean, MIN_IMBALANCE)
+        return False
+    return True
@@ -1,24 +1,16 @@
-import pandas as pd
 import logging
 from datetime import datetime
-import pytz
 
 logger = logging.getLogger(__name__)
 
 from ..core.execution import submit_order
 from ..core.trade_manager import handle_breakout_trigger
-
-def get_socketio():
-    """Lazy import of socketio to avoid circular imports"""
-    try:
-        import sys
-        app_module = sys.modules.get('backend.app')
-        if app_module and hasattr(app_module, 'socketio'):
-            return app_module.socketio
-        return None
-    except Exception as e:
-        logger.warning(f"Could not get socketio: {e}")
-        return None
+from ..core.strategy import refresh_trigger_band
+from ...utils.metrics import timed
+from ...utils import tracing
+from ...events import publish
+from ...shared_state import ticker_states
+from ..utils.time_tools import to_ms, bucket_ms, ms_to_eastern, MS_PER_MIN
 
 class Candle:
     def __init__(self, timestamp, open, high, low, close, volume):
@@ -31,6 +23,8 @@ class Candle:
 
 class PullbackTracker:
     def __init__(self, symbol, interval="1m"):
+        # pandas is imported on first use so importing this module stays cheap
+        import pandas as pd
         self.symbol = symbol
         self.interval = interval
         self.df = pd.DataFrame(columns=["timestamp", "open", "high", "low", "close", "volume"])  # type: ignore
@@ -40,9 +34,11 @@ class PullbackTracker:
         self.last_logged_minute = None
         self.pullback_active = False
 
+    @timed("tracker_add_candle")
     def add_candle(self, candle: Candle):
+        import pandas as pd
         new_row = {
-            "timestamp": pd.to_datetime(candle.timestamp),
+            "timestamp": to_ms(candle.timestamp),
             "open": candle.open,
             "high": candle.high,
             "low": candle.low,
@@ -64,14 +60,11 @@ class PullbackTracker:
         latest = self.df.iloc[-1]
 
         # 🕒 Log finalized candle in NY time
-        latest_minute = latest["timestamp"].replace(second=0, microsecond=0)
-        if latest_minute.tzinfo is None:
-            latest_minute = latest_minute.tz_localize('UTC')
-        ny_time = latest_minute.tz_convert('America/New_York')
-        formatted_time = ny_time.strftime('%I:%M %p ET')
-
-        if self.last_logged_minute != latest_minute:
-            logger.info(f"🕒 Finalized {self.interval} candle for {self.symbol} at {formatted_time} → Close: {latest['close']}, High: {latest['high']}")
+        latest_minute = bucket_ms(int(latest["timestamp"]), MS_PER_MIN)
+
+        if self.last_logged_minute != latest_minute and logger.isEnabledFor(logging.INFO):
+            formatted_time = ms_to_eastern(latest_minute).strftime('%I:%M %p ET')
+            logger.info("🕒 Finalized %s candle for %s at %s → Close: %s, High: %s", self.interval, self.symbol, formatted_time, latest['close'], latest['high'])
             self.last_logged_minute = latest_minute
 
         # Simple breakout level calculation:
@@ -81,15 +74,17 @@ class PullbackTracker:
             self.last_breakout_level = latest["high"]
             self.pullback_active = True
             self.breakout_triggered = False
-            logger.info(f"🔽 Lower high detected ({self.interval}) — adjusting breakout level for {self.symbol} to {self.last_breakout_level}")
+            logger.info("🔽 Lower high detected (%s) — adjusting breakout level for %s to %s", self.interval, self.symbol, self.last_breakout_level)
+            refresh_trigger_band(self.symbol)
             self.emit_breakout_levels()
         elif latest["high"] > prev["high"]:
             # Higher high detected - reset breakout level as pullback is over
             if self.last_breakout_level is not None:
-                logger.info(f"📈 Higher high detected ({self.interval}) — resetting breakout level for {self.symbol}")
+                logger.info("📈 Higher high detected (%s) — resetting breakout level for %s", self.interval, self.symbol)
                 self.last_breakout_level = None
                 self.pullback_active = False
                 self.breakout_triggered = False
+                refresh_trigger_band(self.symbol)
                 self.emit_breakout_levels()
         else:
             # If no lower high, maintain current breakout level if it exists
@@ -97,22 +92,29 @@ class PullbackTracker:
             if self.last_breakout_level is not None:
                 self.emit_breakout_levels()
 
+    @timed("tracker_check_tick")
     def check_tick_for_entry(self, symbol: str, price: float, bid=None, ask=None) -> bool:
-        from ...shared_state import ticker_states
         state = ticker_states.get(symbol)
         # Only emit/trigger breakouts if this tracker's interval matches the active_entry_type
         if state is not None and state.get("active_entry_type") != self.interval:
             # Still update state, but do not emit entry signals
             return False
+        return self.check_breakout(symbol, price, bid, ask)
+
+    def check_breakout(self, symbol: str, price: float, bid=None, ask=None) -> bool:
+        """The breakout check itself, for callers that already know this tracker's interval is the active entry type."""
         if self.last_breakout_level is None or self.breakout_triggered or not self.pullback_active:
             return False
 
         if price > self.last_breakout_level:
+            from ..indicators.engine import passes_entry_filters
+            if not passes_entry_filters(symbol, self.interval, price):
+                return False
             self.breakout_triggered = True
             self.last_breakout_index = len(self.df) - 1
             self.pullback_active = False
-            logger.info(f"✅ Tick breakout detected — price: {price}, breakout level: {self.last_breakout_level}")
-            logger.info(f"🚀 Entry signal for {self.symbol} at ${price}!")
+            logger.info("✅ Tick breakout detected — price: %s, breakout level: %s", price, self.last_breakout_level)
+            logger.info("🚀 Entry signal for %s at $%s!", self.symbol, price)
             
            
 
@@ -124,6 +126,7 @@ class PullbackTracker:
                 return False  # or handle as appropriate
 
             from ..core.trade_manager import handle_breakout_trigger
+            tracing.hop(f"check_tick_for_entry_{self.interval}")
             handle_breakout_trigger(symbol, price, self.interval, bid, ask)
 
             
@@ -131,12 +134,18 @@ class PullbackTracker:
 
         return False
 
+    @property
+    def indicators(self):
+        """Running EMA/VWAP/MACD/ATR values for this tracker's symbol and interval (after the last close)."""
+        from ..indicators.engine import latest
+        return latest(self.symbol, self.interval)
+
+    @timed("emit_breakout_levels")
     def emit_breakout_levels(self):
         """Emit current breakout levels to frontend"""
-        from ...shared_state import ticker_states
         state = ticker_states.get(self.symbol)
         if state is None:
-            logger.warning(f"No state found for {self.symbol}")
+            logger.warning("No state found for %s", self.symbol)
             return
             
         # Get all trackers for this symbol
@@ -152,27 +161,35 @@ class PullbackTracker:
             tracker = trackers.get(interval)
             if tracker and tracker.last_breakout_level is not None and not tracker.breakout_triggered:
                 levels.append(tracker.last_breakout_level)
-                logger.info(f"📊 {self.symbol} {interval} breakout level: {tracker.last_breakout_level}")
+                logger.debug("📊 %s %s breakout level: %s", self.symbol, interval, tracker.last_breakout_level)
             else:
                 levels.append(None)
-                logger.info(f"📊 {self.symbol} {interval} breakout level: None (level: {tracker.last_breakout_level if tracker else None}, triggered: {tracker.breakout_triggered if tracker else False})")
+                logger.debug("📊 %s %s breakout level: None (level: %s, triggered: %s)", self.symbol, interval, tracker.last_breakout_level if tracker else None, tracker.breakout_triggered if tracker else False)
         
         # Add custom level if it exists
         custom_tracker = state.get('custom_level_entry')
         if custom_tracker and custom_tracker.custom_level is not None and not custom_tracker.entry_triggered:
             levels.append(custom_tracker.custom_level)
-            logger.info(f"📊 {self.symbol} custom breakout level: {custom_tracker.custom_level}")
+            logger.debug("📊 %s custom breakout level: %s", self.symbol, custom_tracker.custom_level)
         else:
             levels.append(None)
-            logger.info(f"📊 {self.symbol} custom breakout level: None")
+            logger.debug("📊 %s custom breakout level: None", self.symbol)
         
-        # Emit to frontend
-        socketio = get_socketio()
-        if socketio:
-            logger.info(f"📡 Emitting breakout levels for {self.symbol}: {levels}")
-            socketio.emit('breakout_levels', {
-                'symbol': self.symbol,
-                'levels': levels
-            })
-        else:
-            logger.warning(f"socketio not available, cannot emit breakout levels for {self.symbol}")
+        logger.info("📡 Emitting breakout levels for %s: %s", self.symbol, levels)
+        publish("level_change", self.symbol, "breakout_levels", {
+            'symbol': self.symbol,
+            'levels': levels
+        })
+
+
+def feed_closed_candle(symbol, timeframe, candle):
+    """candle_close subscriber: add the closed candle dict to the symbol's tracker for its timeframe."""
+    state = ticker_states[symbol]
+    key = f"pullback_tracker_{timeframe}"
+    tracker = state.get(key)
+    if tracker is None:
+        logger.info(f"[{timeframe}] Creating new PullbackTracker for {symbol}")
+        tracker = state[key] = PullbackTracker(symbol, interval=timeframe)
+    tracker.add_candle(Candle(candle["timestamp"], candle["open"], candle["high"], candle["low"],
+                              candle["close"], candle["volume"]))
+    logger.info("[%s] Added finalized candle to tracker for %s at %s", timeframe, symbol, candle['timestamp'])
@@ -0,0 +1,272 @@
+# app/trading/scanner/momentum_scanner.py
+
+import os
+import csv
+import json
+import time
+import logging
+import threading
+import numpy as np
+
+from ..stream.polygon_rest import get_rest_client
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = "/v2/snapshot/locale/us/markets/stocks/tickers"
+
+SCANNER_REFRESH_SEC = float(os.getenv("MOMO_SCANNER_REFRESH_SEC", "5"))
+# Optional local snapshot (same JSON shape as the Polygon endpoint) used instead of the API, e.g. in tests
+SCANNER_SNAPSHOT_FILE = os.getenv("MOMO_SCANNER_SNAPSHOT_FILE")
+# Optional CSV with columns symbol,float_shares,avg_volume for float and relative volume metrics
+SCANNER_REFERENCE_FILE = os.getenv("MOMO_SCANNER_REFERENCE_FILE")
+
+DEFAULT_FILTERS = {
+    "min_price": 1.0,
+    "max_price": 20.0,
+    "min_change_pct": 10.0,
+    "min_volume": 100_000,
+    "min_rvol": 0.0,
+    "max_float": None,
+}
+
+# Per-symbol raw columns taken from each snapshot row
+_FIELDS = ("last", "open", "high", "prev_close", "prev_volume", "volume", "updated")
+
+
+def load_snapshot_file(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("tickers", data) if isinstance(data, dict) else data
+
+
+def load_reference_file(path):
+    """Read float/average-volume reference data: {symbol: (float_shares, avg_volume)}."""
+    reference = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            symbol = (row.get("symbol") or "").upper()
+            if not symbol:
+                continue
+            float_shares = float(row["float_shares"]) if row.get("float_shares") else np.nan
+            avg_volume = float(row["avg_volume"]) if row.get("avg_volume") else np.nan
+            reference[symbol] = (float_shares, avg_volume)
+    return reference
+
+
+def _row_values(t):
+    day = t.get("day") or {}
+    prev = t.get("prevDay") or {}
+    minute = t.get("min") or {}
+    last_trade = t.get("lastTrade") or {}
+    last = last_trade.get("p") or minute.get("c") or day.get("c") or 0.0
+    volume = max(day.get("v") or 0.0, minute.get("av") or 0.0)
+    return (last, day.get("o") or 0.0, day.get("h") or 0.0, prev.get("c") or 0.0,
+            prev.get("v") or 0.0, volume, t.get("updated") or 0)
+
+
+class MomentumScanner:
+    """
+    Full-market momentum scanner. Snapshot rows are kept in column arrays indexed by symbol;
+    each refresh only rewrites rows whose 'updated' timestamp changed, then computes every metric
+    for the whole universe in one vectorized NumPy pass.
+    """
+
+    def __init__(self, reference=None, filters=None):
+        self.symbols = []
+        self.index = {}
+        self.columns = {name: np.zeros(0, dtype=np.float64) for name in _FIELDS}
+        self.float_shares = np.zeros(0, dtype=np.float64)
+        self.avg_volume = np.zeros(0, dtype=np.float64)
+        self.reference = reference or {}
+        self.filters = dict(DEFAULT_FILTERS, **(filters or {}))
+        self.last_results = []
+        self.last_scan_ms = None
+        self.last_update_ms = None
+        self.rows_changed = 0
+
+    def _grow(self, new_symbols):
+        start = len(self.symbols)
+        self.symbols.extend(new_symbols)
+        for offset, symbol in enumerate(new_symbols):
+            self.index[symbol] = start + offset
+        pad = len(new_symbols)
+        for name in _FIELDS:
+            self.columns[name] = np.concatenate([self.columns[name], np.zeros(pad)])
+        ref = [self.reference.get(s, (np.nan, np.nan)) for s in new_symbols]
+        self.float_shares = np.concatenate([self.float_shares, np.array([r[0] for r in ref], dtype=np.float64)])
+        self.avg_volume = np.concatenate([self.avg_volume, np.array([r[1] for r in ref], dtype=np.float64)])
+
+    def update(self, tickers):
+        """Merge snapshot rows into the column arrays, touching only rows that changed."""
+        start = time.perf_counter()
+        index = self.index
+        new_symbols = [t["ticker"] for t in tickers if t.get("ticker") and t["ticker"] not in index]
+        if new_symbols:
+            self._grow(new_symbols)
+        updated_col = self.columns["updated"]
+        rows, values = [], []
+        for t in tickers:
+            symbol = t.get("ticker")
+            if not symbol:
+                continue
+            i = index[symbol]
+            if updated_col[i] and updated_col[i] == (t.get("updated") or 0):
+                continue
+            rows.append(i)
+            values.append(_row_values(t))
+        if rows:
+            block = np.array(values, dtype=np.float64)
+            rows = np.array(rows, dtype=np.int64)
+            for col, name in enumerate(_FIELDS):
+                self.columns[name][rows] = block[:, col]
+        self.rows_changed = len(rows)
+        self.last_update_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def compute(self):
+        """Vectorized metrics for the whole universe."""
+        c = self.columns
+        last, open_, prev_close = c["last"], c["open"], c["prev_close"]
+        volume = c["volume"]
+        baseline = np.where(np.isnan(self.avg_volume), c["prev_volume"], self.avg_volume)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_pct = np.where(prev_close > 0, (last - prev_close) / prev_close * 100.0, np.nan)
+            gap_pct = np.where((prev_close > 0) & (open_ > 0), (open_ - prev_close) / prev_close * 100.0, np.nan)
+            intraday_pct = np.where(open_ > 0, (last - open_) / open_ * 100.0, np.nan)
+            rvol = np.where(baseline > 0, volume / baseline, np.nan)
+            float_rotation = np.where(self.float_shares > 0, volume / self.float_shares, np.nan)
+            off_high_pct = np.where(c["high"] > 0, (c["high"] - last) / c["high"] * 100.0, np.nan)
+        return {
+            "last": last,
+            "change_pct": change_pct,
+            "gap_pct": gap_pct,
+            "intraday_pct": intraday_pct,
+            "volume": volume,
+            "rvol": rvol,
+            "float_shares": self.float_shares,
+            "float_rotation": float_rotation,
+            "off_high_pct": off_high_pct,
+            "dollar_volume": volume * last,
+        }
+
+    def scan(self, sort_by="change_pct", top_n=25):
+        """Filter and rank the universe. Returns a list of result dicts, best first."""
+        start = time.perf_counter()
+        if not self.symbols:
+            self.last_results = []
+            return self.last_results
+        m = self.compute()
+        f = self.filters
+        mask = (m["last"] >= f["min_price"]) & (m["last"] <= f["max_price"])
+        mask &= m["volume"] >= f["min_volume"]
+        mask &= np.nan_to_num(m["change_pct"], nan=-np.inf) >= f["min_change_pct"]
+        if f["min_rvol"]:
+            mask &= np.nan_to_num(m["rvol"], nan=0.0) >= f["min_rvol"]
+        if f["max_float"]:
+            mask &= np.nan_to_num(m["float_shares"], nan=np.inf) <= f["max_float"]
+        candidates = np.flatnonzero(mask)
+        key = np.nan_to_num(m[sort_by][candidates], nan=-np.inf)
+        if len(candidates) > top_n:
+            part = np.argpartition(-key, top_n)[:top_n]
+            candidates, key = candidates[part], key[part]
+        ranked = candidates[np.argsort(-key, kind="stable")]
+
+        results = []
+        for rank, i in enumerate(ranked, start=1):
+            row = {"rank": rank, "symbol": self.symbols[i]}
+            for name, values in m.items():
+                value = float(values[i])
+                row[name] = None if np.isnan(value) else round(value, 4)
+            results.append(row)
+        self.last_results = results
+        self.last_scan_ms = round((time.perf_counter() - start) * 1000, 2)
+        return results
+
+
+def fetch_snapshot(snapshot_file=None):
+    """Full-market snapshot rows, from a local file if configured, else the Polygon API."""
+    snapshot_file = snapshot_file or SCANNER_SNAPSHOT_FILE
+    if snapshot_file:
+        return load_snapshot_file(snapshot_file)
+    return get_rest_client().get_json(SNAPSHOT_PATH).get("tickers", [])
+
+
+class ScannerService:
+    """Background refresh loop that pushes ranked scanner results to the frontend."""
+
+    def __init__(self, emit=None, refresh_sec=SCANNER_REFRESH_SEC, snapshot_file=None):
+        reference = load_reference_file(SCANNER_REFERENCE_FILE) if SCANNER_REFERENCE_FILE else None
+        self.scanner = MomentumScanner(reference=reference)
+        self.emit = emit
+        self.refresh_sec = refresh_sec
+        self.snapshot_file = snapshot_file
+        self.sort_by = "change_pct"
+        self.top_n = 25
+        self.last_fetch_ms = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()  # start/stop come from Socket.IO handlers on any thread
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                if not self._stop.is_set():
+                    return
+                # Stopped but not exited yet (the stop may have landed mid-refresh): let it finish first
+                self._thread.join()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="momo-scanner", daemon=True)
+            self._thread.start()
+        logger.info(f"[Scanner] Started (refresh every {self.refresh_sec}s)")
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+
+    def refresh(self):
+        start = time.perf_counter()
+        tickers = fetch_snapshot(self.snapshot_file)
+        self.last_fetch_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.scanner.update(tickers)
+        self.scanner.scan(self.sort_by, self.top_n)
+        payload = self.payload()
+        if self.emit:
+            self.emit("scanner_results", payload)
+        return payload
+
+    def payload(self):
+        return {
+            "results": self.scanner.last_results,
+            "universe": len(self.scanner.symbols),
+            "rows_changed": self.scanner.rows_changed,
+            "fetch_ms": self.last_fetch_ms,
+            "update_ms": self.scanner.last_update_ms,
+            "scan_ms": self.scanner.last_scan_ms,
+            "sort_by": self.sort_by,
+            "filters": self.scanner.filters,
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"[Scanner] Refresh failed: {e}")
+            self._stop.wait(self.refresh_sec)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_scanner_service():
+    """Get or create the shared scanner service (emits through the app's Socket.IO server)."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                from ... import socketio
+                _service = ScannerService(emit=socketio.emit)
+    return _service
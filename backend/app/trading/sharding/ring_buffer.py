@@ -0,0 +1,105 @@
+# app/trading/sharding/ring_buffer.py
+
+import struct
+from multiprocessing import shared_memory
+
+# One normalized quote: symbol (ascii, NUL padded), exchange ts ms, bid, ask (NaN for a missing side),
+# bid size, ask size, replay flag (1 for gap-backfill quotes, which rebuild candles but never fire entries)
+SYMBOL_SIZE = 16
+RECORD = struct.Struct(f"<{SYMBOL_SIZE}sqddqq?")
+RECORD_SIZE = RECORD.size
+
+# Header: write sequence at offset 0, read sequence on its own cache line at offset 64
+_SEQ = struct.Struct("<Q")
+_WRITE_OFFSET = 0
+_READ_OFFSET = 64
+HEADER_SIZE = 128
+_NAN = float("nan")
+
+
+class QuoteRing:
+    """
+    Single-producer / single-consumer ring of quote records in shared memory.
+    The ingest process is the only writer of write_seq, the shard worker the only writer of read_seq,
+    so no lock is needed. Sequences only grow; slot = seq % capacity.
+    """
+
+    def __init__(self, shm, capacity, owner):
+        self.shm = shm
+        self.buf = shm.buf
+        self.capacity = capacity
+        self._owner = owner
+        self.dropped = 0
+
+    @classmethod
+    def create(cls, capacity=65536):
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + capacity * RECORD_SIZE)
+        _SEQ.pack_into(shm.buf, _WRITE_OFFSET, 0)
+        _SEQ.pack_into(shm.buf, _READ_OFFSET, 0)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name, capacity):
+        return cls(shared_memory.SharedMemory(name=name), capacity, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def write_seq(self):
+        return _SEQ.unpack_from(self.buf, _WRITE_OFFSET)[0]
+
+    @property
+    def read_seq(self):
+        return _SEQ.unpack_from(self.buf, _READ_OFFSET)[0]
+
+    def depth(self):
+        return self.write_seq - self.read_seq
+
+    def push(self, symbol, t_ms, bid, ask, bid_size, ask_size, replay=False):
+        """
+        Append one quote. Returns False (and counts a drop) if the consumer is a full ring behind.
+        A None bid or ask comes back out as None. ValueError for symbols longer than SYMBOL_SIZE.
+        """
+        encoded = symbol.encode("ascii")
+        if len(encoded) > SYMBOL_SIZE:
+            raise ValueError(f"Symbol {symbol!r} is longer than {SYMBOL_SIZE} characters")
+        buf = self.buf
+        write = _SEQ.unpack_from(buf, _WRITE_OFFSET)[0]
+        if write - _SEQ.unpack_from(buf, _READ_OFFSET)[0] >= self.capacity:
+            self.dropped += 1
+            return False
+        RECORD.pack_into(
+            buf, HEADER_SIZE + (write % self.capacity) * RECORD_SIZE,
+            encoded, t_ms, _NAN if bid is None else bid, _NAN if ask is None else ask,
+            int(bid_size or 0), int(ask_size or 0), replay
+        )
+        # Publish only after the record is fully written
+        _SEQ.pack_into(buf, _WRITE_OFFSET, write + 1)
+        return True
+
+    def pop_batch(self, max_items=512):
+        """Return up to max_items records as tuples (symbol, t_ms, bid, ask, bid_size, ask_size, replay)."""
+        buf = self.buf
+        read = _SEQ.unpack_from(buf, _READ_OFFSET)[0]
+        available = _SEQ.unpack_from(buf, _WRITE_OFFSET)[0] - read
+        if available <= 0:
+            return []
+        n = min(available, max_items)
+        capacity = self.capacity
+        unpack_from = RECORD.unpack_from
+        out = []
+        for seq in range(read, read + n):
+            sym, t_ms, bid, ask, bid_size, ask_size, replay = unpack_from(buf, HEADER_SIZE + (seq % capacity) * RECORD_SIZE)
+            # NaN != NaN: a missing side
+            out.append((sym.rstrip(b"\0").decode("ascii"), t_ms, bid if bid == bid else None,
+                        ask if ask == ask else None, bid_size, ask_size, replay))
+        _SEQ.pack_into(buf, _READ_OFFSET, read + n)
+        return out
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
@@ -0,0 +1,285 @@
+# app/trading/sharding/workers.py
+
+import os
+import time
+import zlib
+import queue
+import logging
+import threading
+import multiprocessing as mp
+
+from .ring_buffer import QuoteRing
+from ...utils.metrics import register_gauge
+from ...utils import tracing
+
+logger = logging.getLogger(__name__)
+
+MOMO_SHARD_WORKERS = int(os.getenv("MOMO_SHARD_WORKERS", "0"))
+SHARD_RING_CAPACITY = int(os.getenv("MOMO_SHARD_RING_CAPACITY", "65536"))
+# How long an idle worker sleeps between empty polls of its ring
+WORKER_IDLE_SLEEP = 0.0005
+
+
+def shard_for(symbol, num_shards):
+    """Stable symbol -> shard mapping (same in every process, unlike hash())."""
+    return zlib.crc32(symbol.encode("ascii")) % num_shards
+
+
+class _ForwardingSocketIO:
+    """Stands in for the Flask-SocketIO server inside a worker: every emit goes back to the ingest process."""
+
+    def __init__(self, decision_q):
+        self._decision_q = decision_q
+
+    def emit(self, event, data=None, **kwargs):
+        self._decision_q.put(("emit", event, data))
+
+
+def _install_worker_hooks(decision_q):
+    """
+    Workers run the normal candle builders and trackers, but must never talk to the browser,
+    the hotkey server or the DB themselves. Route those side effects back to the ingest process.
+    """
+    from ..core import trade_manager
+    from ...socketio_events import set_emitter
+
+    def forward_breakout(symbol, entry_price, entry_type, bid, ask):
+        # Carry the triggering quote's exchange timestamp so the ingest process can keep tracing it
+        trace = tracing.current_trace()
+        exchange_ts_ms = trace.exchange_ts_ms if trace is not None else None
+        decision_q.put(("entry", symbol, entry_price, entry_type, bid, ask, exchange_ts_ms))
+
+    trade_manager.handle_breakout_trigger = forward_breakout
+    set_emitter(_ForwardingSocketIO(decision_q))
+
+
+def _apply_control(msg):
+    import backend.app.shared_state as shared_state
+    from ..entries.custom_level import CustomLevelEntry
+    from ..core.strategy import set_entry_type, refresh_trigger_band
+    kind = msg[0]
+    if kind == "globals":
+        cfg = msg[1]
+        shared_state.watched_ticker = cfg["watched_ticker"]
+        shared_state.watchlist = set(cfg["watchlist"])
+        shared_state.breakout_ready = cfg["breakout_ready"]
+    elif kind == "config":
+        symbol, cfg = msg[1], msg[2]
+        state = shared_state.ticker_states[symbol]
+        set_entry_type(symbol, cfg.get("active_entry_type"), state)
+        custom_level = cfg.get("custom_level")
+        entry = state.get("custom_level_entry")
+        if entry is None:
+            state["custom_level_entry"] = CustomLevelEntry(symbol, custom_level)
+        elif entry.custom_level != custom_level:
+            entry.update_level(custom_level)
+        entry = state["custom_level_entry"]
+        if entry.export_levels() != cfg.get("levels", []):
+            entry.load_levels(cfg.get("levels", []))
+        refresh_trigger_band(symbol, state)
+
+
+def _worker_main(shard_id, ring_name, capacity, control_q, decision_q):
+    """Shard worker: drain quotes from the shared-memory ring through candle building and trackers."""
+    import backend.app.shared_state as shared_state
+    from ..stream.polygon_stream import SimpleQuote
+    from ..core.breakout_logic import process_quote_for_breakout
+    from ..core.candle_builder import handle_new_quote, handle_new_quote_10s, handle_new_quote_5m
+    from ..indicators.microstructure import update_quote_stats
+
+    _install_worker_hooks(decision_q)
+    ring = QuoteRing.attach(ring_name, capacity)
+    ticker_states = shared_state.ticker_states
+    logger.info(f"[Shard {shard_id}] Worker started (pid {os.getpid()})")
+    try:
+        while True:
+            try:
+                while True:
+                    msg = control_q.get_nowait()
+                    if msg[0] == "stop":
+                        return
+                    _apply_control(msg)
+            except queue.Empty:
+                pass
+
+            batch = ring.pop_batch()
+            if not batch:
+                time.sleep(WORKER_IDLE_SLEEP)
+                continue
+            for symbol, t_ms, bid, ask, bid_size, ask_size, replay in batch:
+                quote = SimpleQuote(
+                    symbol=symbol,
+                    ask_price=ask,
+                    bid_price=bid,
+                    ask_size=ask_size,
+                    bid_size=bid_size,
+                    timestamp_ms=t_ms
+                )
+                ticker_states[symbol]["last_quote"] = quote
+                tracing.start_trace(symbol, t_ms)
+                # Gap backfill: rebuild candles and tracker levels, never fire entries
+                shared_state.replay.active = replay
+                try:
+                    # Entry gates here read the worker's own copy of the quote stats
+                    update_quote_stats(symbol, quote)
+                    process_quote_for_breakout(symbol, quote)
+                    handle_new_quote(symbol, quote)
+                    handle_new_quote_10s(symbol, quote)
+                    handle_new_quote_5m(symbol, quote)
+                except Exception:
+                    logger.exception(f"[Shard {shard_id}] Failed to process quote for {symbol}")
+                finally:
+                    shared_state.replay.active = False
+                    tracing.end_trace()
+    finally:
+        ring.close()
+
+
+class ShardPool:
+    """
+    Optional multi-process topology: the ingest process (PolygonStream) decodes the feed and publishes
+    normalized quotes into one shared-memory ring per shard; N worker processes (symbols hashed to shards)
+    run candle building and pullback trackers. Entries and Socket.IO emits come back over a single
+    decision queue and are applied in the ingest process, which also keeps monitoring open positions
+    because that path owns the hotkey and DB side effects.
+    """
+
+    def __init__(self, num_workers, capacity=SHARD_RING_CAPACITY, decision_handler=None):
+        self.num_workers = num_workers
+        self.capacity = capacity
+        self.decision_handler = decision_handler or _apply_decision
+        self.rings = []
+        self.control_queues = []
+        self.processes = []
+        self.decision_q = None
+        self._drain_thread = None
+        self.decisions = 0
+
+    def start(self):
+        # fork keeps the already-imported app modules. Only the calling thread survives in the child, so start
+        # the pool before other threads can be holding locks (startup.start does this first)
+        ctx = mp.get_context("fork")
+        self.decision_q = ctx.Queue()
+        for shard_id in range(self.num_workers):
+            ring = QuoteRing.create(self.capacity)
+            control_q = ctx.Queue()
+            proc = ctx.Process(
+                target=_worker_main,
+                args=(shard_id, ring.name, self.capacity, control_q, self.decision_q),
+                name=f"momo-shard-{shard_id}",
+                daemon=True,
+            )
+            proc.start()
+            self.rings.append(ring)
+            self.control_queues.append(control_q)
+            self.processes.append(proc)
+        self._drain_thread = threading.Thread(target=self._drain_decisions, daemon=True)
+        self._drain_thread.start()
+        self.sync_globals()
+        register_gauge("shard_queue_depth", lambda: {f"shard_{i}": ring.depth() for i, ring in enumerate(self.rings)})
+        logger.info(f"[Shard] Started {self.num_workers} strategy workers")
+
+    def publish(self, symbol, event, replay=False):
+        """Hand a decoded Polygon Q event to the worker that owns symbol; replay marks gap-backfill quotes."""
+        return self.rings[shard_for(symbol, self.num_workers)].push(
+            symbol, event["t"], event.get("bp"), event.get("ap"), event.get("bs", 0), event.get("as", 0), replay
+        )
+
+    def sync_globals(self):
+        """Broadcast watched_ticker / watchlist / breakout_ready to every worker."""
+        import backend.app.shared_state as shared_state
+        cfg = {
+            "watched_ticker": shared_state.watched_ticker,
+            "watchlist": sorted(shared_state.watchlist),
+            "breakout_ready": shared_state.breakout_ready,
+        }
+        for control_q in self.control_queues:
+            control_q.put(("globals", cfg))
+
+    def sync_symbol(self, symbol):
+        """Push a symbol's entry configuration to the worker that owns it."""
+        from ...shared_state import ticker_states
+        state = ticker_states.get(symbol) or {}
+        entry = state.get("custom_level_entry")
+        cfg = {
+            "active_entry_type": state.get("active_entry_type"),
+            "custom_level": entry.custom_level if entry else None,
+            "levels": entry.export_levels() if entry else [],
+        }
+        self.control_queues[shard_for(symbol, self.num_workers)].put(("config", symbol, cfg))
+
+    def _drain_decisions(self):
+        while True:
+            try:
+                msg = self.decision_q.get()
+            except (EOFError, OSError):
+                return
+            if msg is None:
+                return
+            self.decisions += 1
+            try:
+                self.decision_handler(msg)
+            except Exception:
+                logger.exception(f"[Shard] Failed to apply decision {msg[:2]}")
+
+    def stats(self):
+        return [
+            {
+                "shard": i,
+                "pid": proc.pid,
+                "alive": proc.is_alive(),
+                "depth": ring.depth(),
+                "processed": ring.read_seq,
+                "dropped": ring.dropped,
+            }
+            for i, (ring, proc) in enumerate(zip(self.rings, self.processes))
+        ]
+
+    def stop(self):
+        for control_q in self.control_queues:
+            control_q.put(("stop",))
+        for proc in self.processes:
+            proc.join(timeout=2)
+            if proc.is_alive():
+                proc.terminate()
+        if self.decision_q is not None:
+            self.decision_q.put(None)
+        for ring in self.rings:
+            ring.close()
+
+
+_CANDLE_KEYS = {"10s": "candles_10s", "1m": "candles", "5m": "candles_5m"}
+
+def _apply_decision(msg):
+    """Default decision handler, runs in the ingest process."""
+    kind = msg[0]
+    if kind == "entry":
+        from ..core.trade_manager import handle_breakout_trigger
+        _, symbol, entry_price, entry_type, bid, ask, exchange_ts_ms = msg
+        tracing.start_trace(symbol, exchange_ts_ms)
+        tracing.hop("shard_decision")
+        try:
+            handle_breakout_trigger(symbol, entry_price, entry_type, bid, ask)
+        finally:
+            tracing.end_trace()
+    elif kind == "emit":
+        from ... import socketio
+        from ...shared_state import ticker_states
+        _, event, data = msg
+        # Keep the ingest process's candle history current so request_candles still works
+        if event == "candle_update" and data and "time" in data:
+            key = _CANDLE_KEYS.get(data.get("timeframe"))
+            if key:
+                candle = {
+                    "timestamp": data["time"] * 1000,
+                    "open": data["open"],
+                    "high": data["high"],
+                    "low": data["low"],
+                    "close": data["close"],
+                    "volume": data.get("volume", 0),
+                }
+                ticker_states[data["symbol"]].setdefault(key, []).append(candle)
+                # Positions live here, so candle-low trails and time stops get the close here too
+                from ..core.strategy import notify_candle_closed
+                notify_candle_closed(data["symbol"], data["timeframe"], candle)
+        socketio.emit(event, data)
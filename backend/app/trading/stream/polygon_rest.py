@@ -0,0 +1,210 @@
+# app/trading/stream/polygon_rest.py
+
+import os
+import time
+import random
+import logging
+import threading
+import requests
+
+from ...utils.metrics import register_gauge
+
+logger = logging.getLogger(__name__)
+
+POLYGON_REST_URL = "https://api.polygon.io"
+
+# Token bucket settings — set these to match the Polygon plan in .env
+POLYGON_RATE_LIMIT_PER_SEC = float(os.getenv("POLYGON_RATE_LIMIT_PER_SEC", "50"))
+POLYGON_RATE_BURST = int(os.getenv("POLYGON_RATE_BURST", "10"))
+POLYGON_MAX_RETRIES = int(os.getenv("POLYGON_MAX_RETRIES", "3"))
+POLYGON_TIMEOUT_SEC = float(os.getenv("POLYGON_TIMEOUT_SEC", "10"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket. acquire() blocks until a token is available."""
+
+    def __init__(self, rate_per_sec: float, burst: int):
+        self.rate = max(rate_per_sec, 0.001)
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping if needed. Returns seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _InflightCall:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PolygonRestClient:
+    """
+    Shared Polygon REST client.
+    - Concurrent identical requests share one in-flight HTTP call (single-flight).
+    - All upstream calls go through a token bucket rate limiter.
+    - 429/5xx and connection errors are retried with exponential backoff and full jitter.
+    - get_paginated() follows next_url until the requested number of results is collected.
+    """
+
+    def __init__(self, api_key=None, rate_per_sec=POLYGON_RATE_LIMIT_PER_SEC, burst=POLYGON_RATE_BURST,
+                 max_retries=POLYGON_MAX_RETRIES, timeout=POLYGON_TIMEOUT_SEC):
+        self.api_key = api_key or os.getenv("POLYGON_API_KEY")
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._bucket = TokenBucket(rate_per_sec, burst)
+        self._session = requests.Session()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "calls": 0,             # get_json() invocations
+            "hits": 0,              # upstream HTTP requests actually sent
+            "coalesced": 0,         # callers that waited on another caller's in-flight request
+            "throttled": 0,         # upstream requests that had to wait for a token
+            "throttle_delay_ms": 0.0,
+            "retries": 0,
+            "errors": 0,
+        }
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["inflight"] = len(self._inflight)
+        return stats
+
+    def _build_url(self, path_or_url):
+        if path_or_url.startswith("http"):
+            return path_or_url
+        return f"{POLYGON_REST_URL}{path_or_url}"
+
+    def get_json(self, path_or_url, params=None):
+        """
+        GET a Polygon endpoint and return the decoded JSON body.
+        Identical concurrent requests (same URL and params) are coalesced into one call.
+        """
+        if not self.api_key:
+            raise ValueError('POLYGON_API_KEY not set')
+        url = self._build_url(path_or_url)
+        params = dict(params or {})
+        key = (url, tuple(sorted(params.items())))
+        self._count("calls")
+
+        with self._inflight_lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InflightCall()
+                self._inflight[key] = call
+
+        if not leader:
+            self._count("coalesced")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._request_with_retry(url, params)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def _request_with_retry(self, url, params):
+        params["apiKey"] = self.api_key
+        attempt = 0
+        while True:
+            waited = self._bucket.acquire()
+            if waited > 0:
+                self._count("throttled")
+                self._count("throttle_delay_ms", waited * 1000)
+            self._count("hits")
+            retry_after = None
+            try:
+                resp = self._session.get(url, params=params, timeout=self.timeout)
+                if resp.status_code not in RETRYABLE_STATUS:
+                    resp.raise_for_status()
+                    return resp.json()
+                retry_after = resp.headers.get("Retry-After")
+                error = requests.HTTPError(f"{resp.status_code} from Polygon for {url}", response=resp)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except Exception:
+                self._count("errors")
+                raise
+
+            if attempt >= self.max_retries:
+                self._count("errors")
+                raise error
+            attempt += 1
+            self._count("retries")
+            # Exponential backoff with full jitter; honour Retry-After when Polygon sends one
+            delay = random.uniform(0, 0.25 * (2 ** attempt))
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            logger.warning(f"[PolygonREST] {error} — retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def get_paginated(self, path_or_url, params=None, max_results=None, max_pages=50):
+        """
+        Collect 'results' across pages by following next_url.
+        Stops after max_results items or max_pages pages, whichever comes first.
+        """
+        results = []
+        data = self.get_json(path_or_url, params)
+        pages = 1
+        while True:
+            results.extend(data.get("results", []) or [])
+            if max_results is not None and len(results) >= max_results:
+                return results[:max_results]
+            next_url = data.get("next_url")
+            if not next_url or pages >= max_pages:
+                return results
+            # next_url already carries the cursor and query; only apiKey has to be re-added
+            data = self.get_json(next_url)
+            pages += 1
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_rest_client():
+    """Get or create the shared Polygon REST client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PolygonRestClient()
+                register_gauge("polygon_rest", _client.stats)
+    return _client
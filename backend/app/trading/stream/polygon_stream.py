@@ -1,24 +1,39 @@
 # app/trading/stream/polygon_stream.py
 
 import os
+import time
 import asyncio
 import logging
 import websockets
 import json
 import traceback
-import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from ...state import config
+from ...shared_state import ticker_states
 from ..core.breakout_logic import process_quote_for_breakout
+from ..core.trade_monitor import check_trade_targets
+from ..core.strategy import manage_position_tick
 from ..core.trade_update import handle_trade_update
-from ..core.candle_builder import handle_new_quote, handle_new_quote_10s
+from ..core.candle_builder import handle_new_quote, handle_new_quote_10s, handle_new_quote_5m
+from ..core.trade_tape import handle_trade
+from ...events import publish
+from .polygon_rest import get_rest_client
+from ...utils.metrics import observe, incr
+from ...utils.tracing import start_trace, end_trace
+from ..utils.time_tools import to_ms, ms_to_datetime, now_ms
 
 logger = logging.getLogger(__name__)
 
 POLYGON_API_KEY = os.getenv("POLYGON_API_KEY")
 POLYGON_WS_URL = "wss://socket.polygon.io/stocks"
 
+# Reconnect backoff: start fast so transient drops recover in well under a second
+RECONNECT_MIN_DELAY = 0.05
+RECONNECT_MAX_DELAY = 5.0
+# Upper bound on quotes replayed per symbol after a reconnect
+BACKFILL_MAX_QUOTES = int(os.getenv("POLYGON_BACKFILL_MAX_QUOTES", "200000"))
+
 def fetch_historical_aggregated_bars(symbol, timeframe='1m', limit=500, to=None):
     """
     Fetch historical aggregated bars from Polygon REST API.
@@ -59,12 +74,11 @@ def fetch_historical_aggregated_bars(symbol, timeframe='1m', limit=500, to=None)
     # Clamp from_dt to not be in the future
     if from_dt > market_close_dt:
         from_dt = market_close_dt - timedelta(minutes=total_minutes)
-    url = f"https://api.polygon.io/v2/aggs/ticker/{symbol.upper()}/range/{multiplier}/{timespan}/{from_dt.date()}T{from_dt.time().strftime('%H:%M:%S')}/{to_dt.date()}T{to_dt.time().strftime('%H:%M:%S')}?adjusted=true&sort=asc&limit={limit}&apiKey={api_key}"
-    resp = requests.get(url)
-    resp.raise_for_status()
-    data = resp.json()
+    path = f"/v2/aggs/ticker/{symbol.upper()}/range/{multiplier}/{timespan}/{from_dt.date()}T{from_dt.time().strftime('%H:%M:%S')}/{to_dt.date()}T{to_dt.time().strftime('%H:%M:%S')}"
+    params = {'adjusted': 'true', 'sort': 'asc', 'limit': limit}
+    results = get_rest_client().get_paginated(path, params, max_results=limit)
     bars = []
-    for bar in data.get('results', []):
+    for bar in results:
         bars.append({
             'time': int(bar['t'] // 1000),
             'open': bar['o'],
@@ -75,6 +89,70 @@ def fetch_historical_aggregated_bars(symbol, timeframe='1m', limit=500, to=None)
         })
     return bars
 
+def fetch_quotes_since(symbol, since_ms, until_ms=None, max_results=BACKFILL_MAX_QUOTES):
+    """
+    Fetch NBBO quotes for symbol from the Polygon v3 quotes API, strictly after since_ms.
+    Returns events in the same shape as WebSocket Q messages ({t, ap, bp, as, bs}), oldest first.
+    """
+    params = {
+        'timestamp.gt': int(since_ms) * 1_000_000,
+        'order': 'asc',
+        'sort': 'timestamp',
+        'limit': 50000,
+    }
+    if until_ms is not None:
+        params['timestamp.lte'] = int(until_ms) * 1_000_000
+    results = get_rest_client().get_paginated(f"/v3/quotes/{symbol.upper()}", params, max_results=max_results)
+    events = []
+    for q in results:
+        ts_ns = q.get('sip_timestamp') or q.get('participant_timestamp')
+        if ts_ns is None:
+            continue
+        events.append({
+            't': ts_ns // 1_000_000,
+            'ap': q.get('ask_price'),
+            'bp': q.get('bid_price'),
+            'as': q.get('ask_size', 0),
+            'bs': q.get('bid_size', 0),
+        })
+    return events
+
+class SimpleQuote:
+    """
+    One NBBO quote. timestamp_ms (exchange epoch ms) is what the pipeline uses; the UTC datetime in
+    .timestamp is only built if something asks for it.
+    """
+    __slots__ = ("symbol", "ask_price", "bid_price", "ask_size", "bid_size", "timestamp_ms", "_timestamp")
+
+    def __init__(self, symbol, ask_price, bid_price, ask_size, bid_size, timestamp=None, timestamp_ms=None):
+        self.symbol = symbol
+        self.ask_price = ask_price
+        self.bid_price = bid_price
+        self.ask_size = ask_size
+        self.bid_size = bid_size
+        self.timestamp_ms = timestamp_ms if timestamp_ms is not None else to_ms(timestamp)
+        self._timestamp = timestamp if not isinstance(timestamp, (int, float)) else None
+
+    @property
+    def timestamp(self):
+        if self._timestamp is None:
+            self._timestamp = ms_to_datetime(self.timestamp_ms)
+        return self._timestamp
+
+    def to_dict(self):
+        return {"ask_price": self.ask_price, "bid_price": self.bid_price, "ask_size": self.ask_size,
+                "bid_size": self.bid_size, "timestamp_ms": self.timestamp_ms}
+
+def _quote_from_event(symbol, event):
+    return SimpleQuote(
+        symbol=symbol,
+        ask_price=event.get("ap"),
+        bid_price=event.get("bp"),
+        ask_size=event.get("as", 0),
+        bid_size=event.get("bs", 0),
+        timestamp_ms=event["t"]
+    )
+
 class PolygonStream:
     def __init__(self):
         self.ws = None
@@ -83,6 +161,10 @@ class PolygonStream:
         self._socketio = None
         self._connected = False
         self._subscribed_symbols = set()
+        self._last_event_ms = {}  # Latest exchange timestamp (ms) processed per symbol, used for gap backfill
+        self._backfilled_until_ms = {}  # Per symbol: quotes at or before this were replayed by the last backfill
+        self.symbol_stats = {}  # Per-symbol quote count, CPU time and feed lag (watchlist mode accounting)
+        self.shard_pool = None  # Optional ShardPool; when set, candle/tracker work runs in worker processes
         self.event_loop = None  # Store the event loop used for async scheduling
 
     def set_socketio(self, socketio):
@@ -92,70 +174,188 @@ class PolygonStream:
         logger.info(f"[Polygon] subscribe_to_ticker called for {symbol}")
         logger.info(f"[Polygon] self._connected={self._connected}, self.ws={self.ws}")
         self._active_symbol = symbol
+        # Remember the symbol even if we're offline so the reconnect path subscribes it
+        self._subscribed_symbols.add(symbol)
         if self.ws and self._connected:
             sub_msg = json.dumps({"action": "subscribe", "params": f"T.{symbol},Q.{symbol}"})
             logger.info(f"[Polygon] Sending subscription message: {sub_msg}")
             await self.ws.send(sub_msg)
             logger.info(f"[Polygon] Subscribed to {symbol} (trades & quotes)")
-            self._subscribed_symbols.add(symbol)
         else:
             logger.warning(f"[Polygon] WebSocket not connected. Cannot subscribe to {symbol} yet.")
 
-    async def _quote_handler(self, symbol, event):
+    async def subscribe_to_tickers(self, symbols):
+        """Subscribe to several symbols with a single subscribe message (watchlist mode)."""
+        symbols = [s for s in symbols if s]
+        if not symbols:
+            return
+        self._subscribed_symbols.update(symbols)
+        if self.ws and self._connected:
+            params = ",".join(f"T.{s},Q.{s}" for s in symbols)
+            await self.ws.send(json.dumps({"action": "subscribe", "params": params}))
+            logger.info(f"[Polygon] Subscribed to {len(symbols)} symbols: {', '.join(symbols)}")
+        else:
+            logger.warning(f"[Polygon] WebSocket not connected. Will subscribe to {symbols} on connect.")
+
+    async def unsubscribe_from_ticker(self, symbol):
+        self._subscribed_symbols.discard(symbol)
+        self._last_event_ms.pop(symbol, None)
+        self._backfilled_until_ms.pop(symbol, None)
+        if self.ws and self._connected:
+            await self.ws.send(json.dumps({"action": "unsubscribe", "params": f"T.{symbol},Q.{symbol}"}))
+            logger.info(f"[Polygon] Unsubscribed from {symbol}")
+
+    def get_symbol_stats(self):
+        """Per-symbol processing cost: quotes handled, CPU time and exchange-to-processing lag."""
+        result = {}
+        for symbol, st in self.symbol_stats.items():
+            quotes = st["quotes"]
+            result[symbol] = {
+                "quotes": quotes,
+                "cpu_ms": round(st["cpu_ns"] / 1e6, 3),
+                "avg_cpu_us": round(st["cpu_ns"] / quotes / 1e3, 2) if quotes else None,
+                "last_lag_ms": st["last_lag_ms"],
+                "max_lag_ms": st["max_lag_ms"],
+            }
+        return result
+
+    async def _quote_handler(self, symbol, event, recv_ns=None, recv_wall_ns=None):
+        cpu_start = time.thread_time_ns()
+        wall_start = time.perf_counter_ns()
+        # Every quote carries a trace context down to any order it triggers
+        start_trace(symbol, event.get("t"), recv_ns or wall_start, recv_wall_ns)
+        try:
+            await self._process_quote(symbol, event)
+        finally:
+            end_trace()
+            observe("quote_handler", time.perf_counter_ns() - wall_start)
+            incr("quote")
+            st = self.symbol_stats.get(symbol)
+            if st is None:
+                st = self.symbol_stats[symbol] = {"quotes": 0, "cpu_ns": 0, "last_lag_ms": 0, "max_lag_ms": 0}
+            st["quotes"] += 1
+            st["cpu_ns"] += time.thread_time_ns() - cpu_start
+            lag_ms = now_ms() - event["t"]
+            st["last_lag_ms"] = lag_ms
+            if lag_ms > st["max_lag_ms"]:
+                st["max_lag_ms"] = lag_ms
+
+    async def _process_quote(self, symbol, event):
         # Only quote events should be passed to candle-building functions
-        from datetime import datetime, timezone
-        from ...socketio_events import emit_price_update
-        class SimpleQuote:
-            def __init__(self, symbol, ask_price, bid_price, ask_size, bid_size, timestamp):
-                self.symbol = symbol
-                self.ask_price = ask_price
-                self.bid_price = bid_price
-                self.ask_size = ask_size
-                self.bid_size = bid_size
-                self.timestamp = timestamp
-        ts = datetime.fromtimestamp(event["t"] / 1000, tz=timezone.utc)
-        ask_price = event.get("ap")
-        bid_price = event.get("bp")
-        ask_size = event.get("as", 0)
-        bid_size = event.get("bs", 0)
-        quote = SimpleQuote(
-            symbol=symbol,
-            ask_price=ask_price,
-            bid_price=bid_price,
-            ask_size=ask_size,
-            bid_size=bid_size,
-            timestamp=ts
-        )
+        t_ms = event["t"]
+        backfilled_ms = self._backfilled_until_ms.get(symbol)
+        if backfilled_ms is not None and t_ms <= backfilled_ms:
+            # Already replayed by a gap backfill — don't double count it
+            return
+        last_ms = self._last_event_ms.get(symbol)
+        if last_ms is None or t_ms > last_ms:
+            self._last_event_ms[symbol] = t_ms
+        quote = _quote_from_event(symbol, event)
         # Update last_quote in state before any candle or breakout logic
-        from ...shared_state import ticker_states
-        if symbol not in ticker_states:
-            ticker_states[symbol] = {}
-        ticker_states[symbol]["last_quote"] = quote
-        # Emit price update to frontend
-        emit_price_update(
-            symbol,
-            quote.ask_price,
-            quote.bid_price,
-            quote.ask_size,
-            quote.bid_size,
-            quote.timestamp
-        )
+        state = ticker_states[symbol]
+        state.last_quote = quote
+        ticker_states.touch(symbol)
+        # Quote stats and the frontend price update
+        publish("quote", symbol, quote)
+        if self.shard_pool is not None:
+            # Candles and trackers run in the owning shard worker; open positions are monitored here
+            self.shard_pool.publish(symbol, event)
+            bid, ask = quote.bid_price, quote.ask_price
+            if state.position and bid is not None and ask is not None:
+                # The symbol's exit strategy (standard or managed); with no entry type, the fixed TP/stop checks
+                if not manage_position_tick(symbol, state, bid, ask):
+                    check_trade_targets(symbol, (bid + ask) / 2, bid, ask)
+            return
         # Tick-level breakout and trade target checks
-        from ..core.breakout_logic import process_quote_for_breakout
         process_quote_for_breakout(symbol, quote)
         handle_new_quote(symbol, quote)
         handle_new_quote_10s(symbol, quote)
-        from ..core.candle_builder import handle_new_quote_5m
         handle_new_quote_5m(symbol, quote)
         # Do not call candle-building functions for trade events!
 
+    async def _backfill_gaps(self):
+        """
+        After a reconnect, fetch the quotes missed while disconnected and replay them through
+        the candle builders in order. Live messages queue on the socket until this returns.
+        """
+        import backend.app.shared_state as shared_state
+        loop = asyncio.get_running_loop()
+        for symbol in list(self._subscribed_symbols):
+            since_ms = self._last_event_ms.get(symbol)
+            if since_ms is None:
+                continue
+            try:
+                events = await loop.run_in_executor(None, fetch_quotes_since, symbol, since_ms)
+            except Exception as e:
+                logger.error(f"[Polygon] Backfill failed for {symbol}: {e}")
+                continue
+            if not events:
+                continue
+            logger.info(f"[Polygon] Backfilling {len(events)} quotes for {symbol} since {since_ms}")
+            if self.shard_pool is not None:
+                # The owning worker builds this symbol's candles; the replay flag keeps it from firing entries
+                replayed = 0
+                for event in events:
+                    if not self.shard_pool.publish(symbol, event, replay=True):
+                        break
+                    replayed += 1
+                if replayed < len(events):
+                    # The rest stays unmarked, so the next reconnect backfills it again
+                    logger.warning("[Polygon] Shard ring full: replayed %d of %d backfill quotes for %s",
+                                   replayed, len(events), symbol)
+                if replayed:
+                    self._last_event_ms[symbol] = self._backfilled_until_ms[symbol] = events[replayed - 1]["t"]
+                continue
+            # Historical quotes must rebuild candles and tracker levels but never fire entries
+            shared_state.replay.active = True
+            try:
+                for event in events:
+                    quote = _quote_from_event(symbol, event)
+                    handle_new_quote(symbol, quote)
+                    handle_new_quote_10s(symbol, quote)
+                    handle_new_quote_5m(symbol, quote)
+                    self._last_event_ms[symbol] = self._backfilled_until_ms[symbol] = event["t"]
+            finally:
+                shared_state.replay.active = False
+
     async def _trade_handler(self, symbol, event):
-        # Only log trade events for informational purposes; do not use for breakouts or trade history
-        # logger.info(f"[Polygon] (INFO) Trade event received for {symbol}: {event}")
-        # No further processing
-        pass
+        # Prints feed the trade tape (true volume, trade bars); breakouts and trade history stay on quotes
+        try:
+            handle_trade(symbol, event)
+        except Exception as e:
+            logger.error(f"[Polygon] Failed to add trade for {symbol} to the tape: {e}")
+
+    async def run_synthetic(self, feed):
+        """
+        Drive the quote pipeline from a SyntheticQuoteFeed instead of the Polygon WebSocket
+        (load tests, running without an API key). Events are stamped with the current wall time
+        and paced at the feed's rate, including its bursts.
+        """
+        from ... import socketio
+        # The stream thread starts on import; wait until create_app() has attached the Socket.IO server
+        while getattr(socketio, "server", None) is None:
+            await asyncio.sleep(0.1)
+        loop = asyncio.get_running_loop()
+        logger.info(f"[Polygon] Synthetic feed: {len(feed.symbols)} symbols at {feed.rate:.0f} quotes/s")
+        next_at = loop.time()
+        while True:
+            event = feed.next_event()
+            event["t"] = now_ms()
+            try:
+                await self._quote_handler(event["sym"], event)
+            except Exception as e:
+                logger.error(f"[Polygon] Synthetic quote failed: {e}\n{traceback.format_exc()}")
+            next_at += feed.last_gap_ms / 1000.0
+            delay = next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -1.0:
+                # More than a second behind: drop the backlog rather than spin forever
+                next_at = loop.time()
+                await asyncio.sleep(0)
 
     async def run_forever(self):
+        reconnect_delay = RECONNECT_MIN_DELAY
         while True:
             try:
                 logger.info("[Polygon] Connecting to Polygon WebSocket...")
@@ -174,11 +374,17 @@ class PolygonStream:
                         logger.info(f"[Polygon] Sending subscription message (reconnect): {sub_msg}")
                         await ws.send(sub_msg)
                         logger.info(f"[Polygon] Subscribed to {symbol} (trades & quotes)")
+                    # Fill the hole left by the disconnect before resuming live processing
+                    await self._backfill_gaps()
+                    reconnect_delay = RECONNECT_MIN_DELAY
                     # Main receive loop
                     async for message in ws:
                         #logger.info(f"[Polygon] Raw message received: {message}")
                         try:
+                            decode_start = time.perf_counter_ns()
+                            recv_wall_ns = time.time_ns()
                             data = json.loads(message)
+                            observe("frame_decode", time.perf_counter_ns() - decode_start)
                             if not isinstance(data, list):
                                 data = [data]
                             for event in data:
@@ -186,14 +392,16 @@ class PolygonStream:
                                 symbol = event.get("sym")
                                 if ev_type and symbol:
                                     if ev_type.startswith("T"):  # Trade
+                                        incr("trade")
                                         #logger.info(f"[Polygon] Trade tick for {symbol}: {event}")
                                         await self._trade_handler(symbol, event)
                                     elif ev_type.startswith("Q"):  # Quote
                                         #logger.info(f"[Polygon] Quote tick for {symbol}: {event}")
-                                        await self._quote_handler(symbol, event)
+                                        await self._quote_handler(symbol, event, decode_start, recv_wall_ns)
                         except Exception as e:
                             logger.error(f"[Polygon] Error parsing message: {e}\n{traceback.format_exc()}")
             except Exception as e:
-                logger.error(f"[Polygon] WebSocket error: {e}. Reconnecting in 5s...")
+                logger.error(f"[Polygon] WebSocket error: {e}. Reconnecting in {reconnect_delay:.2f}s...")
                 self._connected = False
-                await asyncio.sleep(5)
\ No newline at end of file
+                await asyncio.sleep(reconnect_delay)
+                reconnect_delay = min(reconnect_delay * 2, RECONNECT_MAX_DELAY)
\ No newline at end of file
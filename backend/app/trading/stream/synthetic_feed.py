@@ -0,0 +1,79 @@
+"""
+Synthetic Polygon quote feed for benchmarks, load tests and running the server without a Polygon key.
+
+Generates Q events ({"ev", "sym", "t", "bp", "ap", "bs", "as"}) as a per-symbol random walk:
+- rate:        average quotes per second across all symbols (drives event timestamps)
+- volatility:  per-quote standard deviation of the mid price, as a fraction of price
+- spread:      bid/ask spread in dollars
+- burstiness:  0 = evenly spaced quotes; closer to 1 = more quotes arrive in tight bursts
+               separated by quiet gaps (the average rate is unchanged)
+"""
+
+import os
+import random
+
+
+class SyntheticQuoteFeed:
+    def __init__(self, symbols=("SYNTH",), rate=1000.0, volatility=0.002, spread=0.01, burstiness=0.0,
+                 start_price=5.0, start_ms=1_760_000_000_000, seed=7):
+        self.symbols = list(symbols)
+        self.rate = max(float(rate), 0.001)
+        self.volatility = volatility
+        self.spread = spread
+        self.burstiness = min(max(burstiness, 0.0), 0.99)
+        self.rng = random.Random(seed)
+        self.prices = {s: start_price * self.rng.uniform(0.8, 1.2) for s in self.symbols}
+        self.t_ms = float(start_ms)
+        self._burst_left = 0
+        self.last_gap_ms = 0.0
+
+    def _next_gap_ms(self):
+        mean_gap = 1000.0 / self.rate
+        if self.burstiness <= 0:
+            return mean_gap
+        # Bursts: a run of near-zero gaps, then one long gap that restores the average rate
+        if self._burst_left > 0:
+            self._burst_left -= 1
+            return mean_gap * (1 - self.burstiness)
+        burst_len = 1 + int(self.rng.expovariate(1.0) * 20 * self.burstiness)
+        self._burst_left = burst_len - 1
+        return mean_gap * (1 + self.burstiness * (burst_len - 1))
+
+    def next_event(self):
+        symbol = self.symbols[self.rng.randrange(len(self.symbols))] if len(self.symbols) > 1 else self.symbols[0]
+        price = self.prices[symbol]
+        price = max(0.05, price * (1 + self.rng.gauss(0, self.volatility)))
+        self.prices[symbol] = price
+        self.last_gap_ms = self._next_gap_ms()
+        self.t_ms += self.last_gap_ms
+        half = self.spread / 2
+        return {
+            "ev": "Q",
+            "sym": symbol,
+            "t": int(self.t_ms),
+            "bp": round(price - half, 2),
+            "ap": round(price + half, 2),
+            "bs": self.rng.randint(1, 50),
+            "as": self.rng.randint(1, 50),
+        }
+
+    def events(self, count):
+        """Pre-generate `count` events so generation cost stays out of measurements."""
+        return [self.next_event() for _ in range(count)]
+
+    def __iter__(self):
+        while True:
+            yield self.next_event()
+
+
+def synthetic_feed_from_env():
+    """Build a feed from MOMO_SYNTHETIC_FEED=SYM1,SYM2 (plus MOMO_SYNTHETIC_RATE / _BURSTINESS), or None if unset."""
+    symbols = [s.strip().upper() for s in os.getenv("MOMO_SYNTHETIC_FEED", "").split(",") if s.strip()]
+    if not symbols:
+        return None
+    return SyntheticQuoteFeed(
+        symbols=symbols,
+        rate=float(os.getenv("MOMO_SYNTHETIC_RATE", "50")),
+        volatility=float(os.getenv("MOMO_SYNTHETIC_VOLATILITY", "0.002")),
+        burstiness=float(os.getenv("MOMO_SYNTHETIC_BURSTINESS", "0")),
+    )
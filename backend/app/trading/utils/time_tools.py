@@ -1,4 +1,186 @@
-from datetime import datetime, timezone
+"""
+Time handling for the quote pipeline.
+
+Timestamps travel as integer epoch milliseconds (Polygon's "t") or nanoseconds from the socket all the way
+through candles and trackers; bucketing is integer arithmetic. datetime objects are only built at the edges
+(API responses, logs, trade records) via the conversion helpers below.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from ...utils.timezone_utils import EASTERN_TZ
+
+NS_PER_MS = 1_000_000
+MS_PER_SEC = 1000
+MS_PER_MIN = 60 * MS_PER_SEC
+MS_PER_HOUR = 60 * MS_PER_MIN
+MS_PER_DAY = 24 * MS_PER_HOUR
+
+INTERVAL_MS = {"10s": 10 * MS_PER_SEC, "1m": MS_PER_MIN, "5m": 5 * MS_PER_MIN}
+_UNIT_MS = {"s": MS_PER_SEC, "m": MS_PER_MIN, "h": MS_PER_HOUR, "d": MS_PER_DAY}
+
+
+def interval_ms(interval) -> int:
+    """'10s', '1m', '5m', '2h', ... (or a number of ms) → milliseconds."""
+    if isinstance(interval, int):
+        return interval
+    ms = INTERVAL_MS.get(interval)
+    if ms is None:
+        ms = int(interval[:-1]) * _UNIT_MS[interval[-1]]
+    return ms
+
+
+def bucket_ms(ts_ms: int, interval: int) -> int:
+    """Start (epoch ms) of the interval-ms bucket containing ts_ms."""
+    return ts_ms - ts_ms % interval
+
+
+def bucket_ns(ts_ns: int, interval_ns: int) -> int:
+    return ts_ns - ts_ns % interval_ns
+
+
+def now_ms() -> int:
+    return time.time_ns() // NS_PER_MS
+
+
+def to_ms(ts) -> int:
+    """Epoch ms from an int/float ms value, a datetime (naive = UTC) or an ISO string."""
+    if isinstance(ts, int):
+        return ts
+    if isinstance(ts, float):
+        return int(ts)
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * MS_PER_SEC)
+
+
+def ms_to_datetime(ts_ms: int) -> datetime:
+    """UTC datetime for an epoch ms timestamp."""
+    return datetime.fromtimestamp(ts_ms / MS_PER_SEC, tz=timezone.utc)
+
+
+def ms_to_iso(ts_ms: int) -> str:
+    return ms_to_datetime(ts_ms).isoformat()
+
+
+# --- Eastern Time -------------------------------------------------------------------------------------
+
+# DST changes on an hour boundary, so the ET offset is constant within each UTC hour
+_et_offsets = {}
+_fixed_zones = {}
+
+
+def et_offset_ms(ts_ms: int) -> int:
+    """UTC offset of US/Eastern at ts_ms, in ms (e.g. -4h in summer). Cached per UTC hour."""
+    hour = ts_ms // MS_PER_HOUR
+    offset = _et_offsets.get(hour)
+    if offset is None:
+        if len(_et_offsets) > 10_000:
+            _et_offsets.clear()
+        utc = datetime.fromtimestamp(hour * 3600, tz=timezone.utc)
+        offset = _et_offsets[hour] = int(utc.astimezone(EASTERN_TZ).utcoffset().total_seconds() * MS_PER_SEC)
+    return offset
+
+
+def ms_to_eastern(ts_ms: int) -> datetime:
+    """Eastern Time datetime for an epoch ms timestamp (fixed-offset tzinfo, same wall time and ISO form as pytz)."""
+    offset = et_offset_ms(ts_ms)
+    tz = _fixed_zones.get(offset)
+    if tz is None:
+        tz = _fixed_zones[offset] = timezone(timedelta(milliseconds=offset))
+    return datetime.fromtimestamp(ts_ms / MS_PER_SEC, tz=tz)
+
+
+def eastern_iso(ts_ms: int = None) -> str:
+    """ISO string in Eastern Time for ts_ms (default: now)."""
+    return ms_to_eastern(now_ms() if ts_ms is None else ts_ms).isoformat()
+
+
+# --- Session calendar ---------------------------------------------------------------------------------
+
+PREMARKET_OPEN = 4 * MS_PER_HOUR
+REGULAR_OPEN = 9 * MS_PER_HOUR + 30 * MS_PER_MIN
+REGULAR_CLOSE = 16 * MS_PER_HOUR
+AFTERHOURS_CLOSE = 20 * MS_PER_HOUR
+
+
+class SessionDay:
+    """Epoch-ms boundaries of one ET trading day."""
+    __slots__ = ("date", "start", "end", "premarket_open", "regular_open", "regular_close", "afterhours_close", "trading")
+
+    def __init__(self, date, midnight_ms, next_midnight_ms, trading):
+        self.date = date
+        self.start = midnight_ms
+        self.end = next_midnight_ms  # 23 or 25 hours later on DST days
+        self.premarket_open = midnight_ms + PREMARKET_OPEN
+        self.regular_open = midnight_ms + REGULAR_OPEN
+        self.regular_close = midnight_ms + REGULAR_CLOSE
+        self.afterhours_close = midnight_ms + AFTERHOURS_CLOSE
+        self.trading = trading
+
+    def session(self, ts_ms):
+        if not self.trading or ts_ms < self.premarket_open or ts_ms >= self.afterhours_close:
+            return "closed"
+        if ts_ms < self.regular_open:
+            return "premarket"
+        if ts_ms < self.regular_close:
+            return "regular"
+        return "afterhours"
+
+
+class SessionCalendar:
+    """
+    Premarket / regular / after-hours boundaries per ET day, computed once per day and cached.
+    Lookups for the current day are two integer comparisons. Weekends are closed; exchange holidays
+    can be passed in as a set of dates.
+    """
+
+    def __init__(self, holidays=None):
+        self.holidays = set(holidays or ())
+        self._days = {}
+        self._last = None
+
+    def day(self, ts_ms: int) -> SessionDay:
+        last = self._last
+        if last is not None and last.start <= ts_ms < last.end:
+            return last
+        # The ET date of ts_ms; DST shifts happen at 2am, outside every session boundary
+        local = datetime.fromtimestamp((ts_ms + et_offset_ms(ts_ms)) / MS_PER_SEC, tz=timezone.utc).date()
+        day = self._days.get(local)
+        if day is None:
+            midnight = EASTERN_TZ.localize(datetime(local.year, local.month, local.day))
+            following = local + timedelta(days=1)
+            next_midnight = EASTERN_TZ.localize(datetime(following.year, following.month, following.day))
+            day = SessionDay(local, int(midnight.timestamp() * MS_PER_SEC), int(next_midnight.timestamp() * MS_PER_SEC),
+                             local.weekday() < 5 and local not in self.holidays)
+            if len(self._days) > 366:
+                self._days.clear()
+            self._days[local] = day
+        self._last = day
+        return day
+
+    def session(self, ts_ms: int) -> str:
+        """'premarket', 'regular', 'afterhours' or 'closed'."""
+        return self.day(ts_ms).session(ts_ms)
+
+    def is_open(self, ts_ms: int) -> bool:
+        return self.day(ts_ms).session(ts_ms) != "closed"
+
+
+_calendar = None
+
+
+def get_session_calendar() -> SessionCalendar:
+    global _calendar
+    if _calendar is None:
+        _calendar = SessionCalendar()
+    return _calendar
+
+
+# --- ISO string buckets (kept for callers that still hold string timestamps) ---------------------------
 
 def get_minute_bucket(timestamp: str) -> str:
     """
@@ -7,13 +189,12 @@ def get_minute_bucket(timestamp: str) -> str:
     Returns: "2025-07-21T14:32:00Z"
     """
     try:
-        dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-        bucket = dt.replace(second=0, microsecond=0).astimezone(timezone.utc)
-        return bucket.isoformat().replace("+00:00", "Z")
+        return ms_to_iso(bucket_ms(to_ms(timestamp), MS_PER_MIN)).replace("+00:00", "Z")
     except Exception as e:
         print(f"[TimeTools] Failed to parse timestamp: {timestamp} — {e}")
         return timestamp
 
+
 def get_10s_bucket(timestamp: str) -> str:
     """
     Round the timestamp down to the nearest 10-second interval.
@@ -21,10 +202,7 @@ def get_10s_bucket(timestamp: str) -> str:
     Returns: "2025-07-21T14:32:40Z"
     """
     try:
-        dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-        bucket_second = (dt.second // 10) * 10
-        bucket = dt.replace(second=bucket_second, microsecond=0).astimezone(timezone.utc)
-        return bucket.isoformat().replace("+00:00", "Z")
+        return ms_to_iso(bucket_ms(to_ms(timestamp), 10 * MS_PER_SEC)).replace("+00:00", "Z")
     except Exception as e:
         print(f"[TimeTools] Failed to parse timestamp for 10s bucket: {timestamp} — {e}")
-        return timestamp
\ No newline at end of file
+        return timestamp
@@ -5,6 +5,9 @@ import websockets
 import logging
 from typing import List, Optional
 
+from .metrics import timed
+from . import tracing
+
 logger = logging.getLogger(__name__)
 
 HOTKEY_SERVER_URL = "ws://192.168.1.28:8765"
@@ -48,6 +51,7 @@ async def send_hotkey_sequence(actions: List[str]) -> bool:
         await asyncio.sleep(0.1)
     return True
 
+@timed("hotkey_trigger")
 def trigger_hotkey(action: str) -> None:
     """
     Trigger a hotkey action asynchronously without blocking.
@@ -55,6 +59,7 @@ def trigger_hotkey(action: str) -> None:
     Args:
         action: The action string to send
     """
+    tracing.hop(f"trigger_hotkey_{action}")
     try:
         # Try to create task if we're in an async context
         asyncio.create_task(send_hotkey(action))
@@ -74,6 +79,7 @@ def trigger_hotkey(action: str) -> None:
         thread.daemon = True
         thread.start()
 
+@timed("hotkey_sequence")
 def trigger_hotkey_sequence(actions: List[str]) -> None:
     """
     Trigger multiple hotkey actions in sequence asynchronously without blocking.
@@ -0,0 +1,206 @@
+"""
+Logging setup: records are queued by the calling thread and written by a background listener,
+so the quote path never blocks on terminal I/O. The listener is stopped for the duration of a fork (and
+restarted in the parent), so no thread is mid-write when the child is copied; forked children (shard
+workers) have no listener thread, so they switch to writing directly right after the fork.
+"""
+
+import os
+import sys
+import queue
+import atexit
+import threading
+import logging
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from .timezone_utils import EASTERN_TZ
+
+LOG_FORMAT = '[%(asctime)s] %(levelname)s in %(name)s: %(message)s'
+
+# Per-module rate limit for repeats of the same message: at most LOG_RATE_LIMIT per LOG_RATE_WINDOW_SEC.
+# MOMO_LOG_RATE_LIMITS overrides it per logger prefix, e.g. "backend.app.trading.pullbacks=2,backend.app.routes=0" (0 = unlimited)
+LOG_RATE_LIMIT = int(os.getenv("MOMO_LOG_RATE_LIMIT", "20"))
+LOG_RATE_WINDOW_SEC = float(os.getenv("MOMO_LOG_RATE_WINDOW_SEC", "1"))
+# Bound on distinct (module, call site) keys tracked before the table is reset
+_MAX_RATE_KEYS = 10000
+
+
+def _parse_overrides(spec):
+    overrides = {}
+    for item in (spec or "").split(","):
+        name, sep, limit = item.strip().partition("=")
+        if sep and limit.strip().isdigit():
+            overrides[name.strip()] = int(limit)
+    return overrides
+
+
+class EasternTimeFormatter(logging.Formatter):
+    """Eastern Time timestamps taken from record.created; the date/time prefix is cached per second."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = None
+        self._cached_prefix = ''
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return datetime.fromtimestamp(record.created, EASTERN_TZ).strftime(datefmt)
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_prefix = datetime.fromtimestamp(second, EASTERN_TZ).strftime('%Y-%m-%d %H:%M:%S')
+            self._cached_second = second
+        return f"{self._cached_prefix},{int(record.msecs):03d}"
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops repeats of the same message beyond the module's limit per window. A message is identified by its
+    logger and call site, so f-string messages that differ on every call are still limited.
+    ERROR and above always pass. The first record let through after a window notes how many were dropped.
+    Filters run on every logging thread, so the buckets are updated under a lock.
+    """
+
+    def __init__(self, limit=LOG_RATE_LIMIT, window=LOG_RATE_WINDOW_SEC, overrides=None):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.overrides = overrides if overrides is not None else _parse_overrides(os.getenv("MOMO_LOG_RATE_LIMITS"))
+        self._limits = {}
+        self._buckets = {}  # (name, pathname, lineno) -> [window_start, count, suppressed]
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+
+    def limit_for(self, name):
+        limit = self._limits.get(name)
+        if limit is None:
+            limit = self.limit
+            best = -1
+            for prefix, value in self.overrides.items():
+                if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                    limit, best = value, len(prefix)
+            self._limits[name] = limit
+        return limit
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        limit = self.limit_for(record.name)
+        if limit <= 0:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = record.created
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or now - bucket[0] >= self.window:
+                if len(self._buckets) >= _MAX_RATE_KEYS:
+                    self._buckets.clear()
+                self._buckets[key] = [now, 1, 0]
+                suppressed = bucket[2] if bucket is not None else 0
+            else:
+                bucket[1] += 1
+                if bucket[1] <= limit:
+                    return True
+                bucket[2] += 1
+                self.suppressed_total += 1
+                return False
+        if suppressed:
+            record.msg = f"{record.msg} (+{suppressed} similar suppressed)"
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Puts records on the log queue with only the message merged (cheap and safe against later mutation
+    of the args); timestamp formatting and the write happen on the listener thread.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+class FlushableQueueListener(QueueListener):
+    def flush(self):
+        """Block until every queued record has been written."""
+        self.queue.join()
+
+
+_listener = None
+_stream = None
+_paused_for_fork = False
+
+
+def configure_logging(level=logging.INFO, stream=None):
+    """
+    Route the root logger through a queue to a StreamHandler running on a listener thread.
+    Safe to call more than once; returns the listener.
+    """
+    global _listener, _stream
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    # Remove existing handlers to avoid duplicates
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+
+    _stream = stream or sys.stderr
+    stream_handler = logging.StreamHandler(_stream)
+    stream_handler.setFormatter(EasternTimeFormatter(fmt=LOG_FORMAT))
+
+    log_queue = queue.Queue(-1)
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    root_logger.addHandler(queue_handler)
+
+    _listener = FlushableQueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _before_fork():
+    # Drain and stop the listener thread so the child doesn't inherit a lock it was holding
+    global _paused_for_fork
+    if _listener is not None:
+        _listener.stop()
+        _paused_for_fork = True
+
+
+def _after_fork_in_parent():
+    global _paused_for_fork
+    if _paused_for_fork:
+        _paused_for_fork = False
+        _listener.start()
+
+
+def _after_fork_in_child():
+    """The child inherits the queue handler but not the listener thread: write records directly instead."""
+    global _listener, _paused_for_fork
+    _paused_for_fork = False
+    if _listener is None:
+        return
+    # Don't stop() it: its thread only exists in the parent
+    _listener = None
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root_logger.removeHandler(handler)
+    stream_handler = logging.StreamHandler(_stream)
+    stream_handler.setFormatter(EasternTimeFormatter(fmt=LOG_FORMAT))
+    stream_handler.addFilter(RateLimitFilter())
+    root_logger.addHandler(stream_handler)
+
+
+atexit.register(_stop_listener)
+os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent, after_in_child=_after_fork_in_child)
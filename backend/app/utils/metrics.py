@@ -0,0 +1,196 @@
+# app/utils/metrics.py
+
+import time
+import functools
+import inspect
+import threading
+from typing import Callable, Dict
+
+# Log-linear (HDR-style) buckets: values below 2**SUB_BITS+1 ns are exact, above that each power of two
+# is split into 2**SUB_BITS sub-buckets, so any recorded value is within ~6% of its bucket bound.
+SUB_BITS = 4
+SUB_COUNT = 1 << SUB_BITS
+_LINEAR_LIMIT = SUB_COUNT * 2
+NUM_BUCKETS = SUB_COUNT * 40  # covers up to ~2**39 ns (~9 minutes)
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def _bucket_index(value_ns: int) -> int:
+    if value_ns < _LINEAR_LIMIT:
+        return value_ns if value_ns > 0 else 0
+    shift = value_ns.bit_length() - (SUB_BITS + 1)
+    idx = SUB_COUNT * (shift + 1) + (value_ns >> shift) - SUB_COUNT
+    return idx if idx < NUM_BUCKETS else NUM_BUCKETS - 1
+
+
+def _bucket_upper(idx: int) -> int:
+    if idx < _LINEAR_LIMIT:
+        return idx
+    shift = idx // SUB_COUNT - 1
+    mantissa = idx % SUB_COUNT + SUB_COUNT
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of nanosecond latencies. record() is a couple of int ops."""
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, value_ns: int):
+        self.counts[_bucket_index(value_ns)] += 1
+        self.count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentile(self, q: float) -> int:
+        if self.count == 0:
+            return 0
+        target = q * self.count
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            if n:
+                seen += n
+                if seen >= target:
+                    return min(_bucket_upper(idx), self.max_ns)
+        return self.max_ns
+
+    def snapshot(self) -> Dict[str, float]:
+        result = {
+            "count": self.count,
+            "mean_us": round(self.total_ns / self.count / 1e3, 2) if self.count else 0.0,
+            "max_us": round(self.max_ns / 1e3, 2),
+        }
+        for q in QUANTILES:
+            result[f"p{q * 100:g}_us"] = round(self.percentile(q) / 1e3, 2)
+        return result
+
+
+_histograms: Dict[str, LatencyHistogram] = {}
+_counters: Dict[tuple, int] = {}
+_gauges: Dict[str, Callable[[], Dict[str, float]]] = {}
+_lock = threading.Lock()
+_overhead_ns = None
+
+
+def get_histogram(stage: str) -> LatencyHistogram:
+    hist = _histograms.get(stage)
+    if hist is None:
+        with _lock:
+            hist = _histograms.setdefault(stage, LatencyHistogram())
+    return hist
+
+
+def observe(stage: str, duration_ns: int):
+    """Record one duration for a pipeline stage."""
+    hist = _histograms.get(stage)
+    if hist is None:
+        hist = get_histogram(stage)
+    hist.record(duration_ns)
+
+
+def incr(event: str, amount: int = 1, label: str = ""):
+    """Bump an event counter (exported as momo_events_total{event=..., label=...})."""
+    key = (event, label)
+    _counters[key] = _counters.get(key, 0) + amount
+
+
+def register_gauge(name: str, fn: Callable[[], Dict[str, float]]):
+    """Register a callback returning {label: value}, sampled at scrape time (e.g. queue depths)."""
+    _gauges[name] = fn
+
+
+def timed(stage: str):
+    """Decorator recording each call's wall time into the stage histogram. Works for sync and async functions."""
+    def decorator(fn):
+        hist = get_histogram(stage)
+        perf_counter_ns = time.perf_counter_ns
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = perf_counter_ns()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    hist.record(perf_counter_ns() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.record(perf_counter_ns() - start)
+        return wrapper
+    return decorator
+
+
+def measure_overhead(iterations: int = 100_000) -> float:
+    """Nanoseconds added per call by @timed, measured against the same no-op undecorated."""
+    def noop():
+        return None
+    wrapped = timed("_overhead_probe")(noop)
+    perf_counter_ns = time.perf_counter_ns
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        noop()
+    bare = perf_counter_ns() - start
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        wrapped()
+    instrumented = perf_counter_ns() - start
+    _histograms.pop("_overhead_probe", None)
+    return max(0.0, (instrumented - bare) / iterations)
+
+
+def stage_summary() -> Dict[str, Dict[str, float]]:
+    return {stage: hist.snapshot() for stage, hist in sorted(_histograms.items())}
+
+
+def render_prometheus() -> str:
+    """All histograms, counters and gauges in Prometheus text exposition format."""
+    global _overhead_ns
+    if _overhead_ns is None:
+        _overhead_ns = measure_overhead()
+    lines = [
+        "# HELP momo_stage_latency_seconds Wall time per pipeline stage.",
+        "# TYPE momo_stage_latency_seconds summary",
+    ]
+    for stage, hist in sorted(_histograms.items()):
+        for q in QUANTILES:
+            lines.append(f'momo_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {hist.percentile(q) / 1e9:.9f}')
+        lines.append(f'momo_stage_latency_seconds_sum{{stage="{stage}"}} {hist.total_ns / 1e9:.9f}')
+        lines.append(f'momo_stage_latency_seconds_count{{stage="{stage}"}} {hist.count}')
+    lines.append("# HELP momo_stage_latency_max_seconds Slowest observation per stage since start.")
+    lines.append("# TYPE momo_stage_latency_max_seconds gauge")
+    for stage, hist in sorted(_histograms.items()):
+        lines.append(f'momo_stage_latency_max_seconds{{stage="{stage}"}} {hist.max_ns / 1e9:.9f}')
+
+    lines.append("# HELP momo_events_total Events processed by type.")
+    lines.append("# TYPE momo_events_total counter")
+    for (event, label), value in sorted(_counters.items()):
+        label_part = f',label="{label}"' if label else ""
+        lines.append(f'momo_events_total{{event="{event}"{label_part}}} {value}')
+
+    for name, fn in sorted(_gauges.items()):
+        try:
+            values = fn() or {}
+        except Exception:
+            continue
+        lines.append(f"# TYPE momo_{name} gauge")
+        for label, value in sorted(values.items()):
+            lines.append(f'momo_{name}{{name="{label}"}} {value}')
+
+    lines.append("# HELP momo_metrics_overhead_seconds Measured cost of one timed stage observation.")
+    lines.append("# TYPE momo_metrics_overhead_seconds gauge")
+    lines.append(f"momo_metrics_overhead_seconds {_overhead_ns / 1e9:.9f}")
+    return "\n".join(lines) + "\n"
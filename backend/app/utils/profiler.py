@@ -0,0 +1,105 @@
+# app/utils/profiler.py
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+# Hard caps so a profile can be taken during market hours without hurting the feed
+PROFILE_MAX_SECONDS = float(os.getenv("MOMO_PROFILE_MAX_SECONDS", "60"))
+PROFILE_MIN_INTERVAL_MS = 1.0
+PROFILE_DEFAULT_INTERVAL_MS = 10.0
+MAX_STACK_DEPTH = 64
+
+_session_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is still running."""
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for every thread in the process (Flask, Socket.IO, the Polygon loop).
+    A background thread wakes every interval, walks sys._current_frames() and counts each stack,
+    so the profiled code runs untouched. Output is in collapsed-stack format (flamegraph.pl / speedscope).
+    """
+
+    def __init__(self, interval_ms=PROFILE_DEFAULT_INTERVAL_MS):
+        self.interval = max(interval_ms, PROFILE_MIN_INTERVAL_MS) / 1000.0
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampling_ns = 0
+        self.elapsed = 0.0
+
+    def _sample_once(self, own_ident, thread_names):
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            name = thread_names.get(ident)
+            if name is None:
+                name = thread_names[ident] = next((t.name for t in threading.enumerate() if t.ident == ident), str(ident))
+            stack.append(name)
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def run(self, seconds):
+        """Sample for `seconds` (capped at PROFILE_MAX_SECONDS) on the calling thread."""
+        seconds = min(max(seconds, 0.0), PROFILE_MAX_SECONDS)
+        own_ident = threading.get_ident()
+        thread_names = {}
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_sample = start
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_sample:
+                time.sleep(next_sample - now)
+                continue
+            sample_start = time.perf_counter_ns()
+            self._sample_once(own_ident, thread_names)
+            self.sampling_ns += time.perf_counter_ns() - sample_start
+            next_sample += self.interval
+            if next_sample < now:
+                # Fell behind (GIL contention): skip missed ticks instead of bursting
+                next_sample = now + self.interval
+        self.elapsed = time.perf_counter() - start
+        return self
+
+    def collapsed(self):
+        """One 'frame;frame;frame count' line per distinct stack, hottest first."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def summary(self, top=20):
+        return {
+            "seconds": round(self.elapsed, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stacks),
+            # Share of wall time the sampler itself held the GIL
+            "overhead_pct": round(self.sampling_ns / 1e9 / self.elapsed * 100, 3) if self.elapsed else 0.0,
+            "top_stacks": [{"stack": stack, "count": count} for stack, count in self.stacks.most_common(top)],
+        }
+
+
+def profile_for(seconds, interval_ms=PROFILE_DEFAULT_INTERVAL_MS):
+    """Run one profiling session. Only one session may run at a time; raises ProfilerBusy otherwise."""
+    if not _session_lock.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running")
+    try:
+        return SamplingProfiler(interval_ms).run(seconds)
+    finally:
+        _session_lock.release()
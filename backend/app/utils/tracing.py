@@ -0,0 +1,106 @@
+# app/utils/tracing.py
+
+import os
+import time
+import itertools
+import threading
+from collections import deque
+
+# Number of order traces kept for /traces
+TRACE_BUFFER_SIZE = int(os.getenv("MOMO_TRACE_BUFFER_SIZE", "512"))
+
+_seq = itertools.count(1)
+_local = threading.local()
+_order_traces = deque(maxlen=TRACE_BUFFER_SIZE)
+
+
+class TraceContext:
+    """
+    Per-quote trace: exchange timestamp, local receive time and a sequence number, plus the hops
+    the quote passed through on its way to an order. Hops are (name, perf_counter_ns) pairs.
+    """
+
+    __slots__ = ("trace_id", "symbol", "seq", "exchange_ts_ms", "recv_wall_ns", "recv_ns", "hops")
+
+    def __init__(self, symbol, exchange_ts_ms=None, recv_ns=None, recv_wall_ns=None):
+        self.seq = next(_seq)
+        self.symbol = symbol
+        self.exchange_ts_ms = exchange_ts_ms
+        self.recv_ns = recv_ns if recv_ns is not None else time.perf_counter_ns()
+        self.recv_wall_ns = recv_wall_ns if recv_wall_ns is not None else time.time_ns()
+        self.trace_id = f"{symbol}-{exchange_ts_ms or 'manual'}-{self.seq}"
+        self.hops = []
+
+    def hop(self, name):
+        self.hops.append((name, time.perf_counter_ns()))
+
+    def to_dict(self):
+        hops = []
+        prev = self.recv_ns
+        for name, at in self.hops:
+            hops.append({
+                "hop": name,
+                "since_recv_us": round((at - self.recv_ns) / 1e3, 1),
+                "delta_us": round((at - prev) / 1e3, 1),
+            })
+            prev = at
+        feed_ms = None
+        if self.exchange_ts_ms is not None:
+            feed_ms = round(self.recv_wall_ns / 1e6 - self.exchange_ts_ms, 1)
+        return {
+            "trace_id": self.trace_id,
+            "symbol": self.symbol,
+            "seq": self.seq,
+            "exchange_ts_ms": self.exchange_ts_ms,
+            "recv_wall_ms": self.recv_wall_ns // 1_000_000,
+            "feed_latency_ms": feed_ms,
+            "hops": hops,
+        }
+
+
+def start_trace(symbol, exchange_ts_ms=None, recv_ns=None, recv_wall_ns=None):
+    """Begin a trace for the quote being processed on this thread."""
+    trace = TraceContext(symbol, exchange_ts_ms, recv_ns, recv_wall_ns)
+    _local.trace = trace
+    return trace
+
+
+def end_trace():
+    _local.trace = None
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def current_trace_id():
+    trace = getattr(_local, "trace", None)
+    return trace.trace_id if trace is not None else None
+
+
+def hop(name):
+    """Mark that the current quote reached a pipeline hop. No-op outside a trace."""
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.hops.append((name, time.perf_counter_ns()))
+
+
+def record_order(symbol, side, qty, price, kind="order"):
+    """
+    Link an order to the quote that caused it. Orders placed outside a quote trace
+    (e.g. manual close from the UI) get a fresh trace of their own. Returns the trace id.
+    """
+    trace = getattr(_local, "trace", None)
+    if trace is None or trace.symbol != symbol:
+        trace = TraceContext(symbol)
+    trace.hop(kind)
+    entry = trace.to_dict()
+    entry["order"] = {"side": side, "qty": qty, "price": price, "kind": kind, "wall_ms": time.time_ns() // 1_000_000}
+    _order_traces.append(entry)
+    return trace.trace_id
+
+
+def recent_order_traces(limit=20):
+    """Most recent order traces, newest first."""
+    traces = list(_order_traces)
+    return traces[::-1][:limit]
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark quote throughput with the app's logging configuration active (INFO level).
+
+Feeds a synthetic random-walk feed for one watched symbol through PolygonStream._quote_handler
+with a pullback entry type selected, so candle closes, tracker updates and breakout level emits
+all log the way they do live. Log output goes to /dev/null so only the logging cost is measured.
+
+Run from the repo root:
+    python -m backend.benchmarks.bench_logging --quotes 20000
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+
+def make_feed(total_quotes, seed=3):
+    rng = random.Random(seed)
+    t_ms = 1_760_000_000_000
+    price = 5.0
+    feed = []
+    for _ in range(total_quotes):
+        t_ms += 250
+        price = max(1.0, price + rng.gauss(0, 0.02))
+        feed.append({"t": t_ms, "bp": round(price - 0.01, 2), "ap": round(price + 0.01, 2), "bs": 3, "as": 4})
+    return feed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quotes", type=int, default=20_000)
+    parser.add_argument("--entry-type", default="10s")
+    args = parser.parse_args()
+
+    # Handlers capture sys.stderr when they are created, so swap it before the app configures logging
+    real_stderr = sys.stderr
+    sys.stderr = open(os.devnull, "w")
+    try:
+        import backend.app as app_pkg
+        from backend.app import db
+        from backend.app.utils.log_utils import configure_logging
+        log_listener = configure_logging()
+        import backend.app.shared_state as shared_state
+        from backend.app.trading.core.strategy import set_entry_type
+
+        db.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+        db.init_db()
+        app_pkg.create_app()
+        from backend.app.startup import warm_imports
+        warm_imports()
+        symbol = "BENCH"
+        shared_state.watched_ticker = symbol
+        shared_state.breakout_ready = True
+        set_entry_type(symbol, args.entry_type)
+
+        feed = make_feed(args.quotes)
+        handler = app_pkg.polygon_stream._quote_handler
+
+        async def run():
+            for event in feed:
+                await handler(symbol, event)
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        # The writes happen on the log listener thread; include the drain
+        log_listener.flush()
+        drained = time.perf_counter() - start
+    finally:
+        sys.stderr.close()
+        sys.stderr = real_stderr
+
+    print(f"quotes:            {args.quotes}")
+    print(f"ingest quotes/sec: {args.quotes / elapsed:,.0f}")
+    print(f"incl. log drain:   {args.quotes / drained:,.0f} quotes/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Socket.IO fan-out load test.
+
+Starts a local backend (python -m backend.app) driven by the synthetic quote feed (MOMO_SYNTHETIC_FEED),
+then connects N simulated browser clients for each requested client count and measures:
+- per-message delivery latency of price_update (client receive time minus the quote timestamp)
+- messages each client should have received (the server's socketio_emit counter from /metrics)
+  against what it did receive, and how many of them were still queued when the window closed
+- server CPU % and RSS, sampled twice a second (psutil if installed, /proc otherwise)
+
+Everything runs locally against a throwaway DB; no Polygon key needed. Needs the Socket.IO client:
+    pip install "python-socketio[client]"   # psutil optional
+
+Run from the repo root:
+    python -m backend.benchmarks.loadtest_socketio --clients 1 10 50 --symbols 20 --rate 200 --duration 15
+
+The clients share one process, so at high client counts the harness itself can become the bottleneck;
+its own CPU % is reported alongside the server's so that shows up.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+EMIT_COUNTER_RE = re.compile(r'momo_events_total\{event="socketio_emit",label="price_update"\} (\d+)')
+
+
+class ProcessSampler:
+    """Samples CPU % and RSS of a process in the background."""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu = []
+        self.rss_mb = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_proc(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = int(fields[11]) + int(fields[12])  # utime + stime
+        rss_kb = 0
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+                    break
+        return ticks / os.sysconf("SC_CLK_TCK"), rss_kb / 1024
+
+    def _run(self):
+        if psutil is not None:
+            proc = psutil.Process(self.pid)
+            proc.cpu_percent(None)
+            while not self._stop.wait(self.interval):
+                self.cpu.append(proc.cpu_percent(None))
+                self.rss_mb.append(proc.memory_info().rss / 1024 / 1024)
+            return
+        last_cpu, _ = self._read_proc()
+        last_t = time.monotonic()
+        while not self._stop.wait(self.interval):
+            cpu_s, rss = self._read_proc()
+            now = time.monotonic()
+            self.cpu.append((cpu_s - last_cpu) / (now - last_t) * 100)
+            self.rss_mb.append(rss)
+            last_cpu, last_t = cpu_s, now
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return {
+            "cpu_avg_pct": round(sum(self.cpu) / len(self.cpu), 1) if self.cpu else None,
+            "cpu_max_pct": round(max(self.cpu), 1) if self.cpu else None,
+            "rss_max_mb": round(max(self.rss_mb), 1) if self.rss_mb else None,
+        }
+
+
+class LoadClient:
+    def __init__(self, url):
+        import socketio
+        self.url = url
+        self.sio = socketio.Client(reconnection=False)
+        self.received = 0
+        self.candles = 0
+        self.latencies_ms = []
+        # Measurement window on quote timestamps; messages for quotes inside it are counted even if late
+        self.window_start = float("inf")
+        self.window_end = float("inf")
+        self.in_window = 0
+        self.late = 0
+        self.sio.on("price_update", self._on_price)
+        self.sio.on("candle_update", self._on_candle)
+
+    def _on_price(self, data):
+        self.received += 1
+        try:
+            sent = datetime.fromisoformat(data["timestamp"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return
+        if self.window_start <= sent < self.window_end:
+            now = time.time()
+            self.in_window += 1
+            self.latencies_ms.append((now - sent) * 1000)
+            if now >= self.window_end:
+                self.late += 1
+
+    def _on_candle(self, data):
+        self.candles += 1
+
+    def connect(self):
+        self.sio.connect(self.url, transports=["websocket"])
+
+    def disconnect(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 2)
+
+
+def emitted_price_updates(base_url):
+    with urllib.request.urlopen(f"{base_url}/metrics", timeout=10) as resp:
+        match = EMIT_COUNTER_RE.search(resp.read().decode())
+    return int(match.group(1)) if match else 0
+
+
+def start_server(port, symbols, rate, burstiness, log_path, async_mode):
+    env = dict(os.environ)
+    env.update({
+        "MOMO_PORT": str(port),
+        "MOMO_SYNTHETIC_FEED": ",".join(symbols),
+        "MOMO_SYNTHETIC_RATE": str(rate),
+        "MOMO_SYNTHETIC_BURSTINESS": str(burstiness),
+        "MOMO_SOCKETIO_ASYNC_MODE": async_mode,
+        "MOMO_DB_PATH": os.path.join(tempfile.mkdtemp(prefix="momo-loadtest-"), "loadtest.db"),
+    })
+    log = open(log_path, "w")
+    proc = subprocess.Popen([sys.executable, "-m", "backend.app"], env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited early, see {log_path}")
+        try:
+            urllib.request.urlopen(f"{base_url}/ping", timeout=1)
+            return proc, base_url
+        except OSError:
+            time.sleep(0.3)
+    proc.terminate()
+    raise RuntimeError(f"server did not come up, see {log_path}")
+
+
+def run_step(base_url, server_pid, num_clients, duration, watch, drain=2.0):
+    clients = [LoadClient(base_url) for _ in range(num_clients)]
+    connect_start = time.perf_counter()
+    for client in clients:
+        client.connect()
+    connect_s = time.perf_counter() - connect_start
+    if watch:
+        # One client acts as the UI and selects a symbol, so it streams at the full feed rate
+        clients[0].sio.emit("select_ticker", watch)
+    time.sleep(1.0)
+
+    server = ProcessSampler(server_pid) if server_pid else None
+    harness = ProcessSampler(os.getpid())
+    if server is not None:
+        server.start()
+    harness.start()
+    emitted_start = emitted_price_updates(base_url)
+    window_start = time.time()
+    for client in clients:
+        client.window_start = window_start
+    time.sleep(duration)
+    window_end = time.time()
+    for client in clients:
+        client.window_end = window_end
+    emitted = emitted_price_updates(base_url) - emitted_start
+    # Let messages for quotes inside the window that are still queued arrive
+    time.sleep(drain)
+    server_stats = server.stop() if server is not None else {"cpu_avg_pct": None, "rss_max_mb": None}
+    harness_stats = harness.stop()
+    for client in clients:
+        client.disconnect()
+
+    received = [c.in_window for c in clients]
+    queued = [c.late for c in clients]
+    latencies = [lat for c in clients for lat in c.latencies_ms]
+    dropped = [max(0, emitted - r) for r in received]
+    return {
+        "clients": num_clients,
+        "connect_seconds": round(connect_s, 2),
+        "emitted_per_client": emitted,
+        "emit_rate_per_sec": round(emitted / duration, 1),
+        "received_avg": round(sum(received) / num_clients, 1),
+        "dropped_total": sum(dropped),
+        "dropped_pct": round(sum(dropped) / (emitted * num_clients) * 100, 2) if emitted else 0.0,
+        "queued_after_window_avg": round(sum(queued) / num_clients, 1),
+        "latency_p50_ms": _percentile(latencies, 0.5),
+        "latency_p99_ms": _percentile(latencies, 0.99),
+        "latency_max_ms": round(max(latencies), 2) if latencies else None,
+        "server": server_stats,
+        "harness": harness_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--symbols", type=int, default=20, help="synthetic symbols in the feed")
+    parser.add_argument("--rate", type=float, default=200.0, help="synthetic quotes/sec across all symbols")
+    parser.add_argument("--burstiness", type=float, default=0.0)
+    parser.add_argument("--duration", type=float, default=15.0, help="measurement window per step, seconds")
+    parser.add_argument("--no-watch", action="store_true", help="don't select a ticker (background throttling only)")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--async-mode", default="threading", choices=["threading", "eventlet"],
+                        help="Flask-SocketIO async mode for the spawned server")
+    parser.add_argument("--url", help="use an already running server instead of starting one")
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args()
+
+    symbols = [f"SYN{i}" for i in range(args.symbols)]
+    watch = None if args.no_watch else symbols[0]
+    proc = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        server_pid = None
+    else:
+        log_path = os.path.join(tempfile.gettempdir(), "momo-loadtest-server.log")
+        proc, base_url = start_server(args.port, symbols, args.rate, args.burstiness, log_path, args.async_mode)
+        server_pid = proc.pid
+        print(f"Server pid {server_pid} on {base_url} (log: {log_path})")
+
+    results = []
+    try:
+        for n in args.clients:
+            step = run_step(base_url, server_pid, n, args.duration, watch)
+            results.append(step)
+            print(f"{n:>5} clients: {step['emit_rate_per_sec']:>7.1f} msg/s per client, "
+                  f"p50 {step['latency_p50_ms']} ms, p99 {step['latency_p99_ms']} ms, "
+                  f"dropped {step['dropped_pct']}%, queued {step['queued_after_window_avg']}, "
+                  f"server cpu {step['server']['cpu_avg_pct']}% rss {step['server']['rss_max_mb']} MB, "
+                  f"harness cpu {step['harness']['cpu_avg_pct']}%", flush=True)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the market-data and strategy hot paths.
+
+Each benchmark drives one stage with a synthetic quote feed (backend/app/trading/stream/synthetic_feed.py) and records
+per-call latency in a log-linear histogram, plus throughput. No API key or running server needed.
+
+Run from the repo root:
+    python -m backend.benchmarks.suite run                      # writes backend/benchmarks/results/latest.json
+    python -m backend.benchmarks.suite run --save-baseline      # ...and stores it as the baseline
+    python -m backend.benchmarks.suite run --compare            # run, then compare against the baseline
+    python -m backend.benchmarks.suite compare --threshold 0.15 # compare latest.json against baseline.json
+    python -m backend.benchmarks.suite run --only quote_handler candle_10s --rate 50 --burstiness 0.5
+
+compare exits with status 1 when any benchmark's throughput drops, or its median latency grows,
+by more than the threshold.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+from backend.app.trading.stream.synthetic_feed import SyntheticQuoteFeed
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+LATEST_PATH = os.path.join(RESULTS_DIR, "latest.json")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+DEFAULT_THRESHOLD = 0.15
+
+
+def _load_app():
+    """Import the backend with a throwaway DB and a Socket.IO server that has nowhere to send."""
+    import backend.app as app_pkg
+    from backend.app import db
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="momo-bench-"), "bench.db")
+    db.init_db()
+    app_pkg.create_app()
+    from backend.app.startup import warm_imports
+    warm_imports()
+    return app_pkg
+
+
+def _reset_symbol(symbol, entry_type="10s"):
+    import backend.app.shared_state as shared_state
+    shared_state.ticker_states.pop(symbol, None)
+    shared_state.watched_ticker = symbol
+    shared_state.breakout_ready = True
+    from backend.app.trading.core.strategy import set_entry_type
+    return set_entry_type(symbol, entry_type)
+
+
+def _measure(fn, items):
+    """Call fn(item) for every item, timing each call. Returns (histogram, wall seconds)."""
+    from backend.app.utils.metrics import LatencyHistogram
+    hist = LatencyHistogram()
+    perf_counter_ns = time.perf_counter_ns
+    start = perf_counter_ns()
+    for item in items:
+        t0 = perf_counter_ns()
+        fn(item)
+        hist.record(perf_counter_ns() - t0)
+    return hist, (perf_counter_ns() - start) / 1e9
+
+
+def _quotes(symbol, events):
+    from backend.app.trading.stream.polygon_stream import _quote_from_event
+    return [_quote_from_event(symbol, event) for event in events]
+
+
+# --- benchmarks: each takes (app_pkg, feed_factory, n) and returns (histogram, seconds) ---
+
+def bench_quote_handler(app_pkg, feed_factory, n):
+    symbol = "BQH"
+    _reset_symbol(symbol)
+    events = feed_factory(symbol).events(n)
+    handler = app_pkg.polygon_stream._quote_handler
+    from backend.app.utils.metrics import LatencyHistogram
+    hist = LatencyHistogram()
+
+    async def run():
+        perf_counter_ns = time.perf_counter_ns
+        start = perf_counter_ns()
+        for event in events:
+            t0 = perf_counter_ns()
+            await handler(symbol, event)
+            hist.record(perf_counter_ns() - t0)
+        return (perf_counter_ns() - start) / 1e9
+
+    return hist, asyncio.run(run())
+
+
+def _bench_candle(builder_name, entry_type):
+    def bench(app_pkg, feed_factory, n):
+        from backend.app.trading.core import candle_builder
+        symbol = f"BC{entry_type.upper()}"
+        _reset_symbol(symbol, entry_type)
+        quotes = _quotes(symbol, feed_factory(symbol).events(n))
+        builder = getattr(candle_builder, builder_name)
+        return _measure(lambda q: builder(symbol, q), quotes)
+    return bench
+
+
+def bench_time_bucket(app_pkg, feed_factory, n):
+    from backend.app.trading.utils.time_tools import bucket_ms, get_session_calendar, INTERVAL_MS
+    calendar = get_session_calendar()
+    interval = INTERVAL_MS["10s"]
+    events = feed_factory("BTB").events(n)
+
+    def bucket(event):
+        calendar.session(event["t"])
+        return bucket_ms(event["t"], interval)
+    return _measure(bucket, events)
+
+
+def _make_candles(symbol, feed_factory, n, interval_sec=10):
+    from backend.app.trading.pullbacks.tracker import Candle
+    feed = feed_factory(symbol)
+    candles = []
+    for i in range(n):
+        prices = [feed.next_event()["ap"] for _ in range(5)]
+        ts = datetime.fromtimestamp(1_760_000_000 + i * interval_sec, tz=timezone.utc)
+        candles.append(Candle(ts, prices[0], max(prices), min(prices), prices[-1], 1000))
+    return candles
+
+
+def bench_tracker_add_candle(app_pkg, feed_factory, n):
+    from backend.app.trading.pullbacks.tracker import PullbackTracker
+    symbol = "BTA"
+    _reset_symbol(symbol, "10s")
+    # A tracker keeps the whole session; a few thousand candles is a long day of 10s bars
+    candles = _make_candles(symbol, feed_factory, min(n, 2000))
+    tracker = PullbackTracker(symbol, "10s")
+    return _measure(tracker.add_candle, candles)
+
+
+def bench_tracker_check_tick(app_pkg, feed_factory, n):
+    from backend.app.trading.pullbacks.tracker import PullbackTracker
+    symbol = "BTC"
+    _reset_symbol(symbol, "10s")
+    tracker = PullbackTracker(symbol, "10s")
+    for candle in _make_candles(symbol, feed_factory, 50):
+        tracker.add_candle(candle)
+    # Armed but never crossed: the common per-tick case
+    tracker.last_breakout_level = 1e9
+    tracker.pullback_active = True
+    tracker.breakout_triggered = False
+    events = feed_factory(symbol).events(n)
+    return _measure(lambda e: tracker.check_tick_for_entry(symbol, (e["bp"] + e["ap"]) / 2, e["bp"], e["ap"]), events)
+
+
+def bench_breakout_dispatch(app_pkg, feed_factory, n):
+    """Per-tick strategy dispatch (process_quote_for_breakout) for an armed 10s pullback with an open position."""
+    from backend.app.trading.core.breakout_logic import process_quote_for_breakout
+    from backend.app.trading.pullbacks.tracker import PullbackTracker
+    symbol = "BBD"
+    state = _reset_symbol(symbol, "10s")
+    tracker = state["pullback_tracker_10s"] = PullbackTracker(symbol, "10s")
+    tracker.last_breakout_level = 1e9
+    tracker.pullback_active = True
+    state["position"] = {
+        "entry_type": "10s", "entry_price": 5.0, "size": 1000,
+        "tp1": 1e9, "tp2": 1e9, "stop": -1.0,
+        "tp1_hit": False, "tp2_hit": False, "sl_hit": False, "half_closed": False,
+    }
+    from backend.app.trading.core.strategy import refresh_trigger_band
+    refresh_trigger_band(symbol, state)
+    quotes = _quotes(symbol, feed_factory(symbol).events(n))
+    try:
+        return _measure(lambda q: process_quote_for_breakout(symbol, q), quotes)
+    finally:
+        state["position"] = None
+
+
+def bench_quote_stats(app_pkg, feed_factory, n):
+    """Per-quote cost of the rolling spread/rate/imbalance windows (default 5s and 30s)."""
+    from backend.app.trading.indicators.microstructure import update_quote_stats
+    symbol = "BQS"
+    _reset_symbol(symbol, "10s")
+    quotes = _quotes(symbol, feed_factory(symbol).events(n))
+    return _measure(lambda q: update_quote_stats(symbol, q), quotes)
+
+
+def bench_trade_tape(app_pkg, feed_factory, n):
+    """Per-print cost of the trade tape: ring, 10s/1m/5m bars plus a tick and a volume bar type."""
+    import random
+    from backend.app.trading.core import trade_tape
+    symbol = "BTP"
+    state = _reset_symbol(symbol, "10s")
+    state["tape"] = trade_tape.TradeTape(symbol, state, bar_types=("100t", "20000v"))
+    rng = random.Random(7)
+    # Bursty prints: quote times and prices, a few odd lots
+    trades = [{"ev": "T", "sym": symbol, "t": e["t"], "p": e["ap"], "s": rng.choice((100, 100, 200, 500)),
+               "c": [37] if rng.random() < 0.1 else None} for e in feed_factory(symbol).events(n)]
+    return _measure(lambda t: trade_tape.handle_trade(symbol, t), trades)
+
+
+def bench_event_bus(app_pkg, feed_factory, n):
+    """Bus overhead per publish: a candle_close with five no-op sync subscribers, like the default wiring."""
+    from backend.app.events import EventBus
+    bus = EventBus()
+    for _ in range(5):
+        bus.subscribe("candle_close", lambda symbol, timeframe, candle: None)
+    candle = {"timestamp": 0, "open": 5.0, "high": 5.0, "low": 5.0, "close": 5.0, "volume": 0}
+    return _measure(lambda _: bus.publish("candle_close", "BEB", "10s", candle), range(n))
+
+
+def bench_positions_view(app_pkg, feed_factory, n):
+    """/positions body with 10 open positions among 50 symbols of 2000 candles; a new quote every 10 polls."""
+    from backend.app.state_manager import TickerStates
+    from backend.app.shared_state import default_symbol_state
+    from backend.app.state_views import positions_view
+    states = TickerStates(default_symbol_state)
+    for i in range(50):
+        symbol = f"BP{i:02d}"
+        events = feed_factory(symbol).events(2000)
+        state = states[symbol]
+        state.candles_10s = [{"timestamp": e["t"], "open": e["ap"], "high": e["ap"], "low": e["bp"],
+                              "close": e["bp"], "volume": e["as"] + e["bs"]} for e in events]
+        state.last_quote = _quotes(symbol, events[-1:])[0]
+        if i % 5 == 0:
+            state.position = {"entry_type": "10s", "entry_price": events[0]["ap"], "size": 1000,
+                              "tp1": 1e9, "tp2": 1e9, "stop": -1.0, "tp1_hit": False, "tp2_hit": False, "sl_hit": False}
+    quotes = _quotes("BP00", feed_factory("BP00").events(n // 10 + 1))
+
+    def poll(i):
+        if i % 10 == 0:
+            states["BP00"].last_quote = quotes[i // 10]
+        positions_view(states)
+    return _measure(poll, range(n))
+
+
+def bench_check_trade_targets(app_pkg, feed_factory, n):
+    from backend.app.trading.core.trade_monitor import check_trade_targets
+    symbol = "BTT"
+    state = _reset_symbol(symbol, "10s")
+    # Open position whose targets and stop are never reached
+    state["position"] = {
+        "entry_type": "10s", "entry_price": 5.0, "size": 1000,
+        "tp1": 1e9, "tp2": 1e9, "stop": -1.0,
+        "tp1_hit": False, "tp2_hit": False, "sl_hit": False, "half_closed": False,
+    }
+    events = feed_factory(symbol).events(n)
+    try:
+        return _measure(lambda e: check_trade_targets(symbol, (e["bp"] + e["ap"]) / 2, e["bp"], e["ap"]), events)
+    finally:
+        state["position"] = None
+
+
+def bench_db_insert_execution(app_pkg, feed_factory, n):
+    from backend.app.db import insert_execution
+    rows = [{
+        "symbol": "BDB", "quantity": 100, "price": 5.0 + i * 0.01, "side": "buy" if i % 2 == 0 else "sell",
+        "datetime": "simulated", "trade_id": None, "commission": None, "entry_type": "10s",
+    } for i in range(min(n, 2000))]
+    return _measure(insert_execution, rows)
+
+
+def bench_db_insert_trade(app_pkg, feed_factory, n):
+    from backend.app.db import insert_trade
+    rows = [{
+        "symbol": "BDB", "shares": 100, "entry_price": 5.0, "exit_price": 5.0 + i * 0.01, "entry_type": "10s",
+        "entry_time": "2025-01-02T09:30:00", "exit_time": "2025-01-02T09:31:00", "profit_loss": i * 1.0,
+    } for i in range(min(n, 2000))]
+    return _measure(insert_trade, rows)
+
+
+BENCHMARKS = {
+    "quote_handler": bench_quote_handler,
+    "candle_1m": _bench_candle("handle_new_quote", "1m"),
+    "candle_10s": _bench_candle("handle_new_quote_10s", "10s"),
+    "candle_5m": _bench_candle("handle_new_quote_5m", "5m"),
+    "time_bucket": bench_time_bucket,
+    "tracker_add_candle": bench_tracker_add_candle,
+    "tracker_check_tick": bench_tracker_check_tick,
+    "breakout_dispatch": bench_breakout_dispatch,
+    "quote_stats": bench_quote_stats,
+    "trade_tape": bench_trade_tape,
+    "event_bus": bench_event_bus,
+    "positions_view": bench_positions_view,
+    "check_trade_targets": bench_check_trade_targets,
+    "db_insert_execution": bench_db_insert_execution,
+    "db_insert_trade": bench_db_insert_trade,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_suite(names, quotes, feed_kwargs, with_logging=False):
+    if not with_logging:
+        # Measure the pipeline, not terminal I/O
+        logging.disable(logging.CRITICAL)
+    app_pkg = _load_app()
+
+    def feed_factory(symbol):
+        return SyntheticQuoteFeed(symbols=[symbol], **feed_kwargs)
+
+    results = {}
+    for name in names:
+        hist, seconds = BENCHMARKS[name](app_pkg, feed_factory, quotes)
+        snapshot = hist.snapshot()
+        snapshot["seconds"] = round(seconds, 4)
+        snapshot["ops_per_sec"] = round(hist.count / seconds, 1) if seconds else 0.0
+        results[name] = snapshot
+        print(f"{name:<22} {snapshot['ops_per_sec']:>12,.0f} ops/s   p50 {snapshot['p50_us']:>9.1f} us   "
+              f"p99 {snapshot['p99_us']:>9.1f} us   max {snapshot['max_us']:>10.1f} us", flush=True)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quotes": quotes,
+            "feed": feed_kwargs,
+            "with_logging": with_logging,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Return a list of (name, metric, baseline, current, change, regressed) rows."""
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in (("ops_per_sec", True), ("p50_us", False), ("p99_us", False)):
+            b, c = base.get(metric), cur.get(metric)
+            if not b or c is None:
+                continue
+            change = (c - b) / b
+            worse = -change if higher_is_better else change
+            # p99 is reported but too noisy to gate on
+            regressed = metric != "p99_us" and worse > threshold
+            rows.append((name, metric, b, c, change, regressed))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"{'benchmark':<22} {'metric':<12} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, metric, b, c, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<22} {metric:<12} {b:>12,.1f} {c:>12,.1f} {change * 100:>+8.1f}%{flag}")
+    regressions = [r for r in rows if r[5]]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {threshold * 100:.0f}%")
+    else:
+        print(f"\nNo regressions beyond {threshold * 100:.0f}%")
+    return regressions
+
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"Results written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="run the benchmarks")
+    run_p.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run a subset")
+    run_p.add_argument("--quotes", type=int, default=20_000, help="calls per benchmark")
+    run_p.add_argument("--quick", action="store_true", help="2,000 calls per benchmark")
+    run_p.add_argument("--rate", type=float, default=20.0, help="synthetic quotes/sec per symbol")
+    run_p.add_argument("--volatility", type=float, default=0.002)
+    run_p.add_argument("--spread", type=float, default=0.01)
+    run_p.add_argument("--burstiness", type=float, default=0.0)
+    run_p.add_argument("--seed", type=int, default=7)
+    run_p.add_argument("--with-logging", action="store_true", help="keep app logging enabled")
+    run_p.add_argument("--out", default=LATEST_PATH)
+    run_p.add_argument("--save-baseline", action="store_true")
+    run_p.add_argument("--compare", action="store_true", help="compare against the baseline after running")
+    run_p.add_argument("--baseline", default=BASELINE_PATH)
+    run_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    cmp_p = sub.add_parser("compare", help="compare two result files")
+    cmp_p.add_argument("--baseline", default=BASELINE_PATH)
+    cmp_p.add_argument("--current", default=LATEST_PATH)
+    cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        rows = compare(_load_json(args.baseline), _load_json(args.current), args.threshold)
+        sys.exit(1 if print_comparison(rows, args.threshold) else 0)
+
+    feed_kwargs = {
+        "rate": args.rate,
+        "volatility": args.volatility,
+        "spread": args.spread,
+        "burstiness": args.burstiness,
+        "seed": args.seed,
+    }
+    quotes = 2000 if args.quick else args.quotes
+    names = args.only or list(BENCHMARKS)
+    data = run_suite(names, quotes, feed_kwargs, args.with_logging)
+    _write_json(args.out, data)
+    if args.save_baseline:
+        _write_json(args.baseline, data)
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            sys.exit(1)
+        rows = compare(_load_json(args.baseline), data, args.threshold)
+        sys.exit(1 if print_comparison(rows, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()